@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+============================================================
+APERÇU HTML/SVG — TalosPrimes
+Second moteur de rendu des générateurs, pour la prévisualisation
+============================================================
+
+CanvasSvg reproduit la partie de l'API du canvas ReportLab utilisée par
+generate_fiche_paie, generate_previsionnel et mise_en_page (couleurs,
+polices, rectangles, chemins, objets texte, sauts de page). Les
+générateurs tracent exactement la même mise en page ; seule la sortie
+change : une page HTML autonome avec un <svg> par page, que le
+navigateur affiche immédiatement. Le PDF n'est produit qu'au
+téléchargement.
+
+    generate_fiche_paie('apercu.html', apercu=True, ...)
+
+Pour garder la page légère, les couleurs deviennent des classes CSS
+partagées par toutes les pages, la police est déclarée une fois, et les
+textes consécutifs de même style (ceux d'un objet texte de mise_en_page)
+sont regroupés dans un même <g>. Les objets réutilisables (beginForm /
+doForm, gabarits de graphiques.py) sont définis une fois et rappelés
+par <use>.
+"""
+
+import html
+import io
+
+from reportlab.lib.colors import black
+
+POLICES = {
+    'Helvetica': ('Helvetica,Arial,sans-serif', None),
+    'Helvetica-Bold': ('Helvetica,Arial,sans-serif', 'bold'),
+}
+
+
+def _n(valeur):
+    """Nombre compact : 2 décimales au plus, sans zéros inutiles"""
+    texte = f"{valeur:.2f}".rstrip('0').rstrip('.')
+    return texte if texte != '-0' else '0'
+
+
+def _couleur(couleur):
+    if couleur is None:
+        return 'none'
+    rouge, vert, bleu = (int(round(v * 255)) for v in (couleur.red, couleur.green, couleur.blue))
+    return f'#{rouge:02x}{vert:02x}{bleu:02x}'
+
+
+def _serialiser(elements, morceaux):
+    """Éléments d'une page ; les textes consécutifs de même style partagent un <g>"""
+    style_courant = None
+    for element in elements:
+        style = element[0] if isinstance(element, tuple) else None
+        if style != style_courant:
+            if style_courant is not None:
+                morceaux.append('</g>')
+            if style is not None:
+                morceaux.append(f'<g class="{style}">')
+            style_courant = style
+        morceaux.append(element[1] if style is not None else element)
+    if style_courant is not None:
+        morceaux.append('</g>')
+
+
+class CheminSvg:
+    """Chemin ReportLab, converti au repère SVG (y vers le bas)"""
+
+    def __init__(self, hauteur_page):
+        self.h = hauteur_page
+        self.d = []
+
+    def moveTo(self, x, y):
+        self.d.append(f'M{_n(x)} {_n(self.h - y)}')
+
+    def lineTo(self, x, y):
+        self.d.append(f'L{_n(x)} {_n(self.h - y)}')
+
+    def curveTo(self, x1, y1, x2, y2, x3, y3):
+        self.d.append(f'C{_n(x1)} {_n(self.h - y1)} {_n(x2)} {_n(self.h - y2)} {_n(x3)} {_n(self.h - y3)}')
+
+    def rect(self, x, y, largeur, hauteur):
+        self.d.append(f'M{_n(x)} {_n(self.h - y)}h{_n(largeur)}v{_n(-hauteur)}h{_n(-largeur)}z')
+
+    def close(self):
+        self.d.append('z')
+
+
+class TexteSvg:
+    def __init__(self):
+        self.police = 'Helvetica'
+        self.taille = 10
+        self.couleur = black
+        self.x = self.y = 0
+        self.segments = []
+
+    def setFont(self, police, taille, leading=None):
+        self.police, self.taille = police, taille
+
+    def setFillColor(self, couleur):
+        self.couleur = couleur
+
+    def setTextOrigin(self, x, y):
+        self.x, self.y = x, y
+
+    def textOut(self, texte):
+        self.segments.append((self.x, self.y, texte, self.police, self.taille, self.couleur))
+
+
+class CanvasSvg:
+    """Canvas « ReportLab-compatible » qui écrit du HTML/SVG"""
+
+    def __init__(self, output, pagesize):
+        self.output = output
+        self.largeur, self.hauteur = pagesize
+        self.titre = ''
+        self.pages = []
+        self._page = []
+        self._remplissage = black
+        self._trait = black
+        self._epaisseur = 1
+        self._police = 'Helvetica'
+        self._taille = 12
+        self._classes = {}  # '#rrggbb' -> nom de classe CSS
+        self._formes = {}   # nom -> éléments
+        self._page_hors_forme = None
+        self._etats = []    # groupes <g> ouverts par translate() depuis chaque saveState()
+
+    # ── État graphique ──
+
+    def setTitle(self, titre):
+        self.titre = titre
+
+    def setAuthor(self, auteur):
+        pass
+
+    def setCreator(self, createur):
+        pass
+
+    def setFillColor(self, couleur):
+        self._remplissage = couleur
+
+    def setStrokeColor(self, couleur):
+        self._trait = couleur
+
+    def setLineWidth(self, epaisseur):
+        self._epaisseur = epaisseur
+
+    def setFont(self, police, taille, leading=None):
+        self._police, self._taille = police, taille
+
+    def saveState(self):
+        self._etats.append(0)
+
+    def restoreState(self):
+        self._page.extend(['</g>'] * self._etats.pop())
+
+    def translate(self, dx, dy):
+        # Repère SVG : y vers le bas
+        self._page.append(f'<g transform="translate({_n(dx)} {_n(-dy)})">')
+        if self._etats:
+            self._etats[-1] += 1
+
+    # ── Objets réutilisables ──
+
+    def beginForm(self, nom, lowerx=0, lowery=0, upperx=None, uppery=None):
+        self._page_hors_forme, self._page = self._page, []
+        self._formes[nom] = self._page
+
+    def endForm(self):
+        self._page, self._page_hors_forme = self._page_hors_forme, None
+
+    def doForm(self, nom):
+        self._page.append(f'<use href="#{nom}"/>')
+
+    # ── Primitives ──
+
+    def _classe(self, couleur):
+        """Classe CSS de remplissage d'une couleur (créée au besoin)"""
+        code = _couleur(couleur)
+        classe = self._classes.get(code)
+        if classe is None:
+            classe = self._classes[code] = f'c{len(self._classes)}'
+        return classe
+
+    def _peinture(self, fill, stroke):
+        attrs = f' class="{self._classe(self._remplissage)}"' if fill else ' fill="none"'
+        if stroke:
+            attrs += f' stroke="{_couleur(self._trait)}" stroke-width="{_n(self._epaisseur)}"'
+        return attrs
+
+    def rect(self, x, y, largeur, hauteur, stroke=1, fill=0):
+        self._page.append(f'<rect x="{_n(x)}" y="{_n(self.hauteur - y - hauteur)}" width="{_n(largeur)}" '
+                          f'height="{_n(hauteur)}"{self._peinture(fill, stroke)}/>')
+
+    def roundRect(self, x, y, largeur, hauteur, rayon, stroke=1, fill=0):
+        self._page.append(f'<rect x="{_n(x)}" y="{_n(self.hauteur - y - hauteur)}" width="{_n(largeur)}" '
+                          f'height="{_n(hauteur)}" rx="{_n(rayon)}"{self._peinture(fill, stroke)}/>')
+
+    def circle(self, x, y, rayon, stroke=1, fill=0):
+        self._page.append(f'<circle cx="{_n(x)}" cy="{_n(self.hauteur - y)}" r="{_n(rayon)}"'
+                          f'{self._peinture(fill, stroke)}/>')
+
+    def line(self, x1, y1, x2, y2):
+        self._page.append(f'<line x1="{_n(x1)}" y1="{_n(self.hauteur - y1)}" x2="{_n(x2)}" '
+                          f'y2="{_n(self.hauteur - y2)}"{self._peinture(False, True)}/>')
+
+    def beginPath(self):
+        return CheminSvg(self.hauteur)
+
+    def drawPath(self, chemin, stroke=1, fill=0):
+        if chemin.d:
+            self._page.append(f'<path d="{"".join(chemin.d)}"{self._peinture(fill, stroke)}/>')
+
+    def _texte(self, x, y, texte, police, taille, couleur, ancre=None):
+        graisse = POLICES.get(police, (None, None))[1]
+        style = f'{self._classe(couleur)}{" b" if graisse else ""}" font-size="{_n(taille)}'
+        ancre = f' text-anchor="{ancre}"' if ancre else ''
+        self._page.append((style, f'<text x="{_n(x)}" y="{_n(self.hauteur - y)}"{ancre}>'
+                                  f'{html.escape(texte, quote=False)}</text>'))
+
+    def drawString(self, x, y, texte):
+        self._texte(x, y, texte, self._police, self._taille, self._remplissage)
+
+    def drawRightString(self, x, y, texte):
+        self._texte(x, y, texte, self._police, self._taille, self._remplissage, 'end')
+
+    def drawCentredString(self, x, y, texte):
+        self._texte(x, y, texte, self._police, self._taille, self._remplissage, 'middle')
+
+    def beginText(self):
+        return TexteSvg()
+
+    def drawText(self, objet):
+        for x, y, texte, police, taille, couleur in objet.segments:
+            self._texte(x, y, texte, police, taille, couleur)
+
+    # ── Pages ──
+
+    def showPage(self):
+        self.pages.append(self._page)
+        self._page = []
+
+    def html(self):
+        pages = self.pages + ([self._page] if self._page else [])
+        largeur, hauteur = _n(self.largeur), _n(self.hauteur)
+        famille = POLICES['Helvetica'][0]
+        classes = ''.join(f'.{classe}{{fill:{code}}}' for code, classe in self._classes.items())
+        morceaux = [
+            '<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8">',
+            f'<title>{html.escape(self.titre)}</title>',
+            '<style>body{margin:0;padding:12px 0;background:#0b0b16}'
+            'svg{display:block;margin:0 auto 12px;max-width:100%;height:auto;'
+            f'box-shadow:0 2px 12px rgba(0,0,0,.5);font-family:{famille}}}.b{{font-weight:bold}}'
+            f'{classes}</style></head><body>',
+        ]
+        if self._formes:
+            morceaux.append('<svg width="0" height="0" style="position:absolute"><defs>')
+            for nom, elements in self._formes.items():
+                morceaux.append(f'<g id="{nom}">')
+                _serialiser(elements, morceaux)
+                morceaux.append('</g>')
+            morceaux.append('</defs></svg>')
+        for page in pages:
+            morceaux.append(f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {largeur} {hauteur}" '
+                            f'width="{largeur}" height="{hauteur}">')
+            _serialiser(page, morceaux)
+            morceaux.append('</svg>')
+        morceaux.append('</body></html>')
+        return ''.join(morceaux)
+
+    def save(self):
+        data = self.html().encode('utf-8')
+        if hasattr(self.output, 'write'):
+            self.output.write(data)
+        else:
+            with open(self.output, 'wb') as f:
+                f.write(data)
+
+
+if __name__ == '__main__':
+    import gzip
+    import time
+
+    from fiche_paie import generate_fiche_paie
+    from previsionnel import generate_previsionnel
+
+    for nom, generateur in (('fiche_paie', generate_fiche_paie), ('previsionnel', generate_previsionnel)):
+        mesures = {}
+        for apercu in (False, True):
+            debut = time.perf_counter()
+            for _ in range(20):
+                tampon = io.BytesIO()
+                generateur(tampon, apercu=apercu, sidecar=False)
+            mesures[apercu] = ((time.perf_counter() - debut) / 20, len(tampon.getvalue()))
+        (t_pdf, o_pdf), (t_html, o_html) = mesures[False], mesures[True]
+        o_gzip = len(gzip.compress(tampon.getvalue()))
+        print(f"{nom:<13} PDF {t_pdf * 1000:6.1f} ms {o_pdf / 1024:6.1f} Ko | "
+              f"HTML {t_html * 1000:6.1f} ms {o_html / 1024:6.1f} Ko (gzip {o_gzip / 1024:.1f} Ko) | "
+              f"x{t_pdf / t_html:.1f} plus rapide")
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+============================================================
+PROFIL D'ARCHIVAGE DES PDF — TalosPrimes
+Fichiers compacts pour la conservation longue durée
+============================================================
+
+Les bulletins se conservent sans limitation de durée (article L.3243-4
+du Code du travail) : sur des millions de PDF, chaque kilo-octet compte.
+Le profil d'archive (archive=True des générateurs, CanvasArchive)
+réécrit le PDF produit par ReportLab :
+
+- flux de page : sans la couche ASCII85 (+25 % d'octets), compressés au
+  niveau 9 ; coordonnées arrondies au 1/100 de point et couleurs au
+  millième (invisible à l'impression), états graphiques redondants
+  retirés (couleur, police, épaisseur déjà en vigueur, T* avant ET,
+  BT ET vides) ;
+- polices : les 14 polices standard PDF (Helvetica), jamais
+  embarquées ;
+- objets hors flux (pages, polices, catalogue, métadonnées) regroupés
+  dans un flux d'objets compressé, table de références en flux
+  (PDF 1.5) au lieu d'une table texte ;
+- métadonnées minimales : titre, auteur, date ; les entrées par défaut
+  (/ProcSet, /Rotate 0, /Trans, /PageMode /UseNone, /Name des polices)
+  sont retirées.
+
+Le texte des documents est inchangé et le rendu identique à l'œil. Le
+profil n'est pas compatible avec le chiffrement (chiffrement_paie.py) :
+les flux chiffrés ne se recompressent pas.
+
+tailles_sections() ventile les octets d'un PDF (profil par défaut ou
+archive) : contenu des pages, gabarits de graphiques, polices, pages,
+métadonnées, structure (catalogue, arbre des pages, table de références).
+"""
+
+import base64
+from functools import lru_cache
+import io
+import re
+import zlib
+
+from reportlab.pdfgen import canvas
+
+SECTIONS = ('contenu', 'gabarits', 'polices', 'pages', 'metadonnees', 'structure')
+METADONNEES = ('/Title', '/Author', '/CreationDate')
+
+# Jetons d'un flux ou d'un objet PDF : chaîne (parenthèses échappées ou
+# imbriquées une fois), << >>, chaîne hexadécimale, [ ], nom, autre
+JETON = re.compile(
+    rb'\((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)|<<|>>|<[0-9A-Fa-f\s]*>|[\[\]]'
+    rb'|/[^\s/\[\]()<>{}%]*|[^\s/\[\]()<>{}%]+'
+)
+# Premier octet d'un opérande : chaîne, nom, tableau, dictionnaire, nombre
+DEBUT_OPERANDE = frozenset(b'(/<>[]0123456789+-.')
+DELIMITEURS = b'()<>[]{}/%'
+OBJET = re.compile(rb'(\d+) (\d+) obj\s*')
+DEBUT_FLUX = re.compile(rb'>>\s*stream\r?\n')
+REFERENCE = rb'(\d+) \d+ R'
+
+# ============================================================
+# FLUX DE CONTENU
+# ============================================================
+
+# Opérateurs dont les opérandes sont des coordonnées (1/100 pt) ou des
+# couleurs (1/1000) ; cm et Tm : seule la translation est arrondie
+COORDONNEES = {b'm', b'l', b'c', b'v', b'y', b're', b'w', b'Td', b'TD', b'TL'}
+COULEURS = {b'rg', b'RG', b'g', b'G', b'k', b'K'}
+MATRICES = {b'cm', b'Tm'}
+# État graphique suivi : opérateur -> opérateurs qui le rendent inconnu
+ETATS = {
+    b'rg': {b'g', b'k', b'cs', b'sc', b'scn'},
+    b'RG': {b'G', b'K', b'CS', b'SC', b'SCN'},
+    b'w': set(),
+    b'Tf': set(),
+    b'TL': set(),
+}
+
+
+@lru_cache(maxsize=16384)
+def _arrondir(jeton, decimales):
+    if b'.' not in jeton:
+        return jeton
+    texte = b'%.*f' % (decimales, float(jeton))
+    texte = texte.rstrip(b'0').rstrip(b'.')
+    if texte.startswith(b'0.'):
+        texte = texte[1:]
+    elif texte.startswith(b'-0.'):
+        texte = b'-' + texte[2:]
+    return b'0' if texte in (b'', b'-0', b'-') else texte
+
+
+def _operations(flux):
+    """[(opérandes, opérateur)] d'un flux de contenu ; None si le flux
+    contient une image en ligne (données binaires non découpables)"""
+    operations, operandes = [], []
+    for jeton in JETON.findall(flux):
+        if jeton[0] in DEBUT_OPERANDE or jeton in (b'true', b'false', b'null'):
+            operandes.append(jeton)
+        elif jeton == b'BI':
+            return None
+        else:
+            operations.append((operandes, jeton))
+            operandes = []
+    return operations
+
+
+def optimiser_contenu(flux):
+    """Flux de contenu compacté : nombres arrondis, états redondants retirés"""
+    operations = _operations(flux)
+    if operations is None:
+        return flux
+    etat, pile, sortie = {}, [], []
+    for i, (operandes, op) in enumerate(operations):
+        if op in COORDONNEES:
+            operandes = [_arrondir(o, 2) for o in operandes]
+        elif op in COULEURS:
+            operandes = [_arrondir(o, 3) for o in operandes]
+        elif op in MATRICES and len(operandes) == 6:
+            operandes = operandes[:4] + [_arrondir(o, 2) for o in operandes[4:]]
+
+        if op == b'T*' and i + 1 < len(operations) and operations[i + 1][1] == b'ET':
+            continue  # retour à la ligne sans texte derrière
+        if op in ETATS:
+            if etat.get(op) == operandes:
+                continue
+            etat[op] = operandes
+        elif op == b'q':
+            pile.append(dict(etat))
+        elif op == b'Q':
+            etat = pile.pop() if pile else {}
+        elif op == b'gs':
+            etat = {}
+        else:
+            for suivi, effaceurs in ETATS.items():
+                if op in effaceurs:
+                    etat.pop(suivi, None)
+        if op == b'ET' and sortie and sortie[-1] == b'BT':
+            sortie.pop()
+            continue
+        sortie.append(b' '.join(operandes + [op]))
+    return b'\n'.join(sortie)
+
+
+# ============================================================
+# OBJETS
+# ============================================================
+
+def minifier(objet):
+    """Objet PDF (hors flux) sans blancs superflus"""
+    morceaux, precedent = [], b''
+    for m in JETON.finditer(objet):
+        jeton = m.group()
+        if precedent and precedent[-1:] not in DELIMITEURS and jeton[:1] not in DELIMITEURS:
+            morceaux.append(b' ')
+        morceaux.append(jeton)
+        precedent = jeton
+    return b''.join(morceaux)
+
+
+def _nettoyer(objet, info):
+    objet = minifier(objet)
+    if info:
+        paires = re.findall(rb'(/\w+)(\((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)|/\w+)', objet)
+        return b'<<' + b''.join(cle + valeur for cle, valeur in paires if cle.decode() in METADONNEES) + b'>>'
+    for motif in (rb'/ProcSet\[[^\]]*\]', rb'/Rotate 0(?![\d.])', rb'/Trans<<>>', rb'/PageMode/UseNone',
+                  rb'/Name/F\d+'):
+        objet = re.sub(motif, b'', objet)
+    return objet
+
+
+def _a85(donnees):
+    donnees = donnees.strip()
+    if donnees.endswith(b'~>'):
+        donnees = donnees[:-2]
+    return base64.a85decode(donnees)
+
+
+def lire_objets(data):
+    """{numéro: (dictionnaire, données du flux ou None, début, fin)} et le trailer"""
+    objets = {}
+    pos = 0
+    while True:
+        m = OBJET.search(data, pos)
+        if m is None:
+            break
+        debut = m.end()
+        fin_objet = data.find(b'endobj', debut)
+        flux = DEBUT_FLUX.search(data, debut, fin_objet)
+        if flux is None:
+            pos = fin_objet + 6
+            objets[int(m.group(1))] = (data[debut:fin_objet].strip(), None, m.start(), pos)
+            continue
+        dictionnaire = data[debut:flux.start() + 2].strip()
+        longueur = int(re.search(rb'/Length (\d+)', dictionnaire).group(1))
+        pos = data.find(b'endobj', flux.end() + longueur) + 6
+        objets[int(m.group(1))] = (dictionnaire, data[flux.end():flux.end() + longueur], m.start(), pos)
+    trailer = data[data.rfind(b'trailer'):] if b'trailer' in data else b''
+    return objets, trailer
+
+
+def _flux(dictionnaire, donnees):
+    if not re.search(rb'/Filter', dictionnaire):
+        return dictionnaire, donnees
+    filtres = re.search(rb'/Filter\s*(\[[^\]]*\]|/\w+)', dictionnaire).group(1)
+    noms = re.findall(rb'/(\w+)', filtres)
+    if b'ASCII85Decode' in noms:
+        donnees = _a85(donnees)
+        noms.remove(b'ASCII85Decode')
+    if noms != [b'FlateDecode']:
+        return dictionnaire, donnees
+    return dictionnaire, zlib.decompress(donnees)
+
+
+def compacter(data):
+    """Réécrit un PDF de ReportLab selon le profil d'archive ; retourne les octets"""
+    objets, trailer = lire_objets(data)
+    if b'/Encrypt' in trailer:
+        raise ValueError("Profil d'archive incompatible avec un PDF chiffré")
+    racine = int(re.search(rb'/Root ' + REFERENCE, trailer).group(1))
+    info = re.search(rb'/Info ' + REFERENCE, trailer)
+    info = int(info.group(1)) if info else None
+    identifiant = re.search(rb'/ID\s*(\[[^\]]*\])', trailer)
+
+    en_flux, hors_flux = {}, {}
+    for numero, (dictionnaire, donnees, _debut, _fin) in objets.items():
+        if donnees is None:
+            hors_flux[numero] = _nettoyer(dictionnaire, numero == info)
+            continue
+        filtres = re.search(rb'/Filter\s*(\[[^\]]*\]|/\w+)', dictionnaire)
+        noms = re.findall(rb'/(\w+)', filtres.group(1)) if filtres else []
+        if b'ASCII85Decode' in noms:
+            donnees = _a85(donnees)
+            noms.remove(b'ASCII85Decode')
+        if noms in ([], [b'FlateDecode']) and not re.search(rb'/Subtype\s*/Image', dictionnaire):
+            brut = zlib.decompress(donnees) if noms else donnees
+            donnees = zlib.compress(optimiser_contenu(brut), 9)
+            noms = [b'FlateDecode']
+        dictionnaire = _nettoyer(re.sub(rb'/Filter\s*(\[[^\]]*\]|/\w+)|/Length \d+', b'', dictionnaire), False)
+        filtre = b'/Filter/' + noms[0] if len(noms) == 1 else \
+            (b'/Filter[' + b''.join(b'/' + n for n in noms) + b']' if noms else b'')
+        en_flux[numero] = (dictionnaire[:-2] + filtre + b'/Length %d>>' % len(donnees), donnees)
+
+    # Flux d'objets : « numéro position » puis les objets bout à bout
+    taille = max(objets) + 1
+    numero_flux, numero_xref = taille, taille + 1
+    entete, corps = [], io.BytesIO()
+    ordre = sorted(hors_flux)
+    for numero in ordre:
+        entete.append(b'%d %d' % (numero, corps.tell()))
+        corps.write(hors_flux[numero] + b'\n')
+    entete = b' '.join(entete) + b'\n'
+    compresse = zlib.compress(entete + corps.getvalue(), 9)
+
+    sortie = io.BytesIO()
+    sortie.write(b'%PDF-1.5\n%\xe2\xe3\xcf\xd3\n')
+    positions = {}
+    for numero in sorted(en_flux):
+        dictionnaire, donnees = en_flux[numero]
+        positions[numero] = sortie.tell()
+        sortie.write(b'%d 0 obj\n%s\nstream\n%s\nendstream\nendobj\n' % (numero, dictionnaire, donnees))
+    positions[numero_flux] = sortie.tell()
+    sortie.write(b'%d 0 obj\n<</Type/ObjStm/N %d/First %d/Filter/FlateDecode/Length %d>>\nstream\n'
+                 % (numero_flux, len(ordre), len(entete), len(compresse)))
+    sortie.write(compresse + b'\nendstream\nendobj\n')
+    positions[numero_xref] = sortie.tell()
+
+    # Table de références en flux : type, position ou flux d'objets, rang
+    largeur = max((positions[numero_xref].bit_length() + 7) // 8, 1)
+    lignes = [b'\x00' + b'\x00' * largeur + b'\xff\xff']
+    rangs = {numero: k for k, numero in enumerate(ordre)}
+    for numero in range(1, numero_xref + 1):
+        if numero in positions:
+            lignes.append(b'\x01' + positions[numero].to_bytes(largeur, 'big') + b'\x00\x00')
+        elif numero in rangs:
+            lignes.append(b'\x02' + numero_flux.to_bytes(largeur, 'big') + rangs[numero].to_bytes(2, 'big'))
+        else:
+            lignes.append(b'\x00' + b'\x00' * largeur + b'\x00\x00')
+    table = zlib.compress(b''.join(lignes), 9)
+    sortie.write(b'%d 0 obj\n<</Type/XRef/Size %d/W[1 %d 2]/Root %d 0 R%s%s/Filter/FlateDecode/Length %d>>\nstream\n'
+                 % (numero_xref, numero_xref + 1, largeur, racine,
+                    b'/Info %d 0 R' % info if info else b'',
+                    b'/ID' + minifier(identifiant.group(1)) if identifiant else b'', len(table)))
+    sortie.write(table + b'\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n' % positions[numero_xref])
+    return sortie.getvalue()
+
+
+# ============================================================
+# VENTILATION DES OCTETS
+# ============================================================
+
+def _section(dictionnaire, est_info):
+    if est_info:
+        return 'metadonnees'
+    if b'/Subtype/Form' in dictionnaire.replace(b' ', b''):
+        return 'gabarits'
+    if re.search(rb'/Type\s*/Font', dictionnaire):
+        return 'polices'
+    if re.search(rb'/Type\s*/Page(?![s\w])', dictionnaire):
+        return 'pages'
+    return 'structure'
+
+
+def tailles_sections(data):
+    """Octets d'un PDF par section ({section: octets}, total compris).
+
+    Objets d'un flux d'objets compressé : part du flux au prorata de
+    leur taille décompressée.
+    """
+    objets, trailer = lire_objets(data)
+    info = re.search(rb'/Info ' + REFERENCE, trailer or data[data.rfind(b'/Type/XRef'):])
+    info = int(info.group(1)) if info else None
+    tailles = dict.fromkeys(SECTIONS, 0)
+    for numero, (dictionnaire, donnees, debut, fin) in objets.items():
+        octets = fin - debut
+        if donnees is None:
+            tailles[_section(dictionnaire, numero == info)] += octets
+        elif b'/ObjStm' in dictionnaire:
+            _d, brut = _flux(dictionnaire, donnees)
+            premier = int(re.search(rb'/First (\d+)', dictionnaire).group(1))
+            valeurs = [int(v) for v in brut[:premier].split()]
+            numeros, debuts = valeurs[0::2], valeurs[1::2]
+            fins = debuts[1:] + [len(brut) - premier]
+            for n, d, f in zip(numeros, debuts, fins):
+                tailles[_section(brut[premier + d:premier + f], n == info)] += octets * (f - d) / (len(brut) - premier)
+        elif b'/XRef' in dictionnaire:
+            tailles['structure'] += octets
+        elif b'/Form' in dictionnaire:
+            tailles['gabarits'] += octets
+        else:
+            tailles['contenu'] += octets
+    tailles = {section: round(octets) for section, octets in tailles.items()}
+    tailles['structure'] += len(data) - sum(tailles.values())  # en-tête, table, trailer
+    tailles['total'] = len(data)
+    return tailles
+
+
+class CanvasArchive(canvas.Canvas):
+    """Canvas ReportLab dont save() écrit le PDF au profil d'archive"""
+
+    def __init__(self, *args, **kwargs):
+        # Flux laissés en clair : compacter() les compresse une seule fois
+        super().__init__(*args, pageCompression=0, **kwargs)
+
+    def save(self):
+        data = compacter(self.getpdfdata())
+        if hasattr(self._filename, 'write'):
+            self._filename.write(data)
+        else:
+            with open(self._filename, 'wb') as f:
+                f.write(data)
+
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    from fiche_paie import generate_fiche_paie
+    from previsionnel import generate_previsionnel
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    def mesurer(generateur, variantes, archive):
+        documents, debut = [], time.perf_counter()
+        for i in range(n):
+            tampon = io.BytesIO()
+            generateur(tampon, sidecar=False, reproductible=True, archive=archive, **variantes(i))
+            documents.append(tampon.getvalue())
+        return (time.perf_counter() - debut) / n, documents
+
+    for libelle, generateur, variantes in (
+            ('Bulletin', generate_fiche_paie, lambda i: {'employe_nom': f'Salarié {i}', 'salaire_base': 1900 + 37 * i}),
+            ('Prévisionnel', generate_previsionnel, lambda i: {'nom_entreprise': f'Client {i}', 'graphiques': True})):
+        profils = {archive: mesurer(generateur, variantes, archive) for archive in (False, True)}
+        print(f"{libelle} (moyenne sur {n}) :")
+        print(f"  {'':<14}{'défaut':>10}{'archive':>10}")
+        sections = {archive: [tailles_sections(d) for d in documents] for archive, (_t, documents) in profils.items()}
+        for section in SECTIONS + ('total',):
+            moyennes = [sum(t[section] for t in sections[archive]) / n for archive in (False, True)]
+            if any(moyennes):
+                print(f"  {section:<14}{moyennes[0]:>9.0f}o{moyennes[1]:>9.0f}o")
+        (t_defaut, defaut), (t_archive, archive) = profils[False], profils[True]
+        total_defaut, total_archive = sum(map(len, defaut)), sum(map(len, archive))
+        print(f"  rendu {t_defaut * 1000:.1f} ms → {t_archive * 1000:.1f} ms ; "
+              f"{1 - total_archive / total_defaut:.0%} d'octets en moins, "
+              f"{(total_defaut - total_archive) / n * 1e6 / 1e9:.1f} Go économisés par million de documents")
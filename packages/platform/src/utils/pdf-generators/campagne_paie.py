@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+============================================================
+CAMPAGNE DE PAIE REPRENABLE — TalosPrimes
+Journal des bulletins produits, reprise après incident, manifeste
+============================================================
+
+Une campagne de fin de mois enchaîne des milliers d'appels à
+generate_fiche_paie. Si le processus meurt en route (mémoire, donnée
+invalide, redémarrage), la campagne relancée ne doit refaire que ce qui
+manque.
+
+Chaque bulletin terminé est noté dans <dossier>/campagne.journal, une
+ligne JSON par événement, écrite et synchronisée (fsync) après que le
+PDF a été remplacé atomiquement :
+
+    {"id": "2026-03/E0042", "etat": "ok", "entrees": "<sha256>",
+     "sha256": "<sha256 du PDF>", "octets": 6123, "fichier": "..."}
+    {"id": "2026-03/E0043", "etat": "echec", "entrees": "...",
+     "erreur": "KeyError: 'salaire_base'"}
+
+À la relance, le journal est relu (une dernière ligne tronquée par le
+crash est ignorée, puis retirée du fichier avant toute nouvelle entrée) :
+- « ok » avec la même empreinte d'entrées et un fichier présent de la
+  bonne taille : sauté, sans rien recalculer ;
+- « echec », absent, entrées modifiées ou fichier manquant : rendu.
+
+L'empreinte d'entrées est celle de generer_si_change()
+(pdf_reproductible.py) : code des générateurs + arguments. Les PDF sont
+rendus en mode reproductible, donc un bulletin refait est identique à
+l'octet près à celui qu'il remplace.
+
+En fin de campagne, manifeste.json récapitule tous les documents
+(chemin, empreintes, taille) et les échecs restants.
+
+Usage :
+    with CampagnePaie('/data/paie/2026-03') as campagne:
+        bilan = campagne.executer((identifiant, kwargs) for ...)
+"""
+
+import hashlib
+import io
+import json
+import os
+import time
+
+from donnees_json import chemin_sidecar, document, ecrire_json
+from fiche_paie import generate_fiche_paie
+from pdf_reproductible import _ecrire_atomique, empreinte_document
+
+NOM_JOURNAL = 'campagne.journal'
+NOM_MANIFESTE = 'manifeste.json'
+
+
+def lire_journal(chemin):
+    """Dernier état connu de chaque document : {id: entrée du journal}"""
+    etats = {}
+    try:
+        f = open(chemin, 'rb')
+    except FileNotFoundError:
+        return etats
+    with f:
+        for ligne in f:
+            try:
+                entree = json.loads(ligne)
+            except ValueError:
+                # Ligne incomplète : le processus est mort pendant l'écriture
+                continue
+            etats[entree['id']] = entree
+    return etats
+
+
+def ouvrir_journal(chemin):
+    """Ouvre le journal en ajout, après avoir retiré une dernière ligne
+    tronquée par un crash : la prochaine entrée s'y collerait sinon, et
+    les deux seraient perdues à chaque relecture."""
+    f = open(chemin, 'a+b')
+    taille = f.seek(0, os.SEEK_END)
+    fin = taille
+    while fin > 0:
+        debut = max(fin - 4096, 0)
+        f.seek(debut)
+        i = f.read(fin - debut).rfind(b'\n')
+        if i >= 0:
+            fin = debut + i + 1
+            break
+        fin = debut
+    if fin < taille:
+        f.truncate(fin)
+        f.flush()
+        os.fsync(f.fileno())
+    return f
+
+
+def nom_fichier(identifiant):
+    """Nom de fichier sûr pour un identifiant de document"""
+    return ''.join(ch if ch.isalnum() or ch in '-_.' else '_' for ch in identifiant) + '.pdf'
+
+
+class CampagnePaie:
+    """Campagne de bulletins reprenable, journalisée dans un dossier"""
+
+    def __init__(self, dossier, generateur=generate_fiche_paie, sidecar=False):
+        self.dossier = dossier
+        self.generateur = generateur
+        self.sidecar = sidecar
+        os.makedirs(dossier, exist_ok=True)
+        self.chemin_journal = os.path.join(dossier, NOM_JOURNAL)
+        self.etats = lire_journal(self.chemin_journal)
+        self._journal = ouvrir_journal(self.chemin_journal)
+
+    def _noter(self, entree):
+        self._journal.write(json.dumps(entree, ensure_ascii=False).encode() + b'\n')
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self.etats[entree['id']] = entree
+
+    def deja_fait(self, identifiant, empreinte, chemin):
+        entree = self.etats.get(identifiant)
+        if entree is None or entree['etat'] != 'ok' or entree['entrees'] != empreinte:
+            return False
+        sidecar = chemin_sidecar(chemin, self.sidecar)
+        if sidecar is not None and not os.path.exists(sidecar):
+            return False
+        try:
+            return os.path.getsize(chemin) == entree['octets']
+        except OSError:
+            return False
+
+    def produire(self, identifiant, kwargs):
+        """Rend un bulletin s'il n'est pas déjà à jour ; retourne son état"""
+        chemin = os.path.join(self.dossier, nom_fichier(identifiant))
+        empreinte = empreinte_document(self.generateur, kwargs)
+        if self.deja_fait(identifiant, empreinte, chemin):
+            return 'repris'
+        try:
+            tampon = io.BytesIO()
+            self.generateur(tampon, reproductible=True,
+                            sidecar=chemin_sidecar(chemin, self.sidecar), **kwargs)
+            data = tampon.getvalue()
+            _ecrire_atomique(chemin, data)
+        except Exception as e:
+            self._noter({'id': identifiant, 'etat': 'echec', 'entrees': empreinte,
+                         'erreur': f'{type(e).__name__}: {e}'})
+            return 'echec'
+        self._noter({'id': identifiant, 'etat': 'ok', 'entrees': empreinte,
+                     'sha256': hashlib.sha256(data).hexdigest(), 'octets': len(data),
+                     'fichier': os.path.basename(chemin)})
+        return 'genere'
+
+    def executer(self, taches):
+        """taches : itérable de (identifiant, kwargs du générateur).
+
+        Retourne le bilan {genere, repris, echec, duree} et écrit le
+        manifeste de la campagne.
+        """
+        debut = time.perf_counter()
+        bilan = {'genere': 0, 'repris': 0, 'echec': 0}
+        identifiants = []
+        for identifiant, kwargs in taches:
+            identifiants.append(identifiant)
+            bilan[self.produire(identifiant, kwargs)] += 1
+        bilan['duree'] = round(time.perf_counter() - debut, 3)
+        self.ecrire_manifeste(identifiants, bilan)
+        return bilan
+
+    def ecrire_manifeste(self, identifiants, bilan):
+        documents, echecs = [], []
+        for identifiant in identifiants:
+            entree = self.etats[identifiant]
+            if entree['etat'] == 'ok':
+                documents.append({k: entree[k] for k in ('id', 'fichier', 'sha256', 'octets', 'entrees')})
+            else:
+                echecs.append({'id': identifiant, 'erreur': entree['erreur']})
+        return ecrire_json(os.path.join(self.dossier, NOM_MANIFESTE), document(
+            'campagne_paie', bilan=bilan, documents=documents, echecs=echecs,
+        ))
+
+    def close(self):
+        self._journal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == '__main__':
+    import random
+    import sys
+    import tempfile
+
+    from cumul_annuel import iter_annee, kwargs_fiche
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = random.Random(0)
+    effectif = [{'statut': rng.choice(('cadre', 'non_cadre')), 'mois': [
+        {'salaire_base': round(rng.uniform(1802, 9000), 2)} for _m in range(3)
+    ]} for _ in range(n)]
+    mars = next(bulletins for m, bulletins in iter_annee(effectif) if m == 2)
+    taches = [(f'2026-03/E{i:05d}', {'employe_nom': f'Salarié {i}', **kwargs_fiche(e, 2, b)})
+              for i, (e, b) in enumerate(zip(effectif, mars))]
+    # Un enregistrement invalide : il échoue sans arrêter la campagne
+    taches[7][1]['salaire_base'] = 'n/a'
+
+    class Interruption(Exception):
+        pass
+
+    def coupure(taches, apres):
+        for k, tache in enumerate(taches):
+            if k == apres:
+                raise Interruption
+            yield tache
+
+    with tempfile.TemporaryDirectory() as dossier:
+        with CampagnePaie(dossier, sidecar=False) as campagne:
+            try:
+                campagne.executer(coupure(taches, int(n * 0.6)))
+            except Interruption:
+                print(f"Campagne interrompue après {int(n * 0.6)} bulletins")
+
+        with CampagnePaie(dossier, sidecar=False) as campagne:
+            print(f"Relance  : {campagne.executer(taches)}")
+
+        taches[7][1]['salaire_base'] = 2500
+        with CampagnePaie(dossier, sidecar=False) as campagne:
+            print(f"Correctif: {campagne.executer(taches)}")
+            print(f"Manifeste: {os.path.join(dossier, NOM_MANIFESTE)} "
+                  f"({len(campagne.etats)} documents)")
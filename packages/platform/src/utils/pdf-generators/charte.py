@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+============================================================
+CHARTE COMMUNE DES DOCUMENTS — TalosPrimes
+Couleurs, formats de nombres, éléments de page
+============================================================
+
+Socle partagé par generate_fiche_paie, generate_previsionnel,
+generate_portefeuille et les graphiques (et par tout nouveau type de
+document) :
+
+- la palette sombre TalosPrimes ;
+- les formats de montants et de taux, mis en cache (lru_cache) : une
+  campagne de paie ou un portefeuille formate surtout les mêmes valeurs
+  (PMSS, SMIC, taux de cotisation, mois identiques d'un client à
+  l'autre) ;
+- les éléments de page : fond, cadre arrondi, bandeau d'en-tête,
+  tuiles d'indicateurs, titre de section, style des tableaux sombres.
+
+Les caches vivent au niveau du module : dans un même processus (campagne
+de paie, ordonnanceur.py), chaque document profite de ceux remplis par
+les précédents, quel que soit son type. Les largeurs de texte sont
+mises en cache par mise_en_page.largeur_texte, commune à tous.
+"""
+
+from functools import lru_cache
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.units import mm
+
+# ============================================================
+# COULEURS
+# ============================================================
+DARK_BG = HexColor('#1a1a2e')
+ACCENT = HexColor('#e67e22')
+ACCENT_LIGHT = HexColor('#f39c12')
+HEADER_BG = HexColor('#16213e')
+ROW_ALT = HexColor('#1a1a3e')
+SURFACE = HexColor('#1e293b')
+TEXT_WHITE = HexColor('#ffffff')
+TEXT_GRAY = HexColor('#94a3b8')
+TEXT_LIGHT = HexColor('#cbd5e1')
+GREEN = HexColor('#22c55e')
+GREEN_DARK = HexColor('#166534')
+RED = HexColor('#ef4444')
+RED_DARK = HexColor('#7f1d1d')
+BLUE = HexColor('#3b82f6')
+PURPLE = HexColor('#a855f7')
+AMBER = HexColor('#f59e0b')
+ORANGE = HexColor('#fb923c')
+
+# ============================================================
+# FORMATS
+# ============================================================
+# 0 et -0.0 sont la même clé de cache : « val + 0 » ramène -0.0 à 0.0
+# pour que le texte ne dépende pas de l'ordre des appels.
+
+
+@lru_cache(maxsize=8192)
+def fmt(val):
+    """Format nombre en K€ ou €"""
+    val = val + 0
+    if abs(val) >= 1000:
+        return f"{val/1000:,.1f}K€".replace(',', ' ').replace('.', ',')
+    return f"{val:,.0f}€".replace(',', ' ')
+
+
+@lru_cache(maxsize=8192)
+def fmt_full(val):
+    return f"{val + 0:,.0f} €".replace(',', ' ')
+
+
+@lru_cache(maxsize=8192)
+def fmt_eur(val):
+    if val == 0: return '-'
+    s = f"{val:,.2f}".replace(',', ' ').replace('.', ',')
+    return f"{s} €"
+
+
+@lru_cache(maxsize=1024)
+def fmt_pct(val):
+    if val == 0: return '-'
+    if val == int(val): return f"{int(val)}%"
+    s = f"{val:.3f}".rstrip('0').rstrip('.')
+    return f"{s}%"
+
+
+@lru_cache(maxsize=1024)
+def fmt_court(val):
+    """Graduation d'axe : 2,5K€, 500€"""
+    val = val + 0
+    if abs(val) >= 1000:
+        return f"{val / 1000:g}K€".replace('.', ',')
+    return f"{val:g}€"
+
+
+FORMATS = (fmt, fmt_full, fmt_eur, fmt_pct, fmt_court)
+
+
+def statistiques_formats():
+    """{nom: (succès, échecs)} des caches de formats"""
+    return {f.__name__: (f.cache_info().hits, f.cache_info().misses) for f in FORMATS}
+
+
+# ============================================================
+# ÉLÉMENTS DE PAGE
+# ============================================================
+# y désigne toujours le haut de l'élément, comme dans mise_en_page.py
+
+STYLE_TABLEAU_SOMBRE = {
+    'couleur_texte': TEXT_LIGHT,
+    'couleur_entete': ACCENT_LIGHT,
+    'couleur_fond_entete': SURFACE,
+    'couleur_categorie': BLUE,
+    'couleur_fond_categorie': SURFACE,
+}
+
+
+def fond_page(c, taille_page, couleur=DARK_BG):
+    c.setFillColor(couleur)
+    c.rect(0, 0, taille_page[0], taille_page[1], fill=1, stroke=0)
+
+
+def cadre(c, x, y, largeur, hauteur, couleur=HEADER_BG, rayon=4):
+    """Rectangle arrondi plein, de haut y"""
+    c.setFillColor(couleur)
+    c.roundRect(x, y - hauteur, largeur, hauteur, rayon, fill=1, stroke=0)
+
+
+def bandeau(c, x, y, largeur, hauteur, nom, lignes, titre, sous_titre,
+            base=9*mm, taille_nom=16, rayon=5):
+    """En-tête de document : nom et lignes d'information à gauche, type
+    de document et période à droite ; base : ligne de base du nom sous y"""
+    cadre(c, x, y, largeur, hauteur, HEADER_BG, rayon)
+    c.setFillColor(ACCENT)
+    c.setFont('Helvetica-Bold', taille_nom)
+    c.drawString(x + 8*mm, y - base, nom)
+    c.setFillColor(TEXT_GRAY)
+    c.setFont('Helvetica', 8)
+    for i, ligne in enumerate(lignes):
+        c.drawString(x + 8*mm, y - base - 6*mm - i * 5*mm, ligne)
+    c.setFillColor(ACCENT_LIGHT)
+    c.setFont('Helvetica-Bold', 14)
+    c.drawRightString(x + largeur - 8*mm, y - base, titre)
+    c.setFillColor(TEXT_WHITE)
+    c.setFont('Helvetica-Bold', 11)
+    c.drawRightString(x + largeur - 8*mm, y - base - 8*mm, sous_titre)
+
+
+def tuiles(c, x, y, largeur, indicateurs, hauteur=16*mm, ecart=5*mm):
+    """Rangée de tuiles d'indicateurs : [(libellé, valeur, couleur)]"""
+    n = len(indicateurs)
+    l_tuile = (largeur - (n - 1) * ecart) / n
+    for i, (libelle, valeur, couleur) in enumerate(indicateurs):
+        tx = x + i * (l_tuile + ecart)
+        cadre(c, tx, y, l_tuile, hauteur)
+        c.setFillColor(TEXT_GRAY)
+        c.setFont('Helvetica', 5.5)
+        c.drawString(tx + 3*mm, y - 5*mm, libelle)
+        c.setFillColor(couleur)
+        c.setFont('Helvetica-Bold', 10)
+        c.drawString(tx + 3*mm, y - 13*mm, valeur)
+
+
+def entete_section(c, x, y, largeur, titre, couleur=ACCENT):
+    """Titre de section sur fond arrondi ; retourne le y sous le titre"""
+    cadre(c, x, y, largeur, 7*mm, HEADER_BG, 3)
+    c.setFillColor(couleur)
+    c.setFont('Helvetica-Bold', 9)
+    c.drawString(x + 4*mm, y - 5.5*mm, titre)
+    return y - 8*mm
+
+
+if __name__ == '__main__':
+    import io
+    import sys
+    import time
+
+    import charte  # module importé par les générateurs (distinct de __main__)
+    from fiche_paie import generate_fiche_paie
+    from previsionnel import generate_previsionnel
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    def rendre(nombre):
+        debut = time.perf_counter()
+        for i in range(nombre):
+            generate_fiche_paie(io.BytesIO(), sidecar=False, salaire_base=3000 + 10 * (i % 50))
+            generate_previsionnel(io.BytesIO(), sidecar=False, graphiques=False)
+        return (time.perf_counter() - debut) / nombre
+
+    for f in charte.FORMATS:
+        f.cache_clear()
+    froid = rendre(1)
+    chaud = rendre(n)
+    print(f"Bulletin + prévisionnel dans un même processus : {froid * 1000:.1f} ms au premier rendu, "
+          f"{chaud * 1000:.1f} ms ensuite (moyenne sur {n})")
+    for nom, (succes, echecs) in charte.statistiques_formats().items():
+        total = succes + echecs
+        if total:
+            print(f"  {nom:<9} : {total} appels, {succes / total:.0%} servis par le cache")
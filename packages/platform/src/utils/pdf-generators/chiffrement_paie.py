@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+============================================================
+DIFFUSION CHIFFRÉE DES BULLETINS — TalosPrimes
+Chiffrement par salarié pendant le rendu, archives par salarié
+============================================================
+
+Les bulletins portent le NIR et les salaires : ils partent protégés par
+un mot de passe propre à chaque salarié (chiffrement PDF standard
+128 bits, lisible par tous les lecteurs).
+
+RC4-128 reste le défaut, bien que déprécié par la norme PDF 2.0 : l'AES
+256 bits de ReportLab (force=256) exige le paquet pyaes, absent des
+serveurs de rendu, chiffre en Python pur, et tire des sels aléatoires
+(PDF non reproductibles à l'octet). CleCampagne(force=256) l'active là
+où pyaes est installé.
+
+En mode reproductible, l'/ID en clair du PDF est un condensé des entrées
+(NIR, salaire) : il est salé avec un secret dérivé du mot de passe
+propriétaire de la campagne, sans quoi on pourrait retrouver les
+montants par force brute à partir de l'/ID.
+
+Chiffrer après coup (relire puis réécrire chaque PDF) double le temps
+de campagne. Ici le chiffrement a lieu pendant le rendu, via le
+paramètre chiffrement de generate_fiche_paie, et son coût est réduit :
+
+- CleCampagne : le mot de passe propriétaire est commun à la campagne
+  (fourni par l'employeur à distribuer(), qui le conserve) ; sa dérivation (51 MD5) et l'entrée /O de chaque mot de
+  passe salarié (20 passes RC4) sont calculées une fois et mises en
+  cache, au lieu d'une fois par document ;
+- ChiffrementBulletin : StandardEncryption de ReportLab, avec un RC4
+  plus direct que reportlab.lib.arciv pour l'entrée /U et le chiffrement
+  des objets (même résultat, octet pour octet) ;
+- les flux des PDF diffusés ne sont pas codés en ASCII85 : le fichier
+  est binaire de toute façon (zip), et RC4 a 20 % d'octets en moins à
+  chiffrer ;
+- distribuer() répartit les salariés sur plusieurs processus ; chaque
+  salarié est rendu en mémoire et ses bulletins vont directement dans
+  son archive <matricule>.zip, sans PDF en clair sur disque.
+
+Les JSON compagnons (montants en clair) ne sont pas écrits en mode
+diffusion.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from hashlib import md5, sha256
+import io
+import os
+import secrets
+import zipfile
+
+from reportlab import rl_config
+from reportlab.lib import pdfencrypt
+from reportlab.lib.pdfencrypt import PadString, StandardEncryption, encryptionkey
+
+from fiche_paie import generate_fiche_paie
+from pdf_reproductible import _ecrire_atomique
+
+REVISION = 3  # chiffrement 128 bits (RC4), algorithmes 3.x de la norme PDF
+FORCES = (128, 256)  # RC4-128 (défaut) ou AES-256 (ReportLab, avec pyaes)
+
+
+def rc4(cle, donnees):
+    s = list(range(256))
+    n = len(cle)
+    j = 0
+    for i in range(256):
+        j = (j + s[i] + cle[i % n]) & 255
+        s[i], s[j] = s[j], s[i]
+    sortie = bytearray(donnees)
+    i = j = 0
+    for p in range(len(sortie)):
+        i = (i + 1) & 255
+        si = s[i]
+        j = (j + si) & 255
+        sj = s[j]
+        s[i], s[j] = sj, si
+        sortie[p] ^= s[(si + sj) & 255]
+    return bytes(sortie)
+
+
+def _rc4_20_passes(cle, donnees):
+    """RC4 appliqué 20 fois avec la clé XOR 0..19 (entrées /O et /U)"""
+    for n in range(20):
+        donnees = rc4(bytes(b ^ n for b in cle), donnees)
+    return donnees
+
+
+def _en_octets(texte):
+    return texte.encode('utf8') if isinstance(texte, str) else texte
+
+
+class CleCampagne:
+    """Secret propriétaire d'une campagne et dérivations mises en cache"""
+
+    def __init__(self, mot_de_passe_proprietaire=None, force=128):
+        if force not in FORCES:
+            raise ValueError(f"Force de chiffrement inconnue : {force} (attendu : {FORCES})")
+        if force == 256 and pdfencrypt.pyaes is None:
+            raise ValueError("Chiffrement AES-256 indisponible : le paquet pyaes n'est pas installé")
+        self.force = force
+        self.proprietaire = mot_de_passe_proprietaire or secrets.token_urlsafe(24)
+        # Sel de l'/ID des PDF : secret tant que le mot de passe propriétaire l'est
+        self.sel = sha256(b'talosprimes/id\0' + _en_octets(self.proprietaire)).digest()
+        digest = md5((_en_octets(self.proprietaire) + PadString)[:32]).digest()
+        for _ in range(50):
+            digest = md5(digest).digest()
+        self._cle_proprietaire = digest[:16]
+        self._valeurs_o = {}
+
+    def valeur_o(self, mot_de_passe):
+        """Entrée /O du dictionnaire de chiffrement pour ce mot de passe"""
+        o = self._valeurs_o.get(mot_de_passe)
+        if o is None:
+            rembourre = (_en_octets(mot_de_passe) + PadString)[:32]
+            o = self._valeurs_o[mot_de_passe] = _rc4_20_passes(self._cle_proprietaire, rembourre)
+        return o
+
+    def pour(self, mot_de_passe):
+        return ChiffrementBulletin(mot_de_passe, self)
+
+
+class ChiffrementBulletin(StandardEncryption):
+    """Impression autorisée ; copie, modification et annotations non"""
+
+    def __init__(self, mot_de_passe, cle_campagne):
+        super().__init__(mot_de_passe, cle_campagne.proprietaire, canPrint=1, canModify=0,
+                         canCopy=0, canAnnotate=0, strength=cle_campagne.force)
+        self.cle_campagne = cle_campagne
+
+    def prepare(self, document, overrideID=None):
+        if self.prepared:
+            raise ValueError("encryption already prepared!")
+        document.updateSignature(self.cle_campagne.sel)
+        if self.revision != REVISION:
+            return super().prepare(document, overrideID)
+        if overrideID:
+            identifiant = overrideID
+        else:
+            document.ID()
+            identifiant = document.signature.digest()
+        self.P = int(self.permissionBits() - 2**31)
+        self.O = self.cle_campagne.valeur_o(self.userPassword)
+        self.key = encryptionkey(self.userPassword, self.O, self.P, identifiant, revision=REVISION)
+        self.U = _rc4_20_passes(self.key, md5(PadString + _en_octets(identifiant)).digest()) + b'\0' * 16
+        self.objnum = self.version = None
+        self.prepared = 1
+
+    def encode(self, t):
+        if not self.prepared:
+            raise ValueError("encryption not prepared!")
+        if self.objnum is None:
+            raise ValueError("not registered in PDF object")
+        if self.revision != REVISION:
+            return super().encode(t)
+        cle = self.key + self.objnum.to_bytes(3, 'little') + self.version.to_bytes(2, 'little')
+        return rc4(md5(cle).digest(), _en_octets(t))
+
+
+# ============================================================
+# DIFFUSION
+# ============================================================
+
+_cle_processus = None
+
+
+@contextmanager
+def _sans_ascii85():
+    precedent, rl_config.useA85 = rl_config.useA85, 0
+    try:
+        yield
+    finally:
+        rl_config.useA85 = precedent
+
+
+def _initialiser(mot_de_passe_proprietaire, force=128):
+    global _cle_processus
+    _cle_processus = CleCampagne(mot_de_passe_proprietaire, force)
+
+
+def archiver_salarie(dossier, matricule, mot_de_passe, bulletins, cle=None):
+    """Rend les bulletins d'un salarié, chiffrés, dans <dossier>/<matricule>.zip.
+
+    bulletins : liste de (nom_du_pdf, kwargs de generate_fiche_paie).
+    Retourne (matricule, chemin, octets).
+    """
+    cle = cle or _cle_processus
+    archive = io.BytesIO()
+    # Un PDF chiffré ne se compresse plus : stockage sans compression
+    with _sans_ascii85(), zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as z:
+        for nom, kwargs in bulletins:
+            tampon = io.BytesIO()
+            generate_fiche_paie(tampon, reproductible=True, sidecar=False,
+                                chiffrement=cle.pour(mot_de_passe), **kwargs)
+            z.writestr(zipfile.ZipInfo(nom, date_time=(1980, 1, 1, 0, 0, 0)), tampon.getvalue())
+    chemin = os.path.join(dossier, f'{matricule}.zip')
+    _ecrire_atomique(chemin, archive.getvalue())
+    return matricule, chemin, archive.tell()
+
+
+def _archiver(args):
+    return archiver_salarie(*args)
+
+
+def distribuer(dossier, salaries, mot_de_passe_proprietaire, processus=None, force=128):
+    """salaries : itérable de (matricule, mot_de_passe, bulletins).
+
+    Génère (matricule, chemin, octets) à mesure que les archives sont
+    écrites. Le mot de passe propriétaire (secret de l'employeur, commun
+    à la campagne) permet de rouvrir n'importe quel bulletin et sale
+    l'/ID des PDF : il est obligatoire, un secret tiré au hasard par
+    chaque processus serait perdu et différent d'un processus à l'autre.
+    force : 128 (RC4) ou 256 (AES, pyaes requis).
+    """
+    if not mot_de_passe_proprietaire:
+        raise ValueError("Mot de passe propriétaire requis : l'employeur doit pouvoir rouvrir les bulletins")
+    CleCampagne(mot_de_passe_proprietaire, force)  # force invalide : erreur avant le pool
+    os.makedirs(dossier, exist_ok=True)
+    taches = ((dossier, matricule, mot_de_passe, bulletins) for matricule, mot_de_passe, bulletins in salaries)
+    if processus == 1:
+        _initialiser(mot_de_passe_proprietaire, force)
+        yield from map(_archiver, taches)
+        return
+    with ProcessPoolExecutor(processus, initializer=_initialiser, initargs=(mot_de_passe_proprietaire, force)) as pool:
+        yield from pool.map(_archiver, taches, chunksize=16)
+
+
+if __name__ == '__main__':
+    import random
+    import sys
+    import tempfile
+    import time
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    rng = random.Random(0)
+    salaries = [(f'E{i:05d}', f'{rng.randrange(10**6):06d}', [
+        ('bulletin-2026-03.pdf', {'employe_nom': f'Salarié {i}', 'salaire_base': round(rng.uniform(1802, 9000), 2)}),
+    ]) for i in range(n)]
+
+    debut = time.perf_counter()
+    for _matricule, _mdp, bulletins in salaries:
+        for _nom, kwargs in bulletins:
+            generate_fiche_paie(io.BytesIO(), reproductible=True, sidecar=False, **kwargs)
+    t_clair = time.perf_counter() - debut
+
+    cle = CleCampagne()
+    debut = time.perf_counter()
+    for _matricule, mot_de_passe, bulletins in salaries:
+        for _nom, kwargs in bulletins:
+            chiffrement = StandardEncryption(mot_de_passe, cle.proprietaire, canPrint=1, canModify=0,
+                                             canCopy=0, canAnnotate=0, strength=128)
+            generate_fiche_paie(io.BytesIO(), reproductible=True, sidecar=False,
+                                chiffrement=chiffrement, **kwargs)
+    t_reportlab = time.perf_counter() - debut
+
+    with tempfile.TemporaryDirectory() as dossier:
+        debut = time.perf_counter()
+        for args in salaries:
+            archiver_salarie(dossier, *args, cle=cle)
+        t_rapide = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        total = sum(octets for _m, _c, octets in distribuer(dossier, salaries, cle.proprietaire))
+        t_parallele = time.perf_counter() - debut
+
+    print(f"{n} bulletins : clair {t_clair:.2f}s | chiffrés ReportLab {t_reportlab:.2f}s | "
+          f"chiffrés + cache {t_rapide:.2f}s | en parallèle ({os.cpu_count()} processus) "
+          f"{t_parallele:.2f}s, {total / 1024:.0f} Ko d'archives")
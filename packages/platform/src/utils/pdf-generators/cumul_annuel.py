@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+============================================================
+CUMULS ANNUELS DE PAIE — TalosPrimes
+Régularisation progressive des plafonds sur l'année civile
+============================================================
+
+get_cotisations() plafonne chaque mois isolément (T1 = min(brut, PMSS)).
+En paie française, les tranches sont régularisées progressivement :
+à chaque mois, on compare le brut cumulé au plafond cumulé (un PMSS par
+mois travaillé) et la base du mois est la différence entre la tranche
+cumulée et celle déjà soumise. Une prime ponctuelle est ainsi ramenée
+sous le plafond grâce aux mois précédents ; la T2 d'un mois peut même
+être négative quand un dépassement antérieur est résorbé. La base CET
+(tout le brut, dès qu'il dépasse le plafond) est régularisée de même sur
+le brut et le plafond cumulés.
+
+Le calcul avance mois par mois, en colonnes sur l'ensemble des salariés
+(un tableau par cumul, une passe par mois) : l'état d'un mois tient dans
+quelques listes, quelle que soit la taille de l'effectif.
+
+Usage :
+    for m, bulletins in iter_annee(employes):
+        for employe, bulletin in zip(employes, bulletins):
+            if bulletin:
+                generate_fiche_paie(..., **kwargs_fiche(employe, m, bulletin))
+"""
+
+from fiche_paie import PMSS, calculer_bulletin
+
+MOIS = ['Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
+        'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre']
+
+# Éléments de rémunération d'un mois (mêmes noms que generate_fiche_paie)
+CHAMPS_MOIS = {
+    'salaire_base': 0,
+    'heures_supp': 0,
+    'primes': 0,
+    'avantages_nature': 0,
+    'mutuelle_employeur': 30,
+    'mutuelle_salarie': 20,
+    'transport_employeur': 43.75,
+    'tickets_restaurant': 0,
+}
+
+
+def brut_du_mois(elements):
+    return elements.get('salaire_base', 0) + elements.get('heures_supp', 0) + \
+        elements.get('primes', 0) + elements.get('avantages_nature', 0)
+
+
+def _colonne(valeurs):
+    return [round(v, 2) for v in valeurs]
+
+
+def iter_annee(employes):
+    """Bulletins de l'année, mois par mois.
+
+    employes : liste de dicts {statut, taux_at, taux_pas, zone_pas,
+               mois: [12 × (dict | None)]}
+               chaque mois est un dict des champs de CHAMPS_MOIS, ou None
+               si le salarié n'est pas payé ce mois-là (pas de plafond acquis).
+
+    Génère (indice_mois, bulletins) où bulletins est aligné sur employes :
+    le dict de calculer_bulletin() complété de 'tranches' (T1, T2, 4 PMSS,
+    CET régularisés) et 'cumuls' (à passer à generate_fiche_paie), ou None.
+    """
+    n = len(employes)
+    cum_brut = [0.0] * n
+    cum_plafond = [0.0] * n
+    cum_t1 = [0.0] * n
+    cum_t2 = [0.0] * n
+    cum_t4 = [0.0] * n
+    cum_cet = [0.0] * n
+    cum_sal = [0.0] * n
+    cum_imposable = [0.0] * n
+    cum_cout = [0.0] * n
+
+    for m in range(12):
+        elements = [e['mois'][m] if m < len(e['mois']) else None for e in employes]
+        presents = [el is not None for el in elements]
+        bruts = _colonne(brut_du_mois(el) if el else 0.0 for el in elements)
+
+        # Cumuls de brut et de plafond, puis tranches cumulées plafonnées
+        cum_brut = _colonne(c + b for c, b in zip(cum_brut, bruts))
+        cum_plafond = [p + PMSS if ok else p for p, ok in zip(cum_plafond, presents)]
+        nouv_t1 = [min(b, p) for b, p in zip(cum_brut, cum_plafond)]
+        nouv_t2 = _colonne(min(b, p * 8) - t1 for b, p, t1 in zip(cum_brut, cum_plafond, nouv_t1))
+        nouv_t4 = [min(b, p * 4) for b, p in zip(cum_brut, cum_plafond)]
+        nouv_cet = [b if b > p else 0.0 for b, p in zip(cum_brut, cum_plafond)]
+
+        # Base du mois = tranche cumulée - ce qui a déjà été soumis
+        t1_mois = _colonne(a - b for a, b in zip(nouv_t1, cum_t1))
+        t2_mois = _colonne(a - b for a, b in zip(nouv_t2, cum_t2))
+        t4_mois = _colonne(a - b for a, b in zip(nouv_t4, cum_t4))
+        cet_mois = _colonne(a - b for a, b in zip(nouv_cet, cum_cet))
+        cum_t1, cum_t2, cum_t4, cum_cet = nouv_t1, nouv_t2, nouv_t4, nouv_cet
+
+        bulletins = [None] * n
+        for i, el in enumerate(elements):
+            if el is None:
+                continue
+            emp = employes[i]
+            champs = {**CHAMPS_MOIS, **el}
+            tranches = (t1_mois[i], t2_mois[i], t4_mois[i], cet_mois[i])
+            bulletin = calculer_bulletin(
+                bruts[i], emp.get('statut', 'cadre'), emp.get('taux_at', 1.13),
+                champs['mutuelle_employeur'], champs['mutuelle_salarie'],
+                champs['transport_employeur'], champs['tickets_restaurant'],
+                champs['avantages_nature'], tranches,
+                emp.get('taux_pas'), emp.get('zone_pas', 'metropole'),
+            )
+            bulletin['tranches'] = tranches
+            bulletins[i] = bulletin
+
+        cum_sal = _colonne(c + (b['total_sal'] if b else 0) for c, b in zip(cum_sal, bulletins))
+        cum_imposable = _colonne(c + (b['net_imposable'] if b else 0) for c, b in zip(cum_imposable, bulletins))
+        cum_cout = _colonne(c + (b['cout_total'] if b else 0) for c, b in zip(cum_cout, bulletins))
+
+        for i, bulletin in enumerate(bulletins):
+            if bulletin is not None:
+                bulletin['cumuls'] = {
+                    'brut': cum_brut[i],
+                    'plafond': cum_plafond[i],
+                    'total_sal': cum_sal[i],
+                    'net_imposable': cum_imposable[i],
+                    'cout_total': cum_cout[i],
+                }
+        yield m, bulletins
+
+
+def cumuls_annuels(employes):
+    """Cumuls de fin d'année par salarié (sans conserver les bulletins)."""
+    derniers = [None] * len(employes)
+    for _m, bulletins in iter_annee(employes):
+        for i, bulletin in enumerate(bulletins):
+            if bulletin is not None:
+                derniers[i] = bulletin['cumuls']
+    return derniers
+
+
+def kwargs_fiche(employe, m, bulletin):
+    """Arguments de generate_fiche_paie propres au mois m (hors identité)."""
+    champs = {**CHAMPS_MOIS, **employe['mois'][m]}
+    return {
+        **champs,
+        'mois': MOIS[m],
+        'statut': employe.get('statut', 'cadre'),
+        'taux_at': employe.get('taux_at', 1.13),
+        'taux_pas': employe.get('taux_pas'),
+        'zone_pas': employe.get('zone_pas', 'metropole'),
+        'tranches': bulletin['tranches'],
+        'cumuls': bulletin['cumuls'],
+    }
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    # Une prime de 6 000 € en mars : la T2 de mars est en partie
+    # régularisée par le plafond non utilisé de janvier et février
+    exemple = [{'statut': 'cadre', 'mois': [
+        {'salaire_base': 3500, 'primes': 6000 if m == 2 else 0} for m in range(12)
+    ]}]
+    for m, (bulletin,) in iter_annee(exemple):
+        t1, t2, t4, cet = bulletin['tranches']
+        c = bulletin['cumuls']
+        print(f"  {MOIS[m]:<10} brut {bulletin['brut_total']:>9.2f}  T1 {t1:>9.2f}  T2 {t2:>9.2f}  CET {cet:>9.2f}"
+              f"  cumul brut {c['brut']:>10.2f}  plafond {c['plafond']:>9.2f}  net imp. {c['net_imposable']:>10.2f}")
+
+    rng = random.Random(0)
+    effectif = [{
+        'statut': rng.choice(('cadre', 'non_cadre')),
+        'mois': [
+            None if rng.random() < 0.03 else {
+                'salaire_base': base,
+                'primes': rng.choice((0, 0, 0, 500, 3000)),
+                'heures_supp': rng.choice((0, 0, 120)),
+            } for _m in range(12)
+        ],
+    } for base in (rng.uniform(1802, 9000) for _ in range(5000))]
+    debut = time.perf_counter()
+    cumuls = cumuls_annuels(effectif)
+    print(f"OK: {len(effectif)} salariés × 12 mois en {time.perf_counter() - debut:.2f}s "
+          f"(masse salariale {sum(c['brut'] for c in cumuls if c):,.0f} €)")
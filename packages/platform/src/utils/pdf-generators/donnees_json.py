@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+============================================================
+DONNÉES JSON DES DOCUMENTS — TalosPrimes
+Fichier compagnon (.json) de chaque PDF généré
+============================================================
+
+Sur demande (sidecar=True ou un chemin), chaque générateur écrit, à côté
+du PDF, un document JSON contenant tous les chiffres qu'il a calculés
+(ceux-là mêmes qui sont dessinés), pour que l'API RH, les fichiers de
+virement et les tableaux de bord n'aient ni à recalculer ni à lire le
+PDF. Rien n'est écrit par défaut : le JSON d'un bulletin contient le NIR,
+l'adresse et le salaire en clair, à stocker avec les mêmes précautions
+que le PDF.
+
+Format commun :
+    {
+      "type": "fiche_paie" | "previsionnel",
+      "version": 1,
+      ...  champs propres au type, montants en euros arrondis au centime
+    }
+
+Le champ "version" n'augmente que si un champ change de sens ou
+disparaît ; l'ajout d'un champ est compatible.
+"""
+
+from functools import lru_cache
+import json
+import os
+import stat
+import tempfile
+
+VERSION = 1
+
+
+def arrondir(valeur):
+    """Arrondit récursivement les flottants au centime (tuples → listes)"""
+    if isinstance(valeur, float):
+        return round(valeur, 2)
+    if isinstance(valeur, dict):
+        return {k: arrondir(v) for k, v in valeur.items()}
+    if isinstance(valeur, (list, tuple)):
+        return [arrondir(v) for v in valeur]
+    return valeur
+
+
+def document(type_document, **champs):
+    return {'type': type_document, 'version': VERSION, **arrondir(champs)}
+
+
+def chemin_sidecar(output_path, sidecar=True):
+    """Chemin du JSON compagnon.
+
+    sidecar : True = même nom que le PDF en .json, chaîne = chemin
+    explicite, False/None = pas de fichier. Sans chemin explicite, rien
+    n'est écrit quand le PDF part dans un flux (BytesIO).
+    """
+    if not sidecar:
+        return None
+    if isinstance(sidecar, (str, os.PathLike)):
+        return sidecar
+    if isinstance(output_path, (str, os.PathLike)):
+        return os.path.splitext(output_path)[0] + '.json'
+    return None
+
+
+@lru_cache(maxsize=1)
+def _umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def droits_fichier(fd, chemin):
+    """Donne au fichier temporaire fd (mkstemp : 0600) les droits d'une
+    écriture directe : ceux du fichier remplacé, sinon 0666 moins l'umask"""
+    try:
+        mode = stat.S_IMODE(os.stat(chemin).st_mode)
+    except OSError:
+        mode = 0o666 & ~_umask()
+    os.fchmod(fd, mode)
+
+
+def ecrire_json(chemin, donnees):
+    dossier = os.path.dirname(os.path.abspath(chemin))
+    fd, tmp = tempfile.mkstemp(dir=dossier, prefix='.tmp-', suffix='.json')
+    droits_fichier(fd, chemin)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(donnees, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    os.replace(tmp, chemin)
+    return chemin
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+============================================================
+EFFECTIF EN COLONNES — TalosPrimes
+Données de paie d'un groupe, projetées en mémoire (mmap)
+============================================================
+
+Pour une paie de groupe (des dizaines de milliers de salariés, douze
+mois), garder chaque salarié en dicts Python (identité + éléments de
+chaque mois, les arguments de generate_fiche_paie) fait grimper la
+mémoire avant même le premier rendu, et chaque processus de rendu en
+reçoit une copie sérialisée.
+
+Un fichier .tpeff range ces données en colonnes non compressées, à
+largeur fixe, lisibles directement depuis une projection mémoire :
+
+    MAGIC | colonnes (alignées sur 8 octets) | table des chaînes | pied JSON | taille du pied (<Q) | MAGIC
+
+- colonnes d'identité, une valeur par salarié : textes en codes uint32
+  de la table des chaînes (ABSENT = valeur par défaut du générateur),
+  taux et heures en float64 (NaN = absent) ;
+- colonnes mensuelles (présence uint8, éléments de CHAMPS_MOIS en
+  float64) rangées mois par mois : les salariés [debut, fin) d'un mois
+  forment une tranche contiguë ;
+- table des chaînes : textes UTF-8 dédupliqués, bout à bout, et leurs
+  positions (uint64) ;
+- pied JSON : position des colonnes et champs employeur de
+  generate_fiche_paie (employeur_nom, employeur_siret, ...), communs à
+  tous les salariés du fichier.
+
+Effectif ouvre le fichier en mmap : colonne() rend une vue memoryview
+sans copie, et plage(debut, fin) des salariés au format de iter_annee()
+(cumul_annuel.py), lus à la demande. Les pages du fichier sont
+partagées par tous les processus qui l'ouvrent : un processus de rendu
+ne reçoit que (chemin, debut, fin) — voir produire_plage().
+"""
+
+from array import array
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+
+from campagne_paie import CampagnePaie
+from cumul_annuel import CHAMPS_MOIS, iter_annee, kwargs_fiche
+
+MAGIC = b'TPEFF1\n'
+ABSENT = 0xFFFFFFFF
+TAILLE_PLAGE = 500
+
+# (nom, type) : 's' texte (code de la table des chaînes), 'd' float64
+COLONNES_IDENTITE = [
+    ('matricule', 's'),
+    ('employe_nom', 's'),
+    ('employe_adresse', 's'),
+    ('employe_num_secu', 's'),
+    ('employe_poste', 's'),
+    ('employe_qualification', 's'),
+    ('employe_echelon', 's'),
+    ('employe_date_embauche', 's'),
+    ('employe_anciennete', 's'),
+    ('statut', 's'),
+    ('zone_pas', 's'),
+    ('taux_at', 'd'),
+    ('taux_pas', 'd'),
+    ('heures_travaillees', 'd'),
+]
+# 'B' : salarié payé ce mois-là (1) ou non (0)
+COLONNES_MOIS = [('present', 'B')] + [(nom, 'd') for nom in CHAMPS_MOIS]
+CODES_ARRAY = {'s': 'I', 'd': 'd', 'B': 'B'}
+
+# Arguments employeur de generate_fiche_paie : un seul jeu par fichier (pied)
+CHAMPS_EMPLOYEUR = ('employeur_nom', 'employeur_adresse', 'employeur_siret',
+                    'employeur_code_ape', 'employeur_convention', 'employeur_urssaf')
+
+# Valeurs par défaut de iter_annee() : écrites dans le fichier
+DEFAUTS = {'statut': 'cadre', 'zone_pas': 'metropole', 'taux_at': 1.13}
+
+
+def _aligner(f):
+    reste = -f.tell() % 8
+    if reste:
+        f.write(bytes(reste))
+
+
+def _ecrire_colonne(f, col):
+    if sys.byteorder != 'little':
+        col.byteswap()
+    _aligner(f)
+    position = f.tell()
+    f.write(col.tobytes())
+    return position
+
+
+def repartir(n, taille=TAILLE_PLAGE):
+    """Plages [debut, fin) de taille fixe : elles ne dépendent pas du
+    nombre de processus, une campagne reprise retrouve les mêmes"""
+    return [(debut, min(debut + taille, n)) for debut in range(0, n, taille)]
+
+
+# ============================================================
+# ÉCRITURE
+# ============================================================
+
+class EcrivainEffectif:
+    """Écrit un fichier .tpeff salarié par salarié.
+
+    with EcrivainEffectif('/data/paie/groupe-2026.tpeff', employeur) as e:
+        for employe in ...:
+            e.ajouter(employe)
+
+    employeur : dict des champs CHAMPS_EMPLOYEUR (absents : valeurs par
+    défaut du générateur), repris sur chaque bulletin du fichier.
+    employe : dict au format de iter_annee() (statut, taux_at, taux_pas,
+    zone_pas, mois), complété des champs d'identité de
+    generate_fiche_paie (employe_nom, ...) et d'un matricule. Un champ
+    employeur qui diffère de celui du fichier est refusé : un groupe à
+    plusieurs employeurs écrit un fichier par employeur.
+    """
+
+    def __init__(self, chemin, employeur=None):
+        inconnus = sorted(set(employeur or {}) - set(CHAMPS_EMPLOYEUR))
+        if inconnus:
+            raise ValueError(f"Champs employeur inconnus : {', '.join(inconnus)}")
+        self.chemin = chemin
+        self.employeur = {nom: str(v) for nom, v in (employeur or {}).items() if v is not None}
+        self.salaries = 0
+        self._identite = {nom: array(CODES_ARRAY[t]) for nom, t in COLONNES_IDENTITE}
+        self._mois = {nom: [array(CODES_ARRAY[t]) for _m in range(12)] for nom, t in COLONNES_MOIS}
+        self._codes = {}
+        self._chaines = bytearray()
+        self._positions = array('Q', [0])
+        self._ferme = False
+
+    def _code(self, texte):
+        if texte is None:
+            return ABSENT
+        code = self._codes.get(texte)
+        if code is None:
+            code = self._codes[texte] = len(self._codes)
+            self._chaines += str(texte).encode()
+            self._positions.append(len(self._chaines))
+        return code
+
+    def ajouter(self, employe):
+        if len(employe.get('mois', ())) > 12:
+            raise ValueError(f"Salarié {self.salaries} : {len(employe['mois'])} mois (12 au plus)")
+        for nom in CHAMPS_EMPLOYEUR:
+            if employe.get(nom) is not None and str(employe[nom]) != self.employeur.get(nom):
+                raise ValueError(f"Salarié {self.salaries} : {nom} différent de celui du fichier "
+                                 f"(un fichier .tpeff par employeur)")
+        valeurs = {**DEFAUTS, 'matricule': f'E{self.salaries:05d}', **employe}
+        for nom, t in COLONNES_IDENTITE:
+            valeur = valeurs.get(nom)
+            if t == 's':
+                self._identite[nom].append(self._code(valeur))
+            else:
+                self._identite[nom].append(math.nan if valeur is None else float(valeur))
+        mois = employe.get('mois', ())
+        for m in range(12):
+            elements = mois[m] if m < len(mois) else None
+            self._mois['present'][m].append(elements is not None)
+            for nom, defaut in CHAMPS_MOIS.items():
+                self._mois[nom][m].append(float(elements.get(nom, defaut)) if elements is not None else 0.0)
+        self.salaries += 1
+
+    def close(self):
+        if self._ferme:
+            return
+        self._ferme = True
+        colonnes = {}
+        with open(self.chemin, 'wb') as f:
+            f.write(MAGIC)
+            for nom, t in COLONNES_IDENTITE:
+                colonnes[nom] = {'type': t, 'position': _ecrire_colonne(f, self._identite[nom])}
+            for nom, t in COLONNES_MOIS:
+                col = array(CODES_ARRAY[t])
+                for par_mois in self._mois[nom]:
+                    col.extend(par_mois)
+                colonnes[nom] = {'type': t, 'position': _ecrire_colonne(f, col), 'mensuelle': True}
+            positions = _ecrire_colonne(f, self._positions)
+            debut_chaines = f.tell()
+            f.write(self._chaines)
+            pied = json.dumps({
+                'salaries': self.salaries,
+                'colonnes': colonnes,
+                'chaines': {'nombre': len(self._codes), 'positions': positions, 'debut': debut_chaines},
+                'employeur': self.employeur,
+            }).encode()
+            f.write(pied)
+            f.write(struct.pack('<Q', len(pied)))
+            f.write(MAGIC)
+        self._identite = self._mois = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def ecrire_effectif(chemin, employes, employeur=None):
+    with EcrivainEffectif(chemin, employeur) as e:
+        for employe in employes:
+            e.ajouter(employe)
+    return chemin
+
+
+# ============================================================
+# LECTURE
+# ============================================================
+
+class _Mois:
+    """Éléments mensuels d'un salarié, lus à la demande : [12 × (dict | None)]"""
+
+    __slots__ = ('effectif', 'i')
+
+    def __init__(self, effectif, i):
+        self.effectif = effectif
+        self.i = i
+
+    def __len__(self):
+        return 12
+
+    def __getitem__(self, m):
+        if not 0 <= m < 12:
+            raise IndexError(m)
+        eff = self.effectif
+        k = m * eff.salaries + self.i
+        if not eff.colonne('present')[k]:
+            return None
+        return {nom: eff.colonne(nom)[k] for nom in CHAMPS_MOIS}
+
+
+class Effectif:
+    """Fichier .tpeff ouvert en projection mémoire (lecture seule)"""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        with open(chemin, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        fin = len(self._mm) - len(MAGIC)
+        if self._mm[:len(MAGIC)] != MAGIC or self._mm[fin:] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{chemin} : pas un fichier .tpeff")
+        (taille,) = struct.unpack('<Q', self._mm[fin - 8:fin])
+        pied = json.loads(self._mm[fin - 8 - taille:fin - 8])
+        self.salaries = pied['salaries']
+        self._colonnes = pied['colonnes']
+        self.employeur = pied.get('employeur', {})
+        self._vue = memoryview(self._mm)
+        self._vues = {}
+        chaines = pied['chaines']
+        self._debut_chaines = chaines['debut']
+        self._positions = self._tableau('Q', chaines['positions'], chaines['nombre'] + 1)
+        self._textes = {}
+
+    def __len__(self):
+        return self.salaries
+
+    def _tableau(self, code, position, longueur):
+        vue = self._vue[position:position + longueur * array(code).itemsize]
+        if sys.byteorder == 'little':
+            return vue.cast(code)
+        # Machine gros-boutiste : copie retournée (le fichier reste petit-boutiste)
+        col = array(code, vue)
+        col.byteswap()
+        return col
+
+    def colonne(self, nom, m=None, debut=0, fin=None):
+        """Vue d'une colonne, sans copie.
+
+        Colonne mensuelle : tous les mois bout à bout (indice
+        m * salaries + i), ou le seul mois m. debut/fin restreignent aux
+        salariés [debut, fin). Les textes sont des codes (voir texte()).
+        """
+        vue = self._vues.get(nom)
+        if vue is None:
+            desc = self._colonnes.get(nom)
+            if desc is None:
+                raise ValueError(f"Colonne inconnue : {nom}")
+            longueur = self.salaries * (12 if desc.get('mensuelle') else 1)
+            vue = self._vues[nom] = self._tableau(CODES_ARRAY[desc['type']], desc['position'], longueur)
+        if m is None and debut == 0 and fin is None:
+            return vue
+        base = 0 if m is None else m * self.salaries
+        return vue[base + debut:base + (self.salaries if fin is None else fin)]
+
+    def texte(self, code):
+        """Texte d'un code de la table des chaînes (None si ABSENT)"""
+        if code == ABSENT:
+            return None
+        texte = self._textes.get(code)
+        if texte is None:
+            debut = self._debut_chaines
+            texte = self._textes[code] = str(
+                self._vue[debut + self._positions[code]:debut + self._positions[code + 1]], 'utf-8')
+        return texte
+
+    def valeur(self, nom, i):
+        """Valeur d'identité du salarié i (None si absente)"""
+        valeur = self.colonne(nom)[i]
+        if self._colonnes[nom]['type'] == 's':
+            return self.texte(valeur)
+        return None if math.isnan(valeur) else valeur
+
+    def salarie(self, i):
+        """Salarié i au format de iter_annee() ; mois lus à la demande"""
+        return {
+            'statut': self.valeur('statut', i),
+            'taux_at': self.valeur('taux_at', i),
+            'taux_pas': self.valeur('taux_pas', i),
+            'zone_pas': self.valeur('zone_pas', i),
+            'mois': _Mois(self, i),
+        }
+
+    def plage(self, debut=0, fin=None):
+        return [self.salarie(i) for i in range(debut, self.salaries if fin is None else fin)]
+
+    def identite(self, i):
+        """Arguments d'identité de generate_fiche_paie du salarié i (absents omis)"""
+        kwargs = {}
+        for nom, _t in COLONNES_IDENTITE:
+            if nom in ('matricule', 'statut', 'zone_pas', 'taux_at', 'taux_pas'):
+                continue  # propres au calcul : viennent de kwargs_fiche()
+            valeur = self.valeur(nom, i)
+            if valeur is not None:
+                kwargs[nom] = valeur
+        return kwargs
+
+    def close(self):
+        if self._mm.closed:
+            return
+        for vue in self._vues.values():
+            if isinstance(vue, memoryview):
+                vue.release()
+        if isinstance(self._positions, memoryview):
+            self._positions.release()
+        self._vue.release()
+        self._vues = {}
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # des vues de colonne() sont encore tenues : fermé au ramasse-miettes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ============================================================
+# CAMPAGNE PAR PLAGES
+# ============================================================
+
+def taches_plage(effectif, m, debut, fin, annee=2026):
+    """(identifiant, kwargs) des bulletins du mois m pour les salariés
+    [debut, fin), tranches et cumuls régularisés compris, employeur du
+    fichier en tête"""
+    salaries = effectif.plage(debut, fin)
+    for mois, bulletins in iter_annee(salaries):
+        if mois == m:
+            break
+    for k, (salarie, bulletin) in enumerate(zip(salaries, bulletins)):
+        if bulletin is None:
+            continue
+        i = debut + k
+        identifiant = f"{annee}-{m + 1:02d}/{effectif.valeur('matricule', i)}"
+        yield identifiant, {**effectif.employeur, **effectif.identite(i), 'annee': annee, **kwargs_fiche(salarie, m, bulletin)}
+
+
+def produire_plage(chemin, dossier, m, debut, fin, annee=2026, sidecar=False):
+    """Bulletins du mois m des salariés [debut, fin) de l'effectif chemin.
+
+    Fonction de processus de rendu : elle n'a besoin que du chemin et de
+    la plage. Chaque plage a sa propre campagne reprenable
+    (campagne_paie.py), dans <dossier>/plage-<debut>. Retourne le bilan.
+    """
+    with Effectif(chemin) as effectif:
+        sous_dossier = os.path.join(dossier, f'plage-{debut:07d}')
+        with CampagnePaie(sous_dossier, sidecar=sidecar) as campagne:
+            return campagne.executer(taches_plage(effectif, m, debut, fin, annee))
+
+
+if __name__ == '__main__':
+    from concurrent.futures import ProcessPoolExecutor
+    import pickle
+    import random
+    import tempfile
+    import time
+    import tracemalloc
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rendus = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    def employe(i, rng):
+        base = round(rng.uniform(1802, 9000), 2)
+        return {
+            'matricule': f'G{i:06d}',
+            'employe_nom': f'Salarié {i}',
+            'employe_adresse': f'{rng.randrange(1, 200)} rue {rng.choice(("de la Paix", "Victor Hugo", "du Port"))}, '
+                               f'{rng.choice(("75011 Paris", "69003 Lyon", "13001 Marseille"))}',
+            'employe_num_secu': f'1 {rng.randrange(60, 99)} {rng.randrange(1, 13):02d} 75 {rng.randrange(1000):03d} '
+                                f'{rng.randrange(1000):03d} {rng.randrange(100):02d}',
+            'employe_poste': rng.choice(('Développeur', 'Comptable', 'Commercial', 'Technicien')),
+            'employe_qualification': rng.choice(('Cadre', 'ETAM')),
+            'employe_date_embauche': f'01/{rng.randrange(1, 13):02d}/{rng.randrange(2005, 2026)}',
+            'statut': rng.choice(('cadre', 'non_cadre')),
+            'taux_pas': rng.choice((None, 3.5, 7.2)),
+            'mois': [None if rng.random() < 0.03 else {
+                'salaire_base': base, 'primes': rng.choice((0, 0, 0, 500, 3000)),
+            } for _m in range(12)],
+        }
+
+    rng = random.Random(0)
+    tracemalloc.start()
+    en_dicts = [employe(i, rng) for i in range(n)]
+    memoire_dicts = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'groupe-2026.tpeff')
+        debut = time.perf_counter()
+        ecrire_effectif(chemin, en_dicts, {'employeur_nom': 'Groupe Exemple SA',
+                                           'employeur_siret': '552 100 554 00025'})
+        t_ecriture = time.perf_counter() - debut
+        plages = repartir(n)
+
+        tracemalloc.start()
+        with Effectif(chemin) as effectif:
+            debut = time.perf_counter()
+            bulletins = sum(1 for d, f in plages[:4] for _ in taches_plage(effectif, 11, d, f))
+            t_calcul = (time.perf_counter() - debut) / len(plages[:4])
+            memoire_plage = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f"{n} salariés × 12 mois : {memoire_dicts / 1e6:.1f} Mo en dicts, fichier .tpeff "
+              f"{os.path.getsize(chemin) / 1e6:.1f} Mo projeté en mémoire (écrit en {t_ecriture:.2f} s)")
+        print(f"  décembre (tranches et cumuls sur 12 mois) : {t_calcul:.2f} s par plage de {TAILLE_PLAGE} "
+              f"salariés ({bulletins} bulletins sur {len(plages[:4])} plages), pic Python {memoire_plage / 1e6:.1f} Mo")
+        print(f"  envoi à un processus : {len(pickle.dumps(en_dicts[:TAILLE_PLAGE])) / 1e3:.0f} Ko "
+              f"par plage sérialisée, {len(pickle.dumps((chemin, dossier, 11, 0, TAILLE_PLAGE)))} octets en indices")
+
+        debut = time.perf_counter()
+        with ProcessPoolExecutor() as pool:
+            bilans = list(pool.map(produire_plage, *zip(*[(chemin, dossier, 11, d, f, 2026, False)
+                                                           for d, f in repartir(rendus, max(rendus // 4, 1))])))
+        print(f"  rendu : {sum(b['genere'] for b in bilans)} bulletins en {time.perf_counter() - debut:.2f} s "
+              f"({len(bilans)} plages, {os.cpu_count()} processus)")
+
+        # Mêmes bulletins que le calcul sur les dicts d'origine
+        with Effectif(chemin) as effectif:
+            depuis_fichier = list(taches_plage(effectif, 11, 0, TAILLE_PLAGE))
+        _m, attendus = list(iter_annee(en_dicts[:TAILLE_PLAGE]))[11]
+        identiques = sum(kwargs['tranches'] == b['tranches'] and kwargs['cumuls'] == b['cumuls']
+                         for (_id, kwargs), b in zip(depuis_fichier, filter(None, attendus)))
+        print(f"  contrôle : {identiques} / {len(depuis_fichier)} bulletins identiques au calcul sur dicts")
@@ -9,24 +9,32 @@ Format officiel français conforme aux obligations légales
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib.colors import HexColor
-from reportlab.pdfgen import canvas
+import inspect
 import os
 
+from charte import (
+    ACCENT, ACCENT_LIGHT, DARK_BG, GREEN, HEADER_BG, ORANGE, RED, ROW_ALT, STYLE_TABLEAU_SOMBRE,
+    SURFACE, TEXT_GRAY, TEXT_LIGHT, TEXT_WHITE, bandeau, cadre, fmt_eur, fmt_pct, fond_page,
+)
+from donnees_json import chemin_sidecar, document, ecrire_json
+from mise_en_page import Colonne, Tableau, Paginateur
+from pdf_reproductible import empreinte_entrees, nouveau_canvas
+from prelevement_source import taux_prelevement, montant_prelevement
+
 # ============================================================
-# COULEURS
+# TABLEAU DES COTISATIONS
 # ============================================================
-DARK_BG = HexColor('#1a1a2e')
-ACCENT = HexColor('#e67e22')
-ACCENT_LIGHT = HexColor('#f39c12')
-HEADER_BG = HexColor('#16213e')
-ROW_ALT = HexColor('#1a1a3e')
-TEXT_WHITE = HexColor('#ffffff')
-TEXT_GRAY = HexColor('#94a3b8')
-TEXT_LIGHT = HexColor('#cbd5e1')
-GREEN = HexColor('#22c55e')
-RED = HexColor('#ef4444')
-BLUE = HexColor('#3b82f6')
-ORANGE = HexColor('#fb923c')
+COLONNES_COTISATIONS = [
+    Colonne('Cotisation', 0, 'left', 57*mm),
+    Colonne('Base', 90*mm),
+    Colonne('Taux sal.', 110*mm),
+    Colonne('Part salarié', 130*mm),
+    Colonne('Taux pat.', 150*mm),
+    Colonne('Part employeur', 175*mm),
+]
+COULEURS_COTISATIONS = [TEXT_LIGHT, TEXT_GRAY, TEXT_GRAY, ORANGE, TEXT_GRAY, RED]
+STYLE_COTISATIONS = {**STYLE_TABLEAU_SOMBRE, 'couleur_fond_entete': HEADER_BG}
+FOND_NET = HexColor('#0f3d0f')
 
 # ============================================================
 # CONSTANTES PAIE 2025
@@ -35,10 +43,27 @@ PMSS = 3925
 SMIC = 1802.00
 
 
-def get_cotisations(brut, statut='non_cadre', taux_at=1.13):
-    """Calcule toutes les cotisations sociales françaises 2025"""
-    t1 = min(brut, PMSS)
-    t2_agirc = max(0, min(brut, PMSS * 8) - PMSS)
+def tranches_mensuelles(brut):
+    """Bases du mois pris isolément : (T1, T2 Agirc, 4 PMSS, CET)
+
+    CET : brut entier dès que le brut dépasse le plafond, sinon 0.
+    """
+    return (min(brut, PMSS), max(0, min(brut, PMSS * 8) - PMSS), min(brut, PMSS * 4),
+            brut if brut > PMSS else 0)
+
+
+def lignes_cotisations(brut, statut='non_cadre', taux_at=1.13, tranches=None):
+    """Lignes brutes (libelle, base, taux_sal, taux_pat, categorie), non arrondies
+
+    tranches : (T1, T2, 4 PMSS, CET) du mois ; par défaut calculées sur le
+    mois seul, sinon issues de la régularisation progressive
+    (cumul_annuel.py). Sans base CET (triplet), le CET suit la règle du
+    mois seul.
+    """
+    if tranches is None:
+        tranches = tranches_mensuelles(brut)
+    t1, t2_agirc, t4 = tranches[:3]
+    base_cet = tranches[3] if len(tranches) > 3 else tranches_mensuelles(brut)[3]
     base_csg = brut * 0.9825
     taux_af = 3.45 if brut <= SMIC * 3.5 else 5.25
 
@@ -52,8 +77,8 @@ def get_cotisations(brut, statut='non_cadre', taux_at=1.13):
         ('Agirc-Arrco Tranche 1', t1, 3.86, 6.01, 'Retraite'),
         ('CEG Tranche 1', t1, 0.86, 1.29, 'Retraite'),
         ('Allocations familiales', brut, 0, taux_af, 'Famille'),
-        ('Assurance chômage', min(brut, PMSS * 4), 0, 4.05, 'Chômage'),
-        ('AGS', min(brut, PMSS * 4), 0, 0.15, 'Chômage'),
+        ('Assurance chômage', t4, 0, 4.05, 'Chômage'),
+        ('AGS', t4, 0, 0.15, 'Chômage'),
         ('CSG déductible', base_csg, 6.80, 0, 'CSG/CRDS'),
         ('CSG non déductible + CRDS', base_csg, 2.90, 0, 'CSG/CRDS'),
         ('FNAL', brut, 0, 0.50, 'Autres'),
@@ -65,18 +90,25 @@ def get_cotisations(brut, statut='non_cadre', taux_at=1.13):
     if statut == 'cadre':
         # Insérer après CEG T1
         idx = 7
-        if t2_agirc > 0:
+        # T2 et base CET non nulles <=> brut (cumulé) au-delà du plafond ;
+        # négatives en cas de régularisation d'un dépassement antérieur
+        if t2_agirc != 0:
             lignes.insert(idx, ('Agirc-Arrco Tranche 2', t2_agirc, 10.57, 14.71, 'Retraite'))
             idx += 1
             lignes.insert(idx, ('CEG Tranche 2', t2_agirc, 1.08, 1.62, 'Retraite'))
             idx += 1
-        if brut > PMSS:
-            lignes.insert(idx, ('CET (cadres)', brut, 0.14, 0.21, 'Retraite'))
+        if base_cet != 0:
+            lignes.insert(idx, ('CET (cadres)', base_cet, 0.14, 0.21, 'Retraite'))
         lignes.append(('Prévoyance cadres (décès)', t1, 0, 1.50, 'Retraite'))
-        lignes.append(('APEC', min(brut, PMSS * 4), 0.024, 0.036, 'Autres'))
+        lignes.append(('APEC', t4, 0.024, 0.036, 'Autres'))
 
+    return lignes
+
+
+def get_cotisations(brut, statut='non_cadre', taux_at=1.13, tranches=None):
+    """Calcule toutes les cotisations sociales françaises 2025"""
     result = []
-    for libelle, base, ts, tp, cat in lignes:
+    for libelle, base, ts, tp, cat in lignes_cotisations(brut, statut, taux_at, tranches):
         mt_s = round(base * ts / 100, 2)
         mt_p = round(base * tp / 100, 2)
         if mt_s == 0 and mt_p == 0:
@@ -90,17 +122,55 @@ def get_cotisations(brut, statut='non_cadre', taux_at=1.13):
     return result
 
 
-def fmt_eur(val):
-    if val == 0: return '-'
-    s = f"{val:,.2f}".replace(',', ' ').replace('.', ',')
-    return f"{s} €"
+def calculer_bulletin(
+    brut_total, statut='cadre', taux_at=1.13,
+    mutuelle_employeur=30, mutuelle_salarie=20,
+    transport_employeur=43.75, tickets_restaurant=0, avantages_nature=0,
+    tranches=None, taux_pas=None, zone_pas='metropole',
+):
+    """Tous les montants d'un bulletin (sans rendu PDF)
+
+    taux_pas : taux personnalisé DGFiP (%) ; None = grille de taux neutre
+    de zone_pas (voir prelevement_source.py).
+    """
+    cotisations = get_cotisations(brut_total, statut, taux_at, tranches)
+
+    # Ajouter mutuelle après CSA
+    if mutuelle_salarie > 0 or mutuelle_employeur > 0:
+        cotisations.insert(2, {
+            'libelle': 'Complémentaire santé (mutuelle)',
+            'base': 0, 'taux_sal': 0, 'taux_pat': 0,
+            'montant_sal': mutuelle_salarie, 'montant_pat': mutuelle_employeur,
+            'categorie': 'Santé',
+        })
+
+    total_sal = sum(x['montant_sal'] for x in cotisations)
+    total_pat = sum(x['montant_pat'] for x in cotisations)
 
+    net_avant_impot = brut_total - total_sal
+    csg_non_ded = next((x['montant_sal'] for x in cotisations if 'non déductible' in x['libelle'].lower()), 0)
+    cotis_ded = sum(x['montant_sal'] for x in cotisations) - csg_non_ded
+    net_imposable = brut_total - cotis_ded
+    taux_pas = taux_prelevement(net_imposable, taux_pas, zone_pas)
+    montant_pas = montant_prelevement(net_imposable, taux_pas)
+    net_a_payer = net_avant_impot - montant_pas + transport_employeur + tickets_restaurant - avantages_nature
+    cout_total = brut_total + total_pat
 
-def fmt_pct(val):
-    if val == 0: return '-'
-    if val == int(val): return f"{int(val)}%"
-    s = f"{val:.3f}".rstrip('0').rstrip('.')
-    return f"{s}%"
+    return {
+        'brut_total': brut_total,
+        'cotisations': cotisations,
+        'total_sal': total_sal,
+        'total_pat': total_pat,
+        'net_avant_impot': net_avant_impot,
+        'net_imposable': net_imposable,
+        'taux_pas': taux_pas,
+        'montant_pas': montant_pas,
+        'net_a_payer': net_a_payer,
+        'cout_total': cout_total,
+        'transport_employeur': transport_employeur,
+        'tickets_restaurant': tickets_restaurant,
+        'avantages_nature': avantages_nature,
+    }
 
 
 def generate_fiche_paie(
@@ -125,15 +195,33 @@ def generate_fiche_paie(
     statut='cadre', taux_at=1.13,
     mutuelle_employeur=30, mutuelle_salarie=20,
     transport_employeur=43.75, tickets_restaurant=0,
+    tranches=None, cumuls=None, taux_pas=None, zone_pas='metropole',
+    reproductible=False, sidecar=False, apercu=False, chiffrement=None, archive=False,
 ):
+    """Bulletin PDF.
+
+    tranches : bases plafonnées régularisées du mois (cumul_annuel.py)
+    cumuls   : cumuls annuels à imprimer en pied de bulletin, dict
+               {brut, plafond, net_imposable, total_sal, cout_total}
+    taux_pas : taux personnalisé de prélèvement à la source (%), sinon
+               taux neutre de la grille zone_pas
+    reproductible : mêmes entrées → PDF identique à l'octet près
+               (voir pdf_reproductible.py)
+    sidecar  : écrit aussi les chiffres du bulletin en JSON, à côté du PDF
+               (True), à un chemin donné, ou pas du tout (False, défaut :
+               le JSON contient le NIR et le salaire en clair)
+    apercu   : écrit une page HTML/SVG au lieu du PDF (apercu_html.py)
+    chiffrement : protège le PDF par mot de passe (chiffrement_paie.py)
+    archive  : PDF compact pour la conservation légale (archive_pdf.py)
+    """
+    entrees = dict(locals())
+    empreinte = empreinte_entrees('generate_fiche_paie', entrees) if reproductible else None
     w, h = A4
-    c = canvas.Canvas(output_path, pagesize=A4)
+    c = nouveau_canvas(output_path, A4, empreinte, apercu, chiffrement, archive)
     c.setTitle(f"Bulletin de paie - {employe_nom} - {mois} {annee}")
     c.setAuthor("TalosPrimes SaaS")
 
-    # Fond
-    c.setFillColor(DARK_BG)
-    c.rect(0, 0, w, h, fill=1, stroke=0)
+    fond_page(c, A4)
 
     y = h - 25*mm
     ml = 15*mm
@@ -141,25 +229,11 @@ def generate_fiche_paie(
     cw = mr - ml
 
     # ── EN-TÊTE ──
-    c.setFillColor(HEADER_BG)
-    c.roundRect(ml, y - 55*mm, cw, 55*mm, 4, fill=1, stroke=0)
-
-    c.setFillColor(ACCENT)
-    c.setFont('Helvetica-Bold', 18)
-    c.drawString(ml + 8*mm, y - 12*mm, employeur_nom)
-
-    c.setFillColor(TEXT_GRAY)
-    c.setFont('Helvetica', 8)
-    c.drawString(ml + 8*mm, y - 18*mm, employeur_adresse)
-    c.drawString(ml + 8*mm, y - 23*mm, f"SIRET : {employeur_siret}  |  APE : {employeur_code_ape}  |  URSSAF : {employeur_urssaf}")
-    c.drawString(ml + 8*mm, y - 28*mm, f"Convention collective : {employeur_convention}")
-
-    c.setFillColor(ACCENT_LIGHT)
-    c.setFont('Helvetica-Bold', 14)
-    c.drawRightString(mr - 8*mm, y - 12*mm, 'BULLETIN DE PAIE')
-    c.setFillColor(TEXT_WHITE)
-    c.setFont('Helvetica-Bold', 11)
-    c.drawRightString(mr - 8*mm, y - 20*mm, f'{mois} {annee}')
+    bandeau(c, ml, y, cw, 55*mm, employeur_nom, [
+        employeur_adresse,
+        f"SIRET : {employeur_siret}  |  APE : {employeur_code_ape}  |  URSSAF : {employeur_urssaf}",
+        f"Convention collective : {employeur_convention}",
+    ], 'BULLETIN DE PAIE', f'{mois} {annee}', base=12*mm, taille_nom=18, rayon=4)
 
     ey = y - 34*mm
     c.setFillColor(TEXT_WHITE)
@@ -179,8 +253,7 @@ def generate_fiche_paie(
     # ── BRUT ──
     brut_total = salaire_base + primes + heures_supp + avantages_nature
 
-    c.setFillColor(HEADER_BG)
-    c.roundRect(ml, y - 22*mm, cw, 22*mm, 4, fill=1, stroke=0)
+    cadre(c, ml, y, cw, 22*mm)
 
     c.setFillColor(ACCENT)
     c.setFont('Helvetica-Bold', 9)
@@ -209,91 +282,46 @@ def generate_fiche_paie(
     y -= 26*mm
 
     # ── COTISATIONS ──
-    cotisations = get_cotisations(brut_total, statut, taux_at)
-
-    # Ajouter mutuelle après CSA
-    if mutuelle_salarie > 0 or mutuelle_employeur > 0:
-        cotisations.insert(2, {
-            'libelle': 'Complémentaire santé (mutuelle)',
-            'base': 0, 'taux_sal': 0, 'taux_pat': 0,
-            'montant_sal': mutuelle_salarie, 'montant_pat': mutuelle_employeur,
-            'categorie': 'Santé',
-        })
-
-    total_sal = sum(x['montant_sal'] for x in cotisations)
-    total_pat = sum(x['montant_pat'] for x in cotisations)
+    bulletin = calculer_bulletin(
+        brut_total, statut, taux_at,
+        mutuelle_employeur, mutuelle_salarie,
+        transport_employeur, tickets_restaurant, avantages_nature,
+        tranches, taux_pas, zone_pas,
+    )
+    cotisations = bulletin['cotisations']
+    total_sal = bulletin['total_sal']
+    total_pat = bulletin['total_pat']
 
+    page = Paginateur(c, A4, haut=h - 20*mm, bas=12*mm, fond=DARK_BG, y=y)
+    page.reserver(4*mm + 7*mm + 5*mm)
     c.setFillColor(ACCENT)
     c.setFont('Helvetica-Bold', 9)
-    c.drawString(ml + 5*mm, y, 'COTISATIONS ET CONTRIBUTIONS SOCIALES')
-    y -= 4*mm
-
-    # Header row
-    c.setFillColor(HEADER_BG)
-    c.rect(ml, y - 6*mm, cw, 6*mm, fill=1, stroke=0)
-    c.setFillColor(ACCENT_LIGHT)
-    c.setFont('Helvetica-Bold', 6)
-    c.drawString(ml + 3*mm, y - 4.5*mm, 'Cotisation')
-    c.drawRightString(ml + 90*mm, y - 4.5*mm, 'Base')
-    c.drawRightString(ml + 110*mm, y - 4.5*mm, 'Taux sal.')
-    c.drawRightString(ml + 130*mm, y - 4.5*mm, 'Part salarié')
-    c.drawRightString(ml + 150*mm, y - 4.5*mm, 'Taux pat.')
-    c.drawRightString(mr - 5*mm, y - 4.5*mm, 'Part employeur')
-    y -= 7*mm
+    c.drawString(ml + 5*mm, page.y, 'COTISATIONS ET CONTRIBUTIONS SOCIALES')
+    page.descendre(4*mm)
 
+    tableau = Tableau(COLONNES_COTISATIONS, cw, **STYLE_COTISATIONS)
     current_cat = ''
-    row_idx = 0
-    c.setFont('Helvetica', 6.5)
-
-    for cot in cotisations:
-        if y < 65*mm:
-            c.showPage()
-            c.setFillColor(DARK_BG)
-            c.rect(0, 0, w, h, fill=1, stroke=0)
-            y = h - 20*mm
-
+    for row_idx, cot in enumerate(cotisations):
         if cot['categorie'] != current_cat:
             current_cat = cot['categorie']
-            c.setFillColor(HexColor('#1e293b'))
-            c.rect(ml, y - 4.5*mm, cw, 4.5*mm, fill=1, stroke=0)
-            c.setFillColor(BLUE)
-            c.setFont('Helvetica-Bold', 6)
-            c.drawString(ml + 3*mm, y - 3.5*mm, current_cat.upper())
-            y -= 5*mm
-            c.setFont('Helvetica', 6.5)
-
-        if row_idx % 2 == 0:
-            c.setFillColor(ROW_ALT)
-            c.rect(ml, y - 4.5*mm, cw, 4.5*mm, fill=1, stroke=0)
-
-        c.setFillColor(TEXT_LIGHT)
-        c.drawString(ml + 3*mm, y - 3.5*mm, cot['libelle'])
-
-        if cot['base'] > 0:
-            c.setFillColor(TEXT_GRAY)
-            c.drawRightString(ml + 90*mm, y - 3.5*mm, fmt_eur(cot['base']))
-
-        if cot['taux_sal'] > 0:
-            c.setFillColor(TEXT_GRAY)
-            c.drawRightString(ml + 110*mm, y - 3.5*mm, fmt_pct(cot['taux_sal']))
-
-        if cot['montant_sal'] > 0:
-            c.setFillColor(ORANGE)
-            c.drawRightString(ml + 130*mm, y - 3.5*mm, fmt_eur(cot['montant_sal']))
-
-        if cot['taux_pat'] > 0:
-            c.setFillColor(TEXT_GRAY)
-            c.drawRightString(ml + 150*mm, y - 3.5*mm, fmt_pct(cot['taux_pat']))
-
-        if cot['montant_pat'] > 0:
-            c.setFillColor(RED)
-            c.drawRightString(mr - 5*mm, y - 3.5*mm, fmt_eur(cot['montant_pat']))
-
-        y -= 5*mm
-        row_idx += 1
+            tableau.categorie(current_cat)
+        tableau.ligne(
+            [
+                cot['libelle'],
+                fmt_eur(cot['base']) if cot['base'] != 0 else '',
+                fmt_pct(cot['taux_sal']) if cot['taux_sal'] > 0 else '',
+                fmt_eur(cot['montant_sal']) if cot['montant_sal'] != 0 else '',
+                fmt_pct(cot['taux_pat']) if cot['taux_pat'] > 0 else '',
+                fmt_eur(cot['montant_pat']) if cot['montant_pat'] != 0 else '',
+            ],
+            couleurs=COULEURS_COTISATIONS,
+            fond=ROW_ALT if row_idx % 2 == 0 else None,
+        )
+    # La ligne de total reste avec la dernière cotisation
+    page.tableau(tableau, ml, garder_avec=9*mm)
 
     # Total
-    y -= 2*mm
+    y = page.descendre(2*mm)
     c.setFillColor(HEADER_BG)
     c.rect(ml, y - 7*mm, cw, 7*mm, fill=1, stroke=0)
     c.setFillColor(ACCENT_LIGHT)
@@ -304,21 +332,19 @@ def generate_fiche_paie(
     c.drawRightString(ml + 130*mm, y - 5*mm, fmt_eur(total_sal))
     c.setFillColor(RED)
     c.drawRightString(mr - 5*mm, y - 5*mm, fmt_eur(total_pat))
-    y -= 12*mm
+    page.descendre(12*mm)
 
     # ── NET ──
-    net_avant_impot = brut_total - total_sal
-    csg_non_ded = next((x['montant_sal'] for x in cotisations if 'non déductible' in x['libelle'].lower()), 0)
-    cotis_ded = sum(x['montant_sal'] for x in cotisations) - csg_non_ded
-    net_imposable = brut_total - cotis_ded
-    net_a_payer = net_avant_impot + transport_employeur + tickets_restaurant - avantages_nature
-    cout_total = brut_total + total_pat
+    net_avant_impot = bulletin['net_avant_impot']
+    net_imposable = bulletin['net_imposable']
+    net_a_payer = bulletin['net_a_payer']
+    cout_total = bulletin['cout_total']
 
-    c.setFillColor(HexColor('#0f3d0f'))
-    c.roundRect(ml, y - 35*mm, cw, 35*mm, 6, fill=1, stroke=0)
+    y = page.reserver(40*mm)
+    cadre(c, ml, y, cw, 40*mm, FOND_NET, 6)
     c.setStrokeColor(GREEN)
     c.setLineWidth(1.5)
-    c.roundRect(ml, y - 35*mm, cw, 35*mm, 6, fill=0, stroke=1)
+    c.roundRect(ml, y - 40*mm, cw, 40*mm, 6, fill=0, stroke=1)
 
     ny = y - 5*mm
     c.setFillColor(TEXT_LIGHT)
@@ -335,6 +361,14 @@ def generate_fiche_paie(
     c.drawRightString(mr - 8*mm, ny, fmt_eur(net_imposable))
     ny -= 5*mm
 
+    origine_taux = 'taux neutre' if taux_pas is None else 'taux personnalisé'
+    taux_applique = fmt_pct(bulletin['taux_pas']) if bulletin['taux_pas'] else '0%'
+    c.drawString(ml + 8*mm, ny, f'Impôt sur le revenu prélevé à la source ({origine_taux} {taux_applique})')
+    c.setFillColor(RED)
+    c.drawRightString(mr - 8*mm, ny, f'-{fmt_eur(bulletin["montant_pas"])}')
+    c.setFillColor(TEXT_GRAY)
+    ny -= 5*mm
+
     if transport_employeur > 0:
         c.drawString(ml + 8*mm, ny, 'Remboursement transport (50% Navigo)')
         c.setFillColor(GREEN)
@@ -359,11 +393,11 @@ def generate_fiche_paie(
     c.drawString(ml + 8*mm, ny, 'NET À PAYER')
     c.setFont('Helvetica-Bold', 14)
     c.drawRightString(mr - 8*mm, ny, fmt_eur(net_a_payer))
-    y -= 40*mm
+    page.descendre(45*mm)
 
     # ── COÛT EMPLOYEUR ──
-    c.setFillColor(HexColor('#1e293b'))
-    c.roundRect(ml, y - 10*mm, cw, 10*mm, 4, fill=1, stroke=0)
+    y = page.reserver(10*mm)
+    cadre(c, ml, y, cw, 10*mm, SURFACE)
     c.setFillColor(TEXT_GRAY)
     c.setFont('Helvetica', 7)
     c.drawString(ml + 5*mm, y - 4*mm, f'Charges patronales : {fmt_eur(total_pat)} ({total_pat/brut_total*100:.1f}% du brut)')
@@ -373,9 +407,35 @@ def generate_fiche_paie(
     c.setFillColor(TEXT_GRAY)
     c.setFont('Helvetica', 7)
     c.drawString(ml + 5*mm, y - 8*mm, f'Coût total employeur (brut + charges patronales)')
-    y -= 14*mm
+    page.descendre(14*mm)
+
+    # ── CUMULS ANNUELS ──
+    if cumuls:
+        y = page.reserver(10*mm)
+        cadre(c, ml, y, cw, 10*mm)
+        c.setFillColor(ACCENT)
+        c.setFont('Helvetica-Bold', 6.5)
+        c.drawString(ml + 5*mm, y - 4*mm, f'CUMULS {annee}')
+        items_cumul = [
+            ('Brut', cumuls['brut']),
+            ('Plafond SS', cumuls['plafond']),
+            ('Cotis. salariales', cumuls['total_sal']),
+            ('Net imposable', cumuls['net_imposable']),
+            ('Coût employeur', cumuls['cout_total']),
+        ]
+        col_w = (cw - 30*mm) / len(items_cumul)
+        for i, (label, montant) in enumerate(items_cumul):
+            cx = ml + 30*mm + (i + 1) * col_w - 3*mm
+            c.setFillColor(TEXT_GRAY)
+            c.setFont('Helvetica', 5.5)
+            c.drawRightString(cx, y - 4*mm, label)
+            c.setFillColor(TEXT_WHITE)
+            c.setFont('Helvetica-Bold', 7)
+            c.drawRightString(cx, y - 8*mm, fmt_eur(montant))
+        page.descendre(14*mm)
 
     # ── MENTIONS LÉGALES ──
+    y = page.reserver(3 * 3.5*mm)
     c.setFillColor(TEXT_GRAY)
     c.setFont('Helvetica', 5.5)
     for line in [
@@ -387,9 +447,75 @@ def generate_fiche_paie(
         y -= 3.5*mm
 
     c.save()
+    chemin_json = chemin_sidecar(output_path, sidecar)
+    if chemin_json:
+        ecrire_json(chemin_json, donnees_fiche_paie(entrees, bulletin))
     return output_path
 
 
+def donnees_fiche_paie(entrees, bulletin=None):
+    """Document JSON d'un bulletin (voir donnees_json.py).
+
+    entrees : arguments de generate_fiche_paie (les absents prennent leur
+    valeur par défaut). bulletin : résultat de calculer_bulletin, calculé
+    ici s'il n'est pas fourni — aucun rendu PDF n'est nécessaire.
+    """
+    e = {**DEFAUTS_FICHE_PAIE, **entrees}
+    if bulletin is None:
+        bulletin = calculer_bulletin(
+            e['salaire_base'] + e['primes'] + e['heures_supp'] + e['avantages_nature'],
+            e['statut'], e['taux_at'],
+            e['mutuelle_employeur'], e['mutuelle_salarie'],
+            e['transport_employeur'], e['tickets_restaurant'], e['avantages_nature'],
+            e['tranches'], e['taux_pas'], e['zone_pas'],
+        )
+    return document(
+        'fiche_paie',
+        periode={'mois': e['mois'], 'annee': e['annee']},
+        employeur={
+            'nom': e['employeur_nom'],
+            'adresse': e['employeur_adresse'],
+            'siret': e['employeur_siret'],
+            'code_ape': e['employeur_code_ape'],
+            'convention': e['employeur_convention'],
+            'urssaf': e['employeur_urssaf'],
+        },
+        salarie={
+            'nom': e['employe_nom'],
+            'num_secu': e['employe_num_secu'],
+            'poste': e['employe_poste'],
+            'qualification': e['employe_qualification'],
+            'statut': e['statut'],
+        },
+        remuneration={
+            'salaire_base': e['salaire_base'],
+            'heures_travaillees': e['heures_travaillees'],
+            'heures_supp': e['heures_supp'],
+            'primes': e['primes'],
+            'avantages_nature': e['avantages_nature'],
+            'brut_total': bulletin['brut_total'],
+        },
+        cotisations=[
+            {k: cot[k] for k in ('libelle', 'categorie', 'base', 'taux_sal', 'montant_sal', 'taux_pat', 'montant_pat')}
+            for cot in bulletin['cotisations']
+        ],
+        totaux={k: bulletin[k] for k in (
+            'total_sal', 'total_pat', 'net_avant_impot', 'net_imposable', 'taux_pas',
+            'montant_pas', 'transport_employeur', 'tickets_restaurant', 'net_a_payer', 'cout_total',
+        )},
+        taux_at=e['taux_at'],
+        tranches=e['tranches'],
+        cumuls=e['cumuls'],
+    )
+
+
+DEFAUTS_FICHE_PAIE = {
+    nom: param.default
+    for nom, param in inspect.signature(generate_fiche_paie).parameters.items()
+    if param.default is not inspect.Parameter.empty
+}
+
+
 if __name__ == '__main__':
     output = '/sessions/relaxed-optimistic-ride/mnt/talosprimes/exemple_fiche_paie.pdf'
     generate_fiche_paie(
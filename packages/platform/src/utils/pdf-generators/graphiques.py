@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+============================================================
+GRAPHIQUES VECTORIELS — TalosPrimes
+Barres empilées et courbes, sur gabarits mis en cache
+============================================================
+
+Un graphique se compose d'un gabarit (cadre, titre, légende, grille,
+libellés des mois) et d'un tracé propre aux données (barres, courbes,
+graduations de l'axe vertical).
+
+- Le gabarit ne dépend que de la géométrie, du titre et de la légende :
+  sa description est calculée une fois par processus (lru_cache), puis
+  enregistrée une fois par document comme objet PDF réutilisable
+  (XObject « form », beginForm/doForm de ReportLab) ; chaque graphique
+  qui le réutilise ne coûte qu'une référence.
+- Le tracé des données passe par un Lot (mise_en_page.py) : un chemin
+  par couleur de barres, un chemin par courbe.
+
+La page s'ajoute au prévisionnel sur demande :
+generate_previsionnel(..., graphiques=True).
+
+En génération de masse, seul ce tracé des données est recalculé d'un
+prévisionnel à l'autre. CanvasSvg (apercu_html.py) gère aussi les
+gabarits (<use> d'un groupe défini une fois).
+"""
+
+from functools import lru_cache
+import hashlib
+import math
+import weakref
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.units import mm
+
+from charte import ACCENT_LIGHT, HEADER_BG, TEXT_GRAY, cadre, fmt_court
+from mise_en_page import Lot, largeur_texte
+
+FOND = HEADER_BG
+GRILLE = HexColor('#2a3550')
+AXE = HexColor('#64748b')
+TITRE = ACCENT_LIGHT
+TEXTE = TEXT_GRAY
+
+# Marges de la zone de tracé dans le cadre du graphique
+MARGE_GAUCHE = 16*mm
+MARGE_DROITE = 5*mm
+MARGE_BAS = 8*mm
+MARGE_HAUT = 15*mm
+
+# Gabarits déjà enregistrés dans chaque document
+_gabarits_emis = weakref.WeakKeyDictionary()
+
+
+def bornes_axe(valeurs, divisions=5):
+    """Axe « rond » contenant toutes les valeurs et 0 : (bas, pas)"""
+    vmin, vmax = min(min(valeurs), 0), max(max(valeurs), 0)
+    if vmax == vmin:
+        vmax = vmin + 1
+    pas = (vmax - vmin) / divisions
+    puissance = 10 ** math.floor(math.log10(pas))
+    for facteur in (1, 2, 2.5, 5, 10, 20):
+        pas_rond = facteur * puissance
+        bas = math.floor(vmin / pas_rond) * pas_rond
+        if bas + pas_rond * divisions >= vmax:
+            return bas, pas_rond
+    return bas, pas_rond
+
+
+@lru_cache(maxsize=64)
+def gabarit(largeur, hauteur, titre, legende, etiquettes, divisions=5):
+    """Description du gabarit (coordonnées relatives au coin bas gauche).
+
+    legende : tuple de (libellé, couleur) ; etiquettes : libellés des
+    colonnes (mois). Retourne {nom, zone, lot} ; zone = (x, y, l, h) de
+    la zone de tracé.
+    """
+    zx, zy = MARGE_GAUCHE, MARGE_BAS
+    zl, zh = largeur - MARGE_GAUCHE - MARGE_DROITE, hauteur - MARGE_BAS - MARGE_HAUT
+    lot = Lot()
+    lot.texte(4*mm, hauteur - 5.5*mm, titre, 'Helvetica-Bold', 8, TITRE)
+
+    lx = 4*mm
+    for libelle, couleur in legende:
+        lot.rect(lx, hauteur - 10.5*mm, 2.5*mm, 2.5*mm, couleur)
+        lot.texte(lx + 3.5*mm, hauteur - 10.2*mm, libelle, 'Helvetica', 5.5, TEXTE)
+        lx += 3.5*mm + largeur_texte(libelle, 'Helvetica', 5.5) + 5*mm
+
+    for k in range(divisions + 1):
+        lot.rect(zx, zy + zh * k / divisions - 0.2, zl, 0.4, GRILLE)
+    lot.rect(zx - 0.3, zy, 0.6, zh, AXE)
+
+    colonne = zl / len(etiquettes)
+    for i, etiquette in enumerate(etiquettes):
+        centre = zx + colonne * (i + 0.5)
+        lot.texte(centre - largeur_texte(etiquette, 'Helvetica', 5.5) / 2, zy - 4.5*mm,
+                  etiquette, 'Helvetica', 5.5, TEXTE)
+
+    cle = repr((largeur, hauteur, titre, [(l, c.hexval()) for l, c in legende], etiquettes, divisions))
+    return {
+        'nom': 'gabarit_' + hashlib.md5(cle.encode()).hexdigest()[:12],
+        'largeur': largeur,
+        'hauteur': hauteur,
+        'zone': (zx, zy, zl, zh),
+        'lot': lot,
+    }
+
+
+def _tracer_gabarit(c, g):
+    cadre(c, 0, g['hauteur'], g['largeur'], g['hauteur'], FOND)
+    g['lot'].tracer(c)
+
+
+def placer_gabarit(c, g, x, y):
+    """Dessine le gabarit en (x, y), en l'enregistrant au premier usage"""
+    emis = _gabarits_emis.setdefault(c, set())
+    if g['nom'] not in emis:
+        c.beginForm(g['nom'], 0, 0, g['largeur'], g['hauteur'])
+        _tracer_gabarit(c, g)
+        c.endForm()
+        emis.add(g['nom'])
+    c.saveState()
+    c.translate(x, y)
+    c.doForm(g['nom'])
+    c.restoreState()
+
+
+def _graduations(lot, x, y, zone, bas, pas, divisions, fmt_valeur):
+    zx, zy, _zl, zh = zone
+    for k in range(divisions + 1):
+        texte = fmt_valeur(bas + pas * k)
+        lot.texte(x + zx - 1.5*mm, y + zy + zh * k / divisions - 1.5, texte, 'Helvetica', 5.5, TEXTE, 'right')
+
+
+def _courbe(c, points, couleur, epaisseur=1.2):
+    c.setStrokeColor(couleur)
+    c.setLineWidth(epaisseur)
+    chemin = c.beginPath()
+    chemin.moveTo(*points[0])
+    for point in points[1:]:
+        chemin.lineTo(*point)
+    c.drawPath(chemin, stroke=1, fill=0)
+
+
+def barres_empilees(c, x, y, largeur, hauteur, titre, etiquettes, series, ligne=None,
+                    fmt_valeur=fmt_court, divisions=5):
+    """Barres empilées par colonne, plus une courbe optionnelle.
+
+    series : [(libellé, couleur, valeurs)] empilées dans l'ordre ;
+    ligne : (libellé, couleur, valeurs) tracée par-dessus, ou None.
+    """
+    legende = tuple((libelle, couleur) for libelle, couleur, _ in series)
+    if ligne is not None:
+        legende += ((ligne[0], ligne[1]),)
+    g = gabarit(largeur, hauteur, titre, legende, tuple(etiquettes), divisions)
+    placer_gabarit(c, g, x, y)
+
+    n = len(etiquettes)
+    hauts = [sum(max(v[i], 0) for _, _, v in series) for i in range(n)]
+    bass = [sum(min(v[i], 0) for _, _, v in series) for i in range(n)]
+    bas, pas = bornes_axe(hauts + bass + (list(ligne[2]) if ligne else []), divisions)
+    zx, zy, zl, zh = g['zone']
+    echelle = zh / (pas * divisions)
+    zero = y + zy + (0 - bas) * echelle
+    colonne = zl / n
+
+    lot = Lot()
+    for i in range(n):
+        bx = x + zx + colonne * (i + 0.2)
+        dessus, dessous = zero, zero
+        for _libelle, couleur, valeurs in series:
+            hauteur_barre = valeurs[i] * echelle
+            if hauteur_barre >= 0:
+                lot.rect(bx, dessus, colonne * 0.6, hauteur_barre, couleur)
+                dessus += hauteur_barre
+            else:
+                dessous += hauteur_barre
+                lot.rect(bx, dessous, colonne * 0.6, -hauteur_barre, couleur)
+    _graduations(lot, x, y, g['zone'], bas, pas, divisions, fmt_valeur)
+    lot.vider(c)
+
+    if ligne is not None:
+        points = [(x + zx + colonne * (i + 0.5), zero + v * echelle) for i, v in enumerate(ligne[2])]
+        _courbe(c, points, ligne[1])
+
+
+def courbes(c, x, y, largeur, hauteur, titre, etiquettes, series, fmt_valeur=fmt_court, divisions=5):
+    """Une courbe par série : [(libellé, couleur, valeurs)] ; axe à 0 marqué"""
+    legende = tuple((libelle, couleur) for libelle, couleur, _ in series)
+    g = gabarit(largeur, hauteur, titre, legende, tuple(etiquettes), divisions)
+    placer_gabarit(c, g, x, y)
+
+    bas, pas = bornes_axe([v for _, _, valeurs in series for v in valeurs], divisions)
+    zx, zy, zl, zh = g['zone']
+    echelle = zh / (pas * divisions)
+    zero = y + zy + (0 - bas) * echelle
+    colonne = zl / len(etiquettes)
+
+    lot = Lot()
+    if bas < 0:
+        lot.rect(x + zx, zero - 0.4, zl, 0.8, AXE)
+    _graduations(lot, x, y, g['zone'], bas, pas, divisions, fmt_valeur)
+    lot.vider(c)
+    for _libelle, couleur, valeurs in series:
+        points = [(x + zx + colonne * (i + 0.5), zero + v * echelle) for i, v in enumerate(valeurs)]
+        _courbe(c, points, couleur)
+
+
+if __name__ == '__main__':
+    import io
+    import time
+
+    from charte import BLUE, RED
+    from previsionnel import MOIS, generate_previsionnel
+
+    n = 200
+    temps = {}
+    for avec in (True, False):
+        debut = time.perf_counter()
+        for _ in range(n):
+            generate_previsionnel(io.BytesIO(), sidecar=False, graphiques=avec)
+        temps[avec] = (time.perf_counter() - debut) / n
+    print(f"Prévisionnel : {temps[True] * 1000:.1f} ms avec graphiques, {temps[False] * 1000:.1f} ms sans "
+          f"(page de graphiques : {(temps[True] - temps[False]) * 1000:.1f} ms)")
+
+    # Gabarit en cache (cas de la génération de masse) contre gabarit recalculé
+    args = (700.0, 240.0, 'CHIFFRE D\'AFFAIRES', (('Abonnements', BLUE), ('Charges', RED)), tuple(MOIS))
+    debut = time.perf_counter()
+    for _ in range(n):
+        gabarit.cache_clear()
+        gabarit(*args)
+    t_calcul = (time.perf_counter() - debut) / n
+    debut = time.perf_counter()
+    for _ in range(n):
+        gabarit(*args)
+    t_cache = (time.perf_counter() - debut) / n
+    print(f"Gabarit : {t_calcul * 1e6:.0f} µs calculé, {t_cache * 1e6:.1f} µs en cache")
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+============================================================
+JOURNAL DE PAIE — TalosPrimes
+Export comptable des bulletins : CSV, colonnes compactes, FEC
+============================================================
+
+Pendant un calcul de paie, chaque bulletin (dict de calculer_bulletin)
+est écrit au fil de l'eau :
+- une ligne par cotisation (libellé, base, taux, montants, compte)
+- des lignes de totaux (brut, cotisations, net imposable, PAS, net à
+  payer, coût employeur)
+
+dans deux fichiers :
+- <chemin>.csv    séparateur ';', décimales avec point, lisible tel quel
+- <chemin>.tpcol  colonnes compactes : les lignes sont groupées par blocs
+                  de TAILLE_BLOC, chaque colonne d'un bloc est un tableau
+                  binaire compressé (montants en centimes int64, taux en
+                  millièmes de % int32, textes en codes de dictionnaire
+                  uint32). Le pied de fichier (JSON) décrit les blocs et
+                  les dictionnaires ; lire_colonnes() relit le tout.
+
+La mémoire reste constante : seul le bloc en cours est gardé. En même
+temps, les montants sont cumulés par compte du PCG (débit/crédit) :
+ecrire_fec() n'a plus qu'à écrire l'écriture de paie agrégée, au format
+du Fichier des Écritures Comptables (18 colonnes, tabulations).
+"""
+
+from array import array
+import csv
+import json
+import struct
+import sys
+import zlib
+
+MAGIC = b'TPCOL1\n'
+TAILLE_BLOC = 4096
+
+# (nom, type) : 's' texte (dictionnaire), 'c' montant en centimes, 't' taux
+COLONNES = [
+    ('periode', 's'),
+    ('matricule', 's'),
+    ('nom', 's'),
+    ('type', 's'),
+    ('libelle', 's'),
+    ('categorie', 's'),
+    ('compte', 's'),
+    ('base', 'c'),
+    ('taux_sal', 't'),
+    ('montant_sal', 'c'),
+    ('taux_pat', 't'),
+    ('montant_pat', 'c'),
+    ('montant', 'c'),
+]
+CODES_ARRAY = {'s': 'I', 'c': 'q', 't': 'i'}
+ECHELLES = {'c': 100, 't': 1000}
+
+TOTAUX = [
+    ('brut_total', 'Salaire brut'),
+    ('total_sal', 'Total cotisations salariales'),
+    ('total_pat', 'Total cotisations patronales'),
+    ('net_avant_impot', 'Net avant impôt'),
+    ('net_imposable', 'Net imposable'),
+    ('montant_pas', 'Prélèvement à la source'),
+    ('net_a_payer', 'Net à payer'),
+    ('cout_total', 'Coût employeur'),
+]
+
+# ============================================================
+# PLAN DE COMPTES
+# ============================================================
+
+COMPTES = {
+    '421000': 'Personnel - Rémunérations dues',
+    '431000': 'Sécurité sociale (URSSAF)',
+    '437200': 'France Travail (chômage)',
+    '437300': 'Retraite complémentaire (Agirc-Arrco)',
+    '437400': 'Mutuelle',
+    '437500': 'Prévoyance',
+    '442100': 'Prélèvement à la source',
+    '631200': "Taxe d'apprentissage",
+    '633300': 'Participation formation continue',
+    '641100': 'Salaires, appointements',
+    '645100': 'Cotisations URSSAF',
+    '645200': 'Cotisations mutuelles',
+    '645300': 'Cotisations retraite complémentaire',
+    '645400': 'Cotisations chômage',
+    '645800': 'Cotisations autres organismes',
+    '647000': 'Autres charges sociales (transport, titres-restaurant)',
+    '708800': 'Avantages en nature',
+}
+
+
+def comptes_ligne(libelle):
+    """(compte de charge patronale, compte de l'organisme) d'une cotisation"""
+    lib = libelle.lower()
+    if 'agirc' in lib or 'ceg' in lib or 'cet' in lib or 'apec' in lib:
+        return '645300', '437300'
+    if 'mutuelle' in lib:
+        return '645200', '437400'
+    if 'prévoyance' in lib:
+        return '645800', '437500'
+    if 'chômage' in lib or lib == 'ags':
+        return '645400', '437200'
+    if 'formation' in lib:
+        return '633300', '431000'
+    if 'apprentissage' in lib:
+        return '631200', '431000'
+    return '645100', '431000'
+
+
+def centimes(montant):
+    return int(round(montant * 100))
+
+
+# ============================================================
+# JOURNAL
+# ============================================================
+
+class JournalPaie:
+    """Écrit le journal d'un calcul de paie au fil des bulletins.
+
+    with JournalPaie('/tmp/paie-2026-03') as journal:
+        journal.ajouter('2026-03', 'E0001', 'Jean DUPONT', bulletin)
+        ...
+        journal.ecrire_fec('/tmp/paie-2026-03.fec.txt', '20260331')
+    """
+
+    def __init__(self, chemin, taille_bloc=TAILLE_BLOC):
+        self.chemin = chemin
+        self.taille_bloc = taille_bloc
+        self._csv_file = open(chemin + '.csv', 'w', newline='', encoding='utf-8')
+        self._csv = csv.writer(self._csv_file, delimiter=';')
+        self._csv.writerow([nom for nom, _ in COLONNES])
+        self._col_file = open(chemin + '.tpcol', 'wb')
+        self._col_file.write(MAGIC)
+        self._dictionnaires = {nom: {} for nom, t in COLONNES if t == 's'}
+        self._bloc = self._nouveau_bloc()
+        self._blocs = []
+        self.lignes = 0
+        self.bulletins = 0
+        # compte -> [débit, crédit] en centimes
+        self.soldes = {}
+
+    def _nouveau_bloc(self):
+        return [array(CODES_ARRAY[t]) for _, t in COLONNES]
+
+    def _mouvement(self, compte, debit=0, credit=0):
+        solde = self.soldes.setdefault(compte, [0, 0])
+        solde[0] += debit
+        solde[1] += credit
+
+    def _ligne(self, valeurs):
+        self._csv.writerow(valeurs)
+        for (nom, t), col, valeur in zip(COLONNES, self._bloc, valeurs):
+            if t == 's':
+                codes = self._dictionnaires[nom]
+                code = codes.get(valeur)
+                if code is None:
+                    code = codes[valeur] = len(codes)
+                col.append(code)
+            else:
+                col.append(int(round((valeur or 0) * ECHELLES[t])))
+        self.lignes += 1
+        if len(self._bloc[0]) >= self.taille_bloc:
+            self._vider_bloc()
+
+    def _vider_bloc(self):
+        n = len(self._bloc[0])
+        if not n:
+            return
+        tailles = []
+        for col in self._bloc:
+            if sys.byteorder != 'little':
+                col.byteswap()
+            data = zlib.compress(col.tobytes(), 6)
+            self._col_file.write(data)
+            tailles.append(len(data))
+        self._blocs.append({'lignes': n, 'tailles': tailles})
+        self._bloc = self._nouveau_bloc()
+
+    def ajouter(self, periode, matricule, nom, bulletin):
+        """Lignes de cotisations + totaux d'un bulletin, et cumul par compte"""
+        for cot in bulletin['cotisations']:
+            compte_charge, compte_organisme = comptes_ligne(cot['libelle'])
+            self._ligne([
+                periode, matricule, nom, 'cotisation', cot['libelle'], cot['categorie'],
+                compte_organisme, cot['base'], cot['taux_sal'], cot['montant_sal'],
+                cot['taux_pat'], cot['montant_pat'], None,
+            ])
+            sal, pat = centimes(cot['montant_sal']), centimes(cot['montant_pat'])
+            if pat:
+                self._mouvement(compte_charge, debit=pat)
+            if sal or pat:
+                self._mouvement(compte_organisme, credit=sal + pat)
+
+        for cle, libelle in TOTAUX:
+            self._ligne([
+                periode, matricule, nom, 'total', libelle, '', '',
+                None, None, None, None, None, bulletin.get(cle, 0),
+            ])
+
+        # Contrepartie : brut en charge, net / PAS dus au salarié et à l'État,
+        # frais de transport et titres-restaurant en charges sociales
+        self._mouvement('641100', debit=centimes(bulletin['brut_total']))
+        self._mouvement('421000', credit=centimes(bulletin['net_a_payer']))
+        pas = centimes(bulletin['montant_pas'])
+        if pas:
+            self._mouvement('442100', credit=pas)
+        frais = centimes(bulletin['transport_employeur']) + centimes(bulletin['tickets_restaurant'])
+        if frais:
+            self._mouvement('647000', debit=frais)
+        avantages = centimes(bulletin['avantages_nature'])
+        if avantages:
+            self._mouvement('708800', credit=avantages)
+        self.bulletins += 1
+
+    def ecritures_fec(self, date_ecriture, numero='PAIE', libelle='Paie'):
+        """Lignes FEC de l'écriture de paie agrégée, débits puis crédits"""
+        debit = sum(d for d, _ in self.soldes.values())
+        credit = sum(c for _, c in self.soldes.values())
+        if debit != credit:
+            raise ValueError(f"Écriture de paie déséquilibrée : débit {debit / 100:.2f}, crédit {credit / 100:.2f}")
+
+        def fmt(cts):
+            return f"{cts / 100:.2f}".replace('.', ',')
+
+        lignes = []
+        for compte in sorted(self.soldes, key=lambda c: (not self.soldes[c][0], c)):
+            d, c = self.soldes[compte]
+            net = d - c
+            if not net:
+                continue
+            lignes.append({
+                'JournalCode': 'PAIE', 'JournalLib': 'Journal de paie',
+                'EcritureNum': numero, 'EcritureDate': date_ecriture,
+                'CompteNum': compte, 'CompteLib': COMPTES.get(compte, ''),
+                'CompAuxNum': '', 'CompAuxLib': '',
+                'PieceRef': numero, 'PieceDate': date_ecriture,
+                'EcritureLib': libelle,
+                'Debit': fmt(net) if net > 0 else '0,00',
+                'Credit': fmt(-net) if net < 0 else '0,00',
+                'EcritureLet': '', 'DateLet': '', 'ValidDate': date_ecriture,
+                'Montantdevise': '', 'Idevise': '',
+            })
+        return lignes
+
+    def ecrire_fec(self, chemin, date_ecriture, numero='PAIE', libelle='Paie'):
+        lignes = self.ecritures_fec(date_ecriture, numero, libelle)
+        with open(chemin, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(lignes[0]) if lignes else [], delimiter='\t')
+            writer.writeheader()
+            writer.writerows(lignes)
+        return chemin
+
+    def close(self):
+        if self._col_file.closed:
+            return
+        self._vider_bloc()
+        pied = json.dumps({
+            'colonnes': COLONNES,
+            'echelles': ECHELLES,
+            'blocs': self._blocs,
+            'dictionnaires': {nom: list(codes) for nom, codes in self._dictionnaires.items()},
+        }, ensure_ascii=False).encode()
+        self._col_file.write(pied)
+        self._col_file.write(struct.pack('<Q', len(pied)))
+        self._col_file.write(MAGIC)
+        self._col_file.close()
+        self._csv_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def lire_colonnes(chemin, colonnes=None):
+    """Relit un fichier .tpcol : {colonne: liste de valeurs décodées}"""
+    with open(chemin, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC) or not data.endswith(MAGIC):
+        raise ValueError(f"{chemin} : pas un fichier .tpcol")
+    fin = len(data) - len(MAGIC)
+    (taille,) = struct.unpack('<Q', data[fin - 8:fin])
+    pied = json.loads(data[fin - 8 - taille:fin - 8])
+    echelles = pied['echelles']
+    voulues = set(colonnes or [nom for nom, _ in pied['colonnes']])
+    resultat = {nom: [] for nom, _ in pied['colonnes'] if nom in voulues}
+
+    pos = len(MAGIC)
+    for bloc in pied['blocs']:
+        for (nom, t), taille_col in zip(pied['colonnes'], bloc['tailles']):
+            if nom in voulues:
+                col = array(CODES_ARRAY[t])
+                col.frombytes(zlib.decompress(data[pos:pos + taille_col]))
+                if sys.byteorder != 'little':
+                    col.byteswap()
+                if t == 's':
+                    valeurs = pied['dictionnaires'][nom]
+                    resultat[nom].extend(valeurs[code] for code in col)
+                else:
+                    echelle = echelles[t]
+                    resultat[nom].extend(v / echelle for v in col)
+            pos += taille_col
+    return resultat
+
+
+if __name__ == '__main__':
+    import os
+    import random
+    import resource
+    import tempfile
+    import time
+
+    from cumul_annuel import iter_annee
+
+    rng = random.Random(0)
+    effectif = [{
+        'statut': rng.choice(('cadre', 'non_cadre')),
+        'mois': [{'salaire_base': round(rng.uniform(1802, 9000), 2), 'primes': rng.choice((0, 0, 800))}
+                 for _m in range(12)],
+    } for _ in range(2000)]
+
+    dossier = tempfile.mkdtemp()
+    chemin = os.path.join(dossier, 'paie-2026')
+    debut = time.perf_counter()
+    with JournalPaie(chemin) as journal:
+        for m, bulletins in iter_annee(effectif):
+            for i, bulletin in enumerate(bulletins):
+                journal.ajouter(f"2026-{m + 1:02d}", f"E{i:05d}", f"Salarié {i}", bulletin)
+        journal.ecrire_fec(chemin + '.fec.txt', '20261231')
+    duree = time.perf_counter() - debut
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    print(f"OK: {journal.bulletins} bulletins, {journal.lignes} lignes en {duree:.2f}s (RSS max {pic / 1e6:.1f} Mo)")
+    for ext in ('.csv', '.tpcol', '.fec.txt'):
+        print(f"  {chemin + ext}: {os.path.getsize(chemin + ext) / 1e6:.2f} Mo")
+    colonnes = lire_colonnes(chemin + '.tpcol', ['type', 'libelle', 'montant'])
+    net = sum(v for t, l, v in zip(colonnes['type'], colonnes['libelle'], colonnes['montant'])
+              if t == 'total' and l == 'Net à payer')
+    print(f"  relu: {len(colonnes['type'])} lignes, net à payer total {net:,.2f} €")
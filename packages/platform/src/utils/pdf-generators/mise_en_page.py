@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+============================================================
+MISE EN PAGE DES TABLEAUX — TalosPrimes
+Pagination, en-têtes répétés, tracé groupé
+============================================================
+
+Composant commun à generate_fiche_paie et generate_previsionnel :
+
+- Tableau : description d'un tableau (colonnes, lignes, catégories,
+  lignes de total, espaces), sans rien dessiner ;
+- Paginateur : suit la position verticale sur le canvas, change de page
+  (fond compris) quand un bloc ne tient plus, et place les tableaux
+  ligne par ligne en répétant l'en-tête de colonnes et la catégorie en
+  cours (« suite ») en haut de chaque nouvelle page ;
+- Lot : les rectangles et les textes d'une page sont accumulés puis
+  tracés d'un coup, un chemin par couleur de fond et un objet texte par
+  (police, taille, couleur), au lieu d'un changement d'état graphique
+  par cellule.
+
+Toutes les hauteurs sont connues à l'avance : la pagination se décide en
+une seule passe, sans rendu d'essai. Les largeurs de texte (alignement à
+droite, troncature des libellés trop longs) viennent d'une table de
+largeurs par caractère et par police, mise en cache.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# x : bord gauche (align='left') ou bord droit (align='right') de la
+# colonne, relatif au bord gauche du tableau. largeur : largeur maximale
+# du texte (None = pas de troncature)
+Colonne = namedtuple('Colonne', 'titre x align largeur')
+Colonne.__new__.__defaults__ = ('right', None)
+
+# ============================================================
+# LARGEURS DE TEXTE
+# ============================================================
+
+# police -> {caractère: largeur pour une taille de 1 pt}
+_LARGEURS_CARACTERES = {}
+
+
+@lru_cache(maxsize=16384)
+def largeur_texte(texte, police, taille):
+    """Largeur d'un texte en points (polices standard, sans crénage)"""
+    table = _LARGEURS_CARACTERES.get(police)
+    if table is None:
+        table = _LARGEURS_CARACTERES[police] = {}
+    total = 0.0
+    for ch in texte:
+        largeur = table.get(ch)
+        if largeur is None:
+            largeur = table[ch] = stringWidth(ch, police, 1)
+        total += largeur
+    return total * taille
+
+
+def ajuster(texte, largeur_max, police, taille):
+    """Tronque texte avec « … » pour qu'il tienne dans largeur_max"""
+    if largeur_max is None or largeur_texte(texte, police, taille) <= largeur_max:
+        return texte
+    while texte and largeur_texte(texte + '…', police, taille) > largeur_max:
+        texte = texte[:-1]
+    return texte.rstrip() + '…'
+
+
+# ============================================================
+# TRACÉ GROUPÉ
+# ============================================================
+
+class Lot:
+    """Primitives d'une page, tracées groupées par état graphique"""
+
+    def __init__(self):
+        self.rects = {}   # couleur -> [(x, y, largeur, hauteur)]
+        self.textes = {}  # (police, taille, couleur) -> [(x, y, texte)]
+
+    def rect(self, x, y, largeur, hauteur, couleur):
+        self.rects.setdefault(couleur, []).append((x, y, largeur, hauteur))
+
+    def texte(self, x, y, texte, police, taille, couleur, align='left'):
+        if not texte:
+            return
+        if align == 'right':
+            x -= largeur_texte(texte, police, taille)
+        self.textes.setdefault((police, taille, couleur), []).append((x, y, texte))
+
+    def tracer(self, c):
+        """Trace le lot sur le canvas : fonds d'abord, textes ensuite"""
+        for couleur, rects in self.rects.items():
+            c.setFillColor(couleur)
+            chemin = c.beginPath()
+            for x, y, largeur, hauteur in rects:
+                chemin.rect(x, y, largeur, hauteur)
+            c.drawPath(chemin, fill=1, stroke=0)
+        for (police, taille, couleur), textes in self.textes.items():
+            objet = c.beginText()
+            objet.setFont(police, taille)
+            objet.setFillColor(couleur)
+            for x, y, texte in textes:
+                objet.setTextOrigin(x, y)
+                objet.textOut(texte)
+            c.drawText(objet)
+
+    def vider(self, c):
+        """Trace le lot puis le vide"""
+        self.tracer(c)
+        self.rects = {}
+        self.textes = {}
+
+
+# ============================================================
+# TABLEAU
+# ============================================================
+
+STYLE_DEFAUT = {
+    'police': 'Helvetica',
+    'police_gras': 'Helvetica-Bold',
+    'taille': 6.5,
+    'taille_gras': 7,
+    'hauteur_ligne': 5*mm,
+    'fond_ligne': 4.5*mm,          # hauteur du fond coloré d'une ligne
+    'base_texte': 3.5*mm,          # ligne de base sous le haut de la ligne
+    'hauteur_entete': 7*mm,
+    'fond_entete': 6*mm,
+    'base_entete': 4.5*mm,
+    'taille_entete': 6,
+    'hauteur_categorie': 5*mm,
+    'fond_categorie': 4.5*mm,
+    'base_categorie': 3.5*mm,
+    'taille_categorie': 6,
+    'retrait': 3*mm,               # marge gauche du texte aligné à gauche
+    'retrait_categorie': 3*mm,
+    'couleur_texte': None,
+    'couleur_gras': None,
+    'couleur_entete': None,
+    'couleur_fond_entete': None,
+    'couleur_categorie': None,
+    'couleur_fond_categorie': None,
+}
+
+
+class Tableau:
+    """Description d'un tableau : colonnes + suite de lignes à hauteur fixe"""
+
+    def __init__(self, colonnes, largeur, **style):
+        self.colonnes = colonnes
+        self.largeur = largeur
+        self.style = {**STYLE_DEFAUT, **style}
+        self.lignes = []
+
+    def ligne(self, valeurs, couleurs=None, fond=None, gras=False):
+        self.lignes.append(('ligne', self.style['hauteur_ligne'], (valeurs, couleurs, fond, gras)))
+
+    def categorie(self, libelle):
+        self.lignes.append(('categorie', self.style['hauteur_categorie'], libelle))
+
+    def espace(self, hauteur):
+        self.lignes.append(('espace', hauteur, None))
+
+    def hauteur(self):
+        return self.style['hauteur_entete'] + sum(h for _, h, _ in self.lignes)
+
+    # ── Tracé d'une ligne dans un lot, en haut = y ──
+
+    def _x(self, x, colonne):
+        if colonne.align == 'left':
+            return x + colonne.x + self.style['retrait']
+        return x + colonne.x
+
+    def tracer_entete(self, lot, x, y):
+        s = self.style
+        lot.rect(x, y - s['fond_entete'], self.largeur, s['fond_entete'], s['couleur_fond_entete'])
+        for col in self.colonnes:
+            titre = ajuster(col.titre, col.largeur, s['police_gras'], s['taille_entete'])
+            lot.texte(self._x(x, col), y - s['base_entete'], titre,
+                      s['police_gras'], s['taille_entete'], s['couleur_entete'], col.align)
+
+    def tracer_categorie(self, lot, x, y, libelle):
+        s = self.style
+        lot.rect(x, y - s['fond_categorie'], self.largeur, s['fond_categorie'], s['couleur_fond_categorie'])
+        lot.texte(x + s['retrait_categorie'], y - s['base_categorie'], libelle.upper(),
+                  s['police_gras'], s['taille_categorie'], s['couleur_categorie'])
+
+    def tracer_ligne(self, lot, x, y, valeurs, couleurs, fond, gras):
+        s = self.style
+        if fond is not None:
+            lot.rect(x, y - s['fond_ligne'], self.largeur, s['fond_ligne'], fond)
+        police = s['police_gras'] if gras else s['police']
+        taille = s['taille_gras'] if gras else s['taille']
+        defaut = s['couleur_gras'] if gras else s['couleur_texte']
+        for i, (col, valeur) in enumerate(zip(self.colonnes, valeurs)):
+            if valeur is None or valeur == '':
+                continue
+            couleur = couleurs[i] if couleurs and i < len(couleurs) and couleurs[i] else defaut
+            texte = ajuster(str(valeur), col.largeur, police, taille)
+            lot.texte(self._x(x, col), y - s['base_texte'], texte, police, taille, couleur, col.align)
+
+
+# ============================================================
+# PAGINATION
+# ============================================================
+
+class Paginateur:
+    """Position courante sur le canvas et sauts de page.
+
+    haut : y de départ des pages de suite ; bas : limite basse du contenu.
+    fond : couleur de fond de page (None = pas de fond).
+    """
+
+    def __init__(self, c, taille_page, haut, bas, fond=None, y=None):
+        self.c = c
+        self.largeur_page, self.hauteur_page = taille_page
+        self.haut = haut
+        self.bas = bas
+        self.fond = fond
+        self.y = haut if y is None else y
+        self.pages = 1
+        self.lot = Lot()
+
+    def dessiner_fond(self):
+        if self.fond is not None:
+            self.c.setFillColor(self.fond)
+            self.c.rect(0, 0, self.largeur_page, self.hauteur_page, fill=1, stroke=0)
+
+    def vider(self):
+        self.lot.vider(self.c)
+
+    def nouvelle_page(self):
+        self.vider()
+        self.c.showPage()
+        self.pages += 1
+        self.dessiner_fond()
+        self.y = self.haut
+
+    def reserver(self, hauteur):
+        """Passe à la page suivante si hauteur ne tient plus ; retourne y"""
+        if self.y - hauteur < self.bas:
+            self.nouvelle_page()
+        return self.y
+
+    def descendre(self, hauteur):
+        self.y -= hauteur
+        return self.y
+
+    def tableau(self, tableau, x, garder_avec=0):
+        """Place le tableau à partir de y, en une passe.
+
+        garder_avec : hauteur du bloc qui suit le tableau et ne doit pas
+        se retrouver seul en haut d'une page (ex. ligne de total) ; la
+        dernière ligne passe alors avec lui sur la page suivante.
+        """
+        s = tableau.style
+        lot = self.lot
+        # En-tête + au moins une ligne sur la page courante
+        premiere = tableau.lignes[0][1] if tableau.lignes else 0
+        self.reserver(s['hauteur_entete'] + premiere)
+        tableau.tracer_entete(lot, x, self.y)
+        self.y -= s['hauteur_entete']
+
+        categorie = None
+        rang = len(tableau.lignes) - 1
+        for i, (genre, hauteur, contenu) in enumerate(tableau.lignes):
+            besoin = hauteur + (garder_avec if i == rang else 0)
+            if genre != 'espace' and self.y - besoin < self.bas:
+                self.nouvelle_page()
+                tableau.tracer_entete(lot, x, self.y)
+                self.y -= s['hauteur_entete']
+                if categorie is not None and genre != 'categorie':
+                    tableau.tracer_categorie(lot, x, self.y, f'{categorie} (suite)')
+                    self.y -= s['hauteur_categorie']
+            if genre == 'categorie':
+                categorie = contenu
+                tableau.tracer_categorie(lot, x, self.y, contenu)
+            elif genre == 'ligne':
+                tableau.tracer_ligne(lot, x, self.y, *contenu)
+            self.y -= hauteur
+        self.vider()
+        return self.y
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+============================================================
+SOLVEUR NET → BRUT — TalosPrimes
+Retrouve le brut exact (au centime) pour un net avant impôt visé
+============================================================
+
+Les cotisations salariales de get_cotisations() sont linéaires par
+morceaux en fonction du brut, avec des ruptures à PMSS, 3,5×SMIC,
+4×PMSS et 8×PMSS. Sur chaque segment :
+
+    net(brut) = brut × (1 - pente) - constante - mutuelle_salarie
+
+On précalcule (pente, constante) par segment une fois pour toutes,
+on situe chaque net visé par bisection sur les nets aux ruptures,
+on inverse la droite, puis on corrige les arrondis au centime en
+évaluant le net exact sur quelques centimes autour de la solution.
+"""
+
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+import math
+
+from fiche_paie import PMSS, SMIC, lignes_cotisations, get_cotisations
+
+# Ruptures de la structure des cotisations (fin de segment)
+RUPTURES = (PMSS, SMIC * 3.5, PMSS * 4, PMSS * 8)
+FINS = sorted(RUPTURES)
+
+# Les arrondis par ligne (≤ 0,005 € chacun) décalent le net de quelques
+# centimes au plus autour de la solution de la droite
+MARGE_CENTIMES = 12
+
+
+def _bornes_segments():
+    bornes = [0.0] + FINS
+    return [(bornes[i], bornes[i + 1] if i + 1 < len(bornes) else math.inf)
+            for i in range(len(bornes))]
+
+
+def _points_interieurs(lo, hi):
+    if hi == math.inf:
+        return lo + 1000.0, lo + 2000.0
+    return lo + (hi - lo) / 3, lo + 2 * (hi - lo) / 3
+
+
+@lru_cache(maxsize=None)
+def table_segments(statut='non_cadre'):
+    """Par segment : (brut_debut, brut_fin, lignes salariales linéarisées).
+
+    Chaque ligne salariale est (a, b, taux_sal) avec base = a × brut + b.
+    a et b sont déduits de lignes_cotisations() en deux points intérieurs,
+    puis arrondis pour retomber exactement sur les constantes du barème
+    (1, 0, PMSS, 0,9825...) : le net recalculé est identique au centime
+    à celui de get_cotisations().
+    """
+    segments = []
+    for lo, hi in _bornes_segments():
+        p1, p2 = _points_interieurs(lo, hi)
+        l1 = lignes_cotisations(p1, statut)
+        l2 = lignes_cotisations(p2, statut)
+        lignes = []
+        for (lib, base1, ts, _tp, _cat), (_lib, base2, _ts, _tp2, _cat2) in zip(l1, l2):
+            if ts == 0:
+                continue
+            a = round((base2 - base1) / (p2 - p1), 9)
+            b = round(base1 - a * p1, 6)
+            lignes.append((a, b, ts))
+        segments.append((lo, hi, tuple(lignes)))
+    return tuple(segments)
+
+
+def _cotis_sal(lignes, brut):
+    return sum(round((a * brut + b) * ts / 100, 2) for a, b, ts in lignes)
+
+
+def _droite(lignes):
+    """Net non arrondi = pente_net × brut - constante (hors mutuelle)."""
+    pente = 1 - sum(a * ts / 100 for a, b, ts in lignes)
+    constante = sum(b * ts / 100 for a, b, ts in lignes)
+    return pente, constante
+
+
+@lru_cache(maxsize=None)
+def _nets_aux_ruptures(statut):
+    """Net non arrondi au début de chaque segment (croissant)."""
+    nets = []
+    for lo, hi, lignes in table_segments(statut):
+        pente, constante = _droite(lignes)
+        nets.append(pente * lo - constante)
+    return tuple(nets)
+
+
+def net_exact(brut, statut='non_cadre', mutuelle_salarie=0):
+    """Net avant impôt au centime, identique au calcul de generate_fiche_paie."""
+    # Segment tel que debut < brut <= fin (les conditions du barème sont en `>`)
+    lignes = table_segments(statut)[bisect_left(FINS, brut)][2]
+    return round(brut - _cotis_sal(lignes, brut) - mutuelle_salarie, 2)
+
+
+def _resoudre(net_cible, statut, mutuelle_salarie):
+    idx = max(0, bisect_right(_nets_aux_ruptures(statut), net_cible + mutuelle_salarie) - 1)
+    pente, constante = _droite(table_segments(statut)[idx][2])
+    estimation = (net_cible + mutuelle_salarie + constante) / pente
+
+    # Premier centime dont le net exact atteint la cible : l'estimation est
+    # à quelques centimes près, on descend puis on monte depuis celle-ci
+    depart = max(0, round(estimation * 100))
+    centimes = depart
+    while centimes > 0 and net_exact((centimes - 1) / 100, statut, mutuelle_salarie) >= net_cible:
+        centimes -= 1
+        if depart - centimes > MARGE_CENTIMES:
+            break
+    while net_exact(centimes / 100, statut, mutuelle_salarie) < net_cible:
+        centimes += 1
+        if centimes - depart > MARGE_CENTIMES:
+            raise ValueError(f"Net {net_cible} introuvable (statut {statut})")
+    return centimes / 100
+
+
+def detail_brut(brut, statut='non_cadre', taux_at=1.13, mutuelle_salarie=0, mutuelle_employeur=0):
+    """Chiffres d'une fiche pour un brut donné, via get_cotisations()."""
+    cotisations = get_cotisations(brut, statut, taux_at)
+    total_sal = round(sum(x['montant_sal'] for x in cotisations) + mutuelle_salarie, 2)
+    total_pat = round(sum(x['montant_pat'] for x in cotisations) + mutuelle_employeur, 2)
+    return {
+        'brut': brut,
+        'net': round(brut - total_sal, 2),
+        'total_sal': total_sal,
+        'total_pat': total_pat,
+        'cout_total': round(brut + total_pat, 2),
+    }
+
+
+def bruts_depuis_nets(nets, statut='non_cadre', taux_at=1.13, mutuelle_salarie=0, mutuelle_employeur=0):
+    """Brut minimal au centime donnant chaque net avant impôt visé.
+
+    Retourne une liste alignée sur `nets` de dicts
+    {net_cible, brut, net, total_sal, total_pat, cout_total}.
+    `net` vaut net_cible, sauf quand aucun brut ne tombe pile (saut
+    d'arrondi) : c'est alors le net atteignable juste au-dessus.
+    """
+    resultats = []
+    for net_cible in nets:
+        brut = _resoudre(round(net_cible, 2), statut, mutuelle_salarie)
+        detail = detail_brut(brut, statut, taux_at, mutuelle_salarie, mutuelle_employeur)
+        detail['net_cible'] = net_cible
+        resultats.append(detail)
+    return resultats
+
+
+def brut_depuis_net(net, statut='non_cadre', taux_at=1.13, mutuelle_salarie=0, mutuelle_employeur=0):
+    return bruts_depuis_nets([net], statut, taux_at, mutuelle_salarie, mutuelle_employeur)[0]
+
+
+if __name__ == '__main__':
+    import time
+
+    for statut in ('non_cadre', 'cadre'):
+        print(f"— {statut}")
+        for r in bruts_depuis_nets([1400, 2500, 3200, 5000, 12000, 30000], statut, mutuelle_salarie=20):
+            print(f"  net {r['net_cible']:>9.2f} → brut {r['brut']:>10.2f}  (net {r['net']:.2f}, coût {r['cout_total']:.2f})")
+
+    nets = [1200 + i * 7.31 for i in range(10000)]
+    debut = time.perf_counter()
+    bruts_depuis_nets(nets, 'cadre')
+    print(f"OK: {len(nets)} nets résolus en {time.perf_counter() - debut:.3f}s")
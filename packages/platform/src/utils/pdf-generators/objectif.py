@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+============================================================
+RECHERCHE D'OBJECTIF SUR LE PRÉVISIONNEL — TalosPrimes
+« Quelle croissance pour ne jamais passer à découvert ? »
+============================================================
+
+rechercher_objectif() cherche la valeur d'un levier du plan qui atteint
+une cible, par dichotomie sur calculer_previsionnel() (aucun rendu PDF).
+
+Leviers :
+- croissance_ca   : croissance mensuelle ajoutée à toutes les sources de
+                    CA (mois i multiplié par (1 + g)^i) ;
+- montant_emprunt : montant d'un emprunt (ligne = son nom, par défaut
+                    le premier emprunt des financements) ;
+- plafond_charge  : plafond mensuel d'une ligne de charges (ligne = son
+                    nom, obligatoire).
+
+Cibles (seuil) :
+- tresorerie_min  : trésorerie minimale de l'année >= seuil ;
+- resultat_annuel : résultat annuel >= seuil ;
+- point_mort      : point mort atteint au plus tard au mois seuil.
+
+Chaque levier a un sens (plus de croissance ou d'emprunt aide, un
+plafond plus haut pèse) : on cherche la valeur la moins exigeante qui
+satisfait la cible — la plus petite croissance, le plus petit emprunt,
+le plafond le plus haut. La cible étant monotone en le levier, la
+dichotomie converge en une vingtaine d'évaluations, en moins d'une
+milliseconde sur le plan d'exemple.
+"""
+
+from previsionnel import calculer_previsionnel
+
+
+def _croissance_ca(entrees, taux, _ligne):
+    sources = {nom: [v * (1 + taux) ** i for i, v in enumerate(vals)]
+               for nom, vals in entrees['sources_ca'].items()}
+    return {**entrees, 'sources_ca': sources}
+
+
+def _montant_emprunt(entrees, montant, ligne):
+    financements = list(entrees['financements'])
+    for k, (nom, typ, _montant, taux, duree) in enumerate(financements):
+        if nom == ligne or (ligne is None and typ == 'emprunt'):
+            financements[k] = (nom, typ, montant, taux, duree)
+            return {**entrees, 'financements': financements}
+    raise ValueError(f"Emprunt introuvable : {ligne or 'aucun emprunt dans les financements'}")
+
+
+def _plafond_charge(entrees, plafond, ligne):
+    if ligne not in entrees['charges']:
+        raise ValueError(f"Ligne de charges introuvable : {ligne}")
+    charges = dict(entrees['charges'])
+    categorie, vals = charges[ligne]
+    charges[ligne] = (categorie, [min(v, plafond) for v in vals])
+    return {**entrees, 'charges': charges}
+
+
+# levier -> (application, sens, bornes par défaut, tolérance par défaut)
+# sens +1 : augmenter le levier rapproche de la cible ; -1 : l'inverse
+LEVIERS = {
+    'croissance_ca': (_croissance_ca, 1, (-0.5, 0.5), 1e-5),
+    'montant_emprunt': (_montant_emprunt, 1, (0, 1_000_000), 1),
+    'plafond_charge': (_plafond_charge, -1, None, 1),
+}
+
+CIBLES = {
+    'tresorerie_min': lambda ind, seuil: ind['tresorerie_min'] >= seuil,
+    'resultat_annuel': lambda ind, seuil: ind['resultat_annuel'] >= seuil,
+    'point_mort': lambda ind, seuil: ind['point_mort'] is not None and ind['point_mort'] <= seuil,
+}
+
+
+def indicateurs(p):
+    return {'resultat_annuel': p['resultat_annuel'], 'tresorerie_min': min(p['tresorerie']),
+            'point_mort': p['point_mort']}
+
+
+def rechercher_objectif(levier, cible, seuil=0, ligne=None, bornes=None, tolerance=None,
+                        sources_ca=None, charges=None, investissements=None, financements=None,
+                        conditions=None):
+    """Valeur du levier qui atteint la cible (voir en-tête du module).
+
+    Retourne {levier, ligne, cible, seuil, valeur, atteint, evaluations,
+    indicateurs, entrees} ; valeur None (atteint=False) si la cible est
+    hors d'atteinte même à la borne la plus favorable. indicateurs et
+    entrees (à passer à generate_previsionnel) : ceux du plan à la valeur
+    trouvée, ou à la borne favorable si la cible est hors d'atteinte.
+    """
+    if levier not in LEVIERS:
+        raise ValueError(f"Levier inconnu : {levier} (attendu : {', '.join(LEVIERS)})")
+    if cible not in CIBLES:
+        raise ValueError(f"Cible inconnue : {cible} (attendu : {', '.join(CIBLES)})")
+    appliquer, sens, bornes_defaut, tolerance_defaut = LEVIERS[levier]
+    satisfait = CIBLES[cible]
+
+    p = calculer_previsionnel(sources_ca, charges, investissements, financements, conditions)
+    base = {k: p[k] for k in ('sources_ca', 'charges', 'investissements', 'financements', 'conditions')}
+    if bornes is None:
+        bornes = bornes_defaut or (0, max(base['charges'].get(ligne, (None, [0]))[1]))
+    tolerance = tolerance or tolerance_defaut
+    evaluations = 0
+
+    def evaluer(valeur):
+        nonlocal evaluations
+        evaluations += 1
+        entrees = appliquer(base, valeur, ligne)
+        return entrees, indicateurs(calculer_previsionnel(**entrees))
+
+    # Borne « économe » (levier au plus bas de ce qu'il coûte) et borne favorable
+    econome, favorable = bornes if sens > 0 else bornes[::-1]
+    entrees, ind = evaluer(econome)
+    if not satisfait(ind, seuil):
+        entrees, ind = evaluer(favorable)
+        if not satisfait(ind, seuil):
+            valeur = None
+        else:
+            # Invariant : la cible est manquée en « econome », atteinte en « favorable »
+            while abs(favorable - econome) > tolerance:
+                milieu = (econome + favorable) / 2
+                entrees_m, ind_m = evaluer(milieu)
+                if satisfait(ind_m, seuil):
+                    favorable, entrees, ind = milieu, entrees_m, ind_m
+                else:
+                    econome = milieu
+            valeur = favorable
+    else:
+        valeur = econome
+
+    return {
+        'levier': levier,
+        'ligne': ligne,
+        'cible': cible,
+        'seuil': seuil,
+        'valeur': valeur,
+        'atteint': valeur is not None,
+        'evaluations': evaluations,
+        'indicateurs': ind,
+        'entrees': entrees,
+    }
+
+
+if __name__ == '__main__':
+    import time
+
+    questions = [
+        ('croissance_ca', 'tresorerie_min', 0, None),
+        ('croissance_ca', 'point_mort', 6, None),
+        ('montant_emprunt', 'tresorerie_min', 5000, None),
+        ('plafond_charge', 'resultat_annuel', 20000, 'Marketing & Publicité'),
+        ('plafond_charge', 'resultat_annuel', 50000, 'Marketing & Publicité'),
+    ]
+    for levier, cible, seuil, ligne in questions:
+        debut = time.perf_counter()
+        r = rechercher_objectif(levier, cible, seuil, ligne)
+        duree = (time.perf_counter() - debut) * 1000
+        valeur = 'hors d\'atteinte' if not r['atteint'] else (
+            f"{r['valeur'] * 100:+.3f} %/mois" if levier == 'croissance_ca' else f"{r['valeur']:,.0f} €")
+        comparaison = '≤' if cible == 'point_mort' else '≥'
+        print(f"{levier:<16} {cible} {comparaison} {seuil:<6} → {valeur:<20} {r['indicateurs']}  "
+              f"({r['evaluations']} évaluations, {duree:.1f} ms)")
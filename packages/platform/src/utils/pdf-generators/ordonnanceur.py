@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+============================================================
+ORDONNANCEUR DE GÉNÉRATION — TalosPrimes
+Priorités, partage équitable entre clients, files bornées
+============================================================
+
+Les campagnes de paie (des milliers de generate_fiche_paie) et les
+prévisionnels demandés à l'écran (generate_previsionnel) se partagent
+les mêmes cœurs. Avec une file unique, un utilisateur qui attend son
+prévisionnel passe derrière tous les bulletins du mois.
+
+Ordonnanceur garde les tâches dans ses propres files et n'en confie au
+pool de processus qu'autant qu'il y a de processus libres ; à chaque
+place libérée, il choisit :
+
+- classe 'interactif' d'abord, 'lot' ensuite (priorité stricte) : une
+  demande interactive n'attend que la fin de la tâche en cours la plus
+  proche de se terminer ;
+- dans une classe, les clients (locataires) à tour de rôle, une tâche
+  chacun : un client qui soumet 10 000 bulletins ne retarde pas celui
+  qui en soumet 50 ;
+- sans travail interactif, les tâches de lot occupent tous les
+  processus (reserve_interactive > 0 garde des processus libres pour
+  l'interactif, au prix de cœurs inoccupés).
+
+Les files sont bornées (par classe, et par locataire si demandé) :
+au-delà, soumettre() lève FileSaturee, ou attend qu'une place se libère
+(bloquant=True, pour un producteur de campagne).
+
+metriques() donne, par classe, les compteurs et les temps d'attente et
+d'exécution (médiane, 95e centile, maximum) des dernières tâches.
+
+Usage :
+    with Ordonnanceur() as o:
+        futur = o.soumettre(generate_previsionnel, {'output_path': ...}, 'client-42', 'interactif')
+        ...
+        futur.result()
+"""
+
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+import math
+import os
+import threading
+import time
+
+CLASSES = ('interactif', 'lot')
+CAPACITES = {'interactif': 256, 'lot': 20000}
+ECHANTILLONS = 10000  # temps conservés par classe pour les centiles
+
+
+class FileSaturee(Exception):
+    """File d'attente pleine : tâche refusée"""
+
+
+def _executer(generateur, kwargs):
+    debut = time.perf_counter()
+    resultat = generateur(**kwargs)
+    return resultat, time.perf_counter() - debut
+
+
+def _centiles(valeurs):
+    if not valeurs:
+        return None
+    valeurs = sorted(valeurs)
+
+    def centile(p):
+        return valeurs[max(math.ceil(p * len(valeurs)) - 1, 0)]
+
+    return {'p50': centile(0.50), 'p95': centile(0.95), 'max': valeurs[-1]}
+
+
+class _Tache:
+    __slots__ = ('generateur', 'kwargs', 'locataire', 'classe', 'futur', 'soumise')
+
+    def __init__(self, generateur, kwargs, locataire, classe):
+        self.generateur = generateur
+        self.kwargs = kwargs
+        self.locataire = locataire
+        self.classe = classe
+        self.futur = Future()
+        self.soumise = time.perf_counter()
+
+
+class Ordonnanceur:
+    """Pool de processus de génération avec classes de priorité.
+
+    capacites : taille maximale de la file de chaque classe ;
+    par_locataire : taille maximale de la file d'un locataire dans une
+    classe (None = pas de limite propre).
+    """
+
+    def __init__(self, processus=None, capacites=None, par_locataire=None, reserve_interactive=0):
+        self.processus = processus or os.cpu_count() or 1
+        if not 0 <= reserve_interactive < self.processus:
+            raise ValueError(f"reserve_interactive doit être entre 0 et {self.processus - 1}")
+        self.capacites = {**CAPACITES, **(capacites or {})}
+        self.par_locataire = par_locataire
+        self.reserve_interactive = reserve_interactive
+        # classe -> {locataire: deque de tâches}, dans l'ordre du tour de rôle
+        self._files = {classe: OrderedDict() for classe in CLASSES}
+        self._en_attente = {classe: 0 for classe in CLASSES}
+        self._en_cours = {classe: 0 for classe in CLASSES}
+        self._compteurs = {classe: {'soumises': 0, 'refusees': 0, 'terminees': 0, 'echecs': 0, 'annulees': 0}
+                           for classe in CLASSES}
+        self._attente = {classe: deque(maxlen=ECHANTILLONS) for classe in CLASSES}
+        self._execution = {classe: deque(maxlen=ECHANTILLONS) for classe in CLASSES}
+        self._condition = threading.Condition()
+        self._ferme = False
+        self._pool = ProcessPoolExecutor(self.processus)
+        self._repartiteur = threading.Thread(target=self._repartir, name='ordonnanceur', daemon=True)
+        self._repartiteur.start()
+
+    # ── Soumission ──
+
+    def soumettre(self, generateur, kwargs, locataire, classe='lot', bloquant=False):
+        """Met generateur(**kwargs) en file ; retourne un Future.
+
+        generateur doit être une fonction de module (envoyée aux
+        processus). FileSaturee si la file est pleine, sauf bloquant=True
+        (on attend alors qu'une place se libère).
+        """
+        if classe not in CLASSES:
+            raise ValueError(f"Classe inconnue : {classe} (attendu : {', '.join(CLASSES)})")
+        tache = _Tache(generateur, kwargs, locataire, classe)
+        with self._condition:
+            while True:
+                if self._ferme:
+                    raise RuntimeError("Ordonnanceur fermé")
+                motif = self._saturation(classe, locataire)
+                if motif is None:
+                    break
+                if not bloquant:
+                    self._compteurs[classe]['refusees'] += 1
+                    raise FileSaturee(motif)
+                self._condition.wait()
+            self._files[classe].setdefault(locataire, deque()).append(tache)
+            self._en_attente[classe] += 1
+            self._compteurs[classe]['soumises'] += 1
+            self._condition.notify_all()
+        return tache.futur
+
+    def _saturation(self, classe, locataire):
+        if self._en_attente[classe] >= self.capacites[classe]:
+            return f"File {classe} pleine ({self.capacites[classe]} tâches)"
+        file = self._files[classe].get(locataire)
+        if self.par_locataire is not None and file is not None and len(file) >= self.par_locataire:
+            return f"File {classe} de {locataire} pleine ({self.par_locataire} tâches)"
+        return None
+
+    # ── Répartition ──
+
+    def _prochaine(self):
+        """Tâche à lancer sur un processus libre, ou None"""
+        occupes = sum(self._en_cours.values())
+        for classe in CLASSES:
+            if not self._en_attente[classe]:
+                continue
+            if classe == 'lot' and occupes >= self.processus - self.reserve_interactive:
+                return None
+            files = self._files[classe]
+            locataire, file = next(iter(files.items()))
+            tache = file.popleft()
+            if file:
+                files.move_to_end(locataire)
+            else:
+                del files[locataire]
+            self._en_attente[classe] -= 1
+            return tache
+        return None
+
+    def _repartir(self):
+        with self._condition:
+            while True:
+                tache = None
+                while sum(self._en_cours.values()) < self.processus:
+                    tache = self._prochaine()
+                    if tache is None or tache.futur.set_running_or_notify_cancel():
+                        break
+                    self._compteurs[tache.classe]['annulees'] += 1
+                    tache = None
+                if tache is None:
+                    if self._ferme and not any(self._en_attente.values()):
+                        return
+                    self._condition.wait()
+                    continue
+                self._en_cours[tache.classe] += 1
+                self._attente[tache.classe].append(time.perf_counter() - tache.soumise)
+                futur = self._pool.submit(_executer, tache.generateur, tache.kwargs)
+                futur.add_done_callback(lambda f, tache=tache: self._terminee(tache, f))
+                self._condition.notify_all()  # places libérées pour les soumissions bloquantes
+
+    def _terminee(self, tache, futur):
+        erreur = futur.exception()
+        with self._condition:
+            self._en_cours[tache.classe] -= 1
+            if erreur is None:
+                resultat, duree = futur.result()
+                self._compteurs[tache.classe]['terminees'] += 1
+                self._execution[tache.classe].append(duree)
+            else:
+                self._compteurs[tache.classe]['echecs'] += 1
+            self._condition.notify_all()
+        if erreur is None:
+            tache.futur.set_result(resultat)
+        else:
+            tache.futur.set_exception(erreur)
+
+    # ── Suivi et arrêt ──
+
+    def metriques(self):
+        """Par classe : compteurs, tâches en file et en cours, temps
+        d'attente et d'exécution en secondes ({p50, p95, max})"""
+        with self._condition:
+            return {
+                classe: {
+                    **self._compteurs[classe],
+                    'en_attente': self._en_attente[classe],
+                    'en_cours': self._en_cours[classe],
+                    'locataires_en_attente': len(self._files[classe]),
+                    'attente': _centiles(self._attente[classe]),
+                    'execution': _centiles(self._execution[classe]),
+                }
+                for classe in CLASSES
+            }
+
+    def fermer(self, attendre=True):
+        """Refuse les nouvelles tâches ; attendre=True termine celles en
+        file, sinon elles sont annulées"""
+        with self._condition:
+            self._ferme = True
+            if not attendre:
+                for classe in CLASSES:
+                    for file in self._files[classe].values():
+                        for tache in file:
+                            tache.futur.cancel()
+                            self._compteurs[classe]['annulees'] += 1
+                    self._files[classe].clear()
+                    self._en_attente[classe] = 0
+            self._condition.notify_all()
+        self._repartiteur.join()
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+if __name__ == '__main__':
+    import sys
+    import tempfile
+
+    from fiche_paie import generate_fiche_paie
+    from previsionnel import generate_previsionnel
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    processus = os.cpu_count()
+
+    def scenario(dossier, locataire_interactif, classe_interactive):
+        """n bulletins de 3 clients en lot, puis un prévisionnel à l'écran toutes les 50 ms"""
+        with Ordonnanceur(processus) as o:
+            debut = time.perf_counter()
+            futurs = []
+            for i in range(n):
+                locataire = f'client-{i % 3}' if i < n * 2 // 3 else 'client-0'
+                futurs.append(o.soumettre(generate_fiche_paie, {
+                    'output_path': os.path.join(dossier, f'bulletin-{i}.pdf'), 'sidecar': False,
+                    'employe_nom': f'Salarié {i}'}, locataire))
+            latences = []
+            for k in range(10):
+                time.sleep(0.05)
+                futur = o.soumettre(generate_previsionnel, {
+                    'output_path': os.path.join(dossier, f'previsionnel-{k}.pdf'), 'sidecar': False},
+                    locataire_interactif, classe_interactive)
+                futur.add_done_callback(lambda _f, soumis=time.perf_counter():
+                                        latences.append(time.perf_counter() - soumis))
+            for futur in futurs:
+                futur.result()
+            return latences, time.perf_counter() - debut, o.metriques()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        for libelle, locataire, classe in (('file unique (FIFO)', 'client-0', 'lot'),
+                                           ('tour de rôle clients', 'client-9', 'lot'),
+                                           ('priorité interactive', 'client-9', 'interactif')):
+            latences, total, m = scenario(dossier, locataire, classe)
+            c = _centiles(latences)
+            print(f"{libelle:<22} : prévisionnel à l'écran p50 {c['p50'] * 1000:.0f} ms, p95 {c['p95'] * 1000:.0f} ms ; "
+                  f"{n} bulletins en {total:.2f} s ({processus} processus)")
+        lot = m['lot']
+        print(f"  lot : attente p95 {lot['attente']['p95']:.2f} s, exécution p50 {lot['execution']['p50'] * 1000:.1f} ms, "
+              f"{lot['terminees']} terminées, {lot['refusees']} refusées")
+
+        # Files bornées : au plus 3 tâches en file par client, le surplus est refusé
+        with Ordonnanceur(1, par_locataire=3) as o:
+            for i in range(10):
+                try:
+                    o.soumettre(generate_fiche_paie, {'output_path': os.path.join(dossier, f'b-{i}.pdf'),
+                                                      'sidecar': False}, 'client-0')
+                except FileSaturee as e:
+                    motif = str(e)
+            lot = o.metriques()['lot']
+        print(f"  par_locataire=3 : {lot['soumises']} acceptées, {lot['refusees']} refusées ({motif})")
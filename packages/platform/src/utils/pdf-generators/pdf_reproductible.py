@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+============================================================
+PDF REPRODUCTIBLES — TalosPrimes
+Mêmes entrées → mêmes octets, et rendu évité si rien n'a changé
+============================================================
+
+Par défaut ReportLab écrit la date de création et un identifiant de
+document tiré de l'heure : deux rendus du même bulletin diffèrent.
+
+En mode reproductible (reproductible=True dans generate_fiche_paie /
+generate_previsionnel) :
+- le canvas est créé en mode invariant de ReportLab (dates fixes,
+  pas de commentaires variables) ;
+- l'identifiant /ID du PDF est dérivé de l'empreinte des entrées du
+  générateur : deux documents différents n'ont jamais le même ID ;
+- l'ordre des objets ne dépend que de la séquence de tracé, elle-même
+  déterministe.
+
+generer_si_change() s'appuie dessus pour ne rien réécrire (ni
+re-téléverser) quand un document est identique à la version déjà sur
+disque : l'empreinte des entrées est notée dans <pdf>.empreinte, et le
+rendu est sauté tant qu'elle ne change pas.
+"""
+
+from functools import lru_cache
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+from reportlab.pdfgen import canvas
+
+from apercu_html import CanvasSvg
+from archive_pdf import CanvasArchive
+from donnees_json import chemin_sidecar, droits_fichier
+
+GENERATEURS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@lru_cache(maxsize=1)
+def empreinte_code():
+    """Empreinte des sources des générateurs : un changement de gabarit
+    invalide les documents déjà produits."""
+    h = hashlib.sha256()
+    for nom in sorted(os.listdir(GENERATEURS_DIR)):
+        if nom.endswith('.py'):
+            with open(os.path.join(GENERATEURS_DIR, nom), 'rb') as f:
+                h.update(nom.encode() + b'\0' + f.read())
+    return h.hexdigest()
+
+
+def empreinte_entrees(nom_generateur, entrees):
+    """SHA-256 des entrées d'un générateur (hors chemin de sortie)"""
+    donnees = {k: v for k, v in entrees.items() if k not in ('output_path', 'reproductible', 'sidecar', 'apercu', 'chiffrement')}
+    texte = json.dumps([nom_generateur, donnees], sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha256(texte.encode()).hexdigest()
+
+
+def _empreinte_sortie(kwargs):
+    """Options qui changent le fichier produit sans entrer dans l'/ID :
+    aperçu HTML et chiffrement (mots de passe, force, permissions)"""
+    chiffrement = kwargs.get('chiffrement')
+    if chiffrement is not None:
+        chiffrement = [chiffrement.revision, chiffrement.userPassword, chiffrement.ownerPassword,
+                       chiffrement.permissionBits()]
+    texte = json.dumps([bool(kwargs.get('apercu')), chiffrement], ensure_ascii=False, default=repr)
+    return hashlib.sha256(texte.encode()).hexdigest()
+
+
+def empreinte_document(generateur, kwargs):
+    """Empreinte d'un rendu : code des générateurs, entrées de l'appel et
+    options de sortie"""
+    return hashlib.sha256(
+        (empreinte_code() + empreinte_entrees(generateur.__name__, kwargs) + _empreinte_sortie(kwargs)).encode()
+    ).hexdigest()
+
+
+def nouveau_canvas(output_path, pagesize, empreinte=None, apercu=False, chiffrement=None, archive=False):
+    """Canvas ReportLab ; reproductible dès qu'une empreinte est fournie.
+
+    apercu=True : CanvasSvg (apercu_html.py), même API, sortie HTML/SVG.
+    chiffrement : StandardEncryption (ex. chiffrement_paie.py) ou None.
+    archive=True : PDF compact pour la conservation (archive_pdf.py).
+    """
+    if apercu:
+        return CanvasSvg(output_path, pagesize)
+    if archive and chiffrement is not None:
+        raise ValueError("Profil d'archive incompatible avec le chiffrement")
+    classe = CanvasArchive if archive else canvas.Canvas
+    if empreinte is None:
+        c = classe(output_path, pagesize=pagesize)
+    else:
+        c = classe(output_path, pagesize=pagesize, invariant=1)
+        # L'ID du document est un condensé de sa signature : y injecter
+        # l'empreinte des entrées le rend propre à ce document
+        c._doc.updateSignature(empreinte)
+    if chiffrement is not None:
+        c.setEncrypt(chiffrement)
+    c.setCreator('TalosPrimes SaaS')
+    return c
+
+
+def _ecrire_atomique(chemin, data):
+    dossier = os.path.dirname(os.path.abspath(chemin))
+    fd, tmp = tempfile.mkstemp(dir=dossier, prefix='.tmp-')
+    droits_fichier(fd, chemin)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, chemin)
+
+
+def generer_si_change(generateur, output_path, **kwargs):
+    """Appelle generateur(output_path, reproductible=True, **kwargs) si besoin.
+
+    Retourne {chemin, empreinte_entrees, sha256, modifie} :
+    - modifie=False : entrées (et code) inchangés depuis le dernier rendu,
+      le fichier existant est conservé sans rien recalculer ;
+    - modifie=True : le PDF a été rendu et (ré)écrit.
+    """
+    empreinte = empreinte_document(generateur, kwargs)
+    chemin_empreinte = output_path + '.empreinte'
+
+    sidecar = chemin_sidecar(output_path, kwargs.get('sidecar'))
+    try:
+        with open(chemin_empreinte) as f:
+            precedente, sha_precedent = f.read().split()
+        # JSON demandé mais absent : rendu (le PDF, identique, n'est pas réécrit)
+        if precedente == empreinte and os.path.exists(output_path) and (sidecar is None or os.path.exists(sidecar)):
+            return {'chemin': output_path, 'empreinte_entrees': empreinte,
+                    'sha256': sha_precedent, 'modifie': False}
+    except (OSError, ValueError):
+        pass
+
+    tampon = io.BytesIO()
+    if sidecar is not None:
+        kwargs['sidecar'] = sidecar  # le rendu part dans un tampon
+    generateur(tampon, reproductible=True, **kwargs)
+    data = tampon.getvalue()
+    sha = hashlib.sha256(data).hexdigest()
+
+    modifie = True
+    if os.path.exists(output_path):
+        with open(output_path, 'rb') as f:
+            modifie = hashlib.sha256(f.read()).hexdigest() != sha
+    if modifie:
+        _ecrire_atomique(output_path, data)
+    _ecrire_atomique(chemin_empreinte, f"{empreinte} {sha}\n".encode())
+    return {'chemin': output_path, 'empreinte_entrees': empreinte, 'sha256': sha, 'modifie': modifie}
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+============================================================
+CONSOLIDATION DE PORTEFEUILLE — TalosPrimes
+Vue agrégée des prévisionnels de tous les clients
+============================================================
+
+consolider() prend les entrées de nombreux prévisionnels (une entreprise
+cliente chacun) et calcule :
+- CA, résultat et trésorerie cumulés du portefeuille, mois par mois ;
+- le nombre de clients à découvert chaque mois, et le mois où chacun
+  passe à découvert pour la première fois ;
+- la répartition des points morts ;
+- une ligne de synthèse par client.
+
+Chaque plan n'est agrégé qu'une fois (agreger_previsionnel) ; tous les
+clients sont ensuite projetés ensemble par projeter_lot() (clients ×
+mois), le noyau de calculer_previsionnel(). 1 000 clients se consolident
+en quelques dizaines de millisecondes.
+
+generate_portefeuille() en fait un rapport PDF de synthèse, avec son
+JSON compagnon (donnees_portefeuille).
+"""
+
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+
+from charte import (
+    AMBER, DARK_BG, GREEN, HEADER_BG, PURPLE, RED, ROW_ALT, TEXT_GRAY, TEXT_LIGHT, TEXT_WHITE,
+    bandeau, entete_section, fmt, fmt_full, fond_page, tuiles,
+)
+from donnees_json import chemin_sidecar, document, ecrire_json
+from mise_en_page import Colonne, Paginateur, Tableau
+from pdf_reproductible import empreinte_entrees, nouveau_canvas
+from previsionnel import MOIS, STYLE_TABLEAU, agreger_previsionnel, projeter_lot, tableau_mensuel
+
+
+def _mediane(valeurs):
+    valeurs = sorted(valeurs)
+    if not valeurs:
+        return None
+    milieu = len(valeurs) // 2
+    return valeurs[milieu] if len(valeurs) % 2 else (valeurs[milieu - 1] + valeurs[milieu]) / 2
+
+
+def consolider(plans):
+    """plans : liste de dicts {nom, sources_ca, charges, investissements,
+    financements, conditions} (mêmes entrées que generate_previsionnel).
+    Une clé absente vaut « aucun » : jamais les données d'exemple de
+    generate_previsionnel, qui fausseraient les totaux.
+
+    Retourne les agrégats du portefeuille et la synthèse par client
+    (voir l'en-tête du module).
+    """
+    agregats = [agreger_previsionnel(plan.get('sources_ca') or {}, plan.get('charges') or {},
+                                     plan.get('investissements') or [], plan.get('financements') or [],
+                                     plan.get('conditions'))
+                for plan in plans]
+    projection = projeter_lot(
+        [a['groupes_ca'] for a in agregats],
+        [a['groupes_charges'] for a in agregats],
+        [a['amort_mensuel'] for a in agregats],
+        [a['rembours_mensuel'] for a in agregats],
+        [a['solde_initial'] for a in agregats],
+    )
+    tresoreries = projection['tresorerie']
+
+    clients = []
+    clients_negatifs = [0] * 12
+    premiers_decouverts = [0] * 12
+    points_morts = [0] * 12
+    for plan, a, resultat, tresorerie, point_mort in zip(
+            plans, agregats, projection['resultat_annuel'], tresoreries, projection['point_mort']):
+        premier = None
+        for i, solde in enumerate(tresorerie):
+            if solde < 0:
+                clients_negatifs[i] += 1
+                if premier is None:
+                    premier = i + 1
+        if premier is not None:
+            premiers_decouverts[premier - 1] += 1
+        if point_mort is not None:
+            points_morts[point_mort - 1] += 1
+        clients.append({
+            'nom': plan.get('nom', ''),
+            'ca_annuel': a['ca_annuel'],
+            'resultat_annuel': resultat,
+            'tresorerie_min': min(tresorerie),
+            'tresorerie_fin': tresorerie[-1],
+            'premier_mois_negatif': premier,
+            'point_mort': point_mort,
+        })
+
+    n = len(clients)
+    return {
+        'clients': n,
+        'ca_mensuel': [sum(a['ca_mensuel'][i] for a in agregats) for i in range(12)],
+        'ca_annuel': sum(a['ca_annuel'] for a in agregats),
+        'resultat_mensuel': [sum(r[i] for r in projection['resultat_mensuel']) for i in range(12)],
+        'resultat_annuel': sum(projection['resultat_annuel']),
+        'tresorerie': [sum(t[i] for t in tresoreries) for i in range(12)],
+        'clients_negatifs': clients_negatifs,
+        'premiers_decouverts': premiers_decouverts,
+        'clients_decouvert': sum(premiers_decouverts),
+        'clients_rentables': sum(1 for c in clients if c['resultat_annuel'] > 0),
+        'points_morts': points_morts,
+        'point_mort_non_atteint': n - sum(points_morts),
+        'point_mort_median': _mediane([c['point_mort'] for c in clients if c['point_mort'] is not None]),
+        'par_client': clients,
+    }
+
+
+def donnees_portefeuille(consolidation, nom_portefeuille='Portefeuille clients', annee=2026):
+    """Document JSON d'une consolidation (voir donnees_json.py)"""
+    return document('portefeuille', portefeuille=nom_portefeuille, annee=annee, mois=MOIS, **consolidation)
+
+
+def generate_portefeuille(
+    output_path,
+    plans,
+    nom_portefeuille='Portefeuille clients',
+    annee=2026,
+    # Nombre de clients listés dans « Clients les plus exposés »
+    exposes=40,
+    reproductible=False,
+    sidecar=False,
+    apercu=False,
+):
+    empreinte = empreinte_entrees('generate_portefeuille', locals()) if reproductible else None
+    cons = consolider(plans)
+    n = cons['clients']
+
+    w, h = landscape(A4)
+    c = nouveau_canvas(output_path, landscape(A4), empreinte, apercu)
+    c.setTitle(f"Consolidation {annee} - {nom_portefeuille}")
+    c.setAuthor('TalosPrimes SaaS')
+
+    fond_page(c, landscape(A4))
+
+    ml = 12*mm
+    mr = w - 12*mm
+    cw = mr - ml
+    y = h - 15*mm
+
+    # ── EN-TÊTE ──
+    bandeau(c, ml, y, cw, 22*mm, nom_portefeuille,
+            [f'{n} prévisionnels clients — Exercice {annee}', 'Document généré automatiquement par TalosPrimes SaaS'],
+            'CONSOLIDATION DU PORTEFEUILLE', str(annee))
+    y -= 26*mm
+
+    # ── KPIs ──
+    mediane = cons['point_mort_median']
+    kpis = [
+        ('Clients', str(n), TEXT_WHITE),
+        ('CA Annuel HT cumulé', fmt_full(cons['ca_annuel']), TEXT_WHITE),
+        ('Résultat cumulé', fmt_full(cons['resultat_annuel']), GREEN if cons['resultat_annuel'] >= 0 else RED),
+        ('Clients rentables', f"{cons['clients_rentables']} / {n}", GREEN),
+        ('Clients à découvert', f"{cons['clients_decouvert']} / {n}", RED if cons['clients_decouvert'] else GREEN),
+        ('Point mort médian', f'Mois {mediane:g}'.replace('.', ',') if mediane else 'Non atteint', PURPLE),
+    ]
+    tuiles(c, ml, y, cw, kpis)
+    y -= 20*mm
+
+    page = Paginateur(c, landscape(A4), haut=h - 15*mm, bas=10*mm, fond=DARK_BG, y=y)
+
+    # ── VUE MENSUELLE ──
+    page.reserver(8*mm + 6*mm + 5*mm)
+    page.y = entete_section(c, ml, page.y, cw, "VUE CONSOLIDÉE MENSUELLE", GREEN)
+    tableau = tableau_mensuel(cw)
+    ca = cons['ca_mensuel']
+    tableau.ligne(['CA HT cumulé'] + [fmt(v) for v in ca] + [fmt(cons['ca_annuel'])],
+                  [TEXT_LIGHT] + [GREEN]*13, fond=ROW_ALT)
+    res = cons['resultat_mensuel']
+    tableau.ligne(['Résultat cumulé'] + [fmt(v) for v in res] + [fmt(cons['resultat_annuel'])],
+                  [TEXT_LIGHT] + [GREEN if v >= 0 else RED for v in res]
+                  + [GREEN if cons['resultat_annuel'] >= 0 else RED])
+    tres = cons['tresorerie']
+    tableau.ligne(['Trésorerie cumulée'] + [fmt(v) for v in tres] + [''],
+                  [TEXT_LIGHT] + [GREEN if v >= 0 else RED for v in tres], fond=ROW_ALT)
+    tableau.espace(2*mm)
+    tableau.ligne(['Clients à découvert'] + [str(v) for v in cons['clients_negatifs']] + [''],
+                  [RED] + [RED if v else TEXT_GRAY for v in cons['clients_negatifs']],
+                  fond=HEADER_BG, gras=True)
+    tableau.ligne(['dont premier découvert'] + [str(v) for v in cons['premiers_decouverts']]
+                  + [str(cons['clients_decouvert'])],
+                  [TEXT_LIGHT] + [AMBER if v else TEXT_GRAY for v in cons['premiers_decouverts']] + [AMBER])
+    page.tableau(tableau, ml)
+    page.descendre(6*mm)
+
+    # ── RÉPARTITION DES POINTS MORTS ──
+    hauteur_histo = 45*mm
+    y = page.reserver(8*mm + hauteur_histo + 8*mm)
+    y = entete_section(c, ml, y, cw, "RÉPARTITION DES POINTS MORTS", PURPLE)
+    lot = page.lot
+    comptes = cons['points_morts'] + [cons['point_mort_non_atteint']]
+    libelles = MOIS + ['Non atteint']
+    pas = cw / len(comptes)
+    plus_grand = max(comptes + [1])
+    base = y - hauteur_histo
+    lot.rect(ml, base, cw, hauteur_histo, HEADER_BG)
+    for i, (compte, libelle) in enumerate(zip(comptes, libelles)):
+        bx = ml + i * pas + pas * 0.2
+        hauteur = (hauteur_histo - 12*mm) * compte / plus_grand
+        couleur = RED if i == 12 else PURPLE
+        if compte:
+            lot.rect(bx, base + 6*mm, pas * 0.6, hauteur, couleur)
+        lot.texte(bx, base + 8*mm + hauteur, str(compte), 'Helvetica-Bold', 6.5, TEXT_WHITE)
+        lot.texte(bx, base + 2*mm, libelle, 'Helvetica', 6, TEXT_GRAY)
+    page.vider()
+    page.y = base - 6*mm
+
+    # ── CLIENTS LES PLUS EXPOSÉS ──
+    if exposes:
+        y = page.reserver(8*mm + 6*mm + 5*mm)
+        page.y = entete_section(
+            c, ml, y, cw, f"CLIENTS LES PLUS EXPOSÉS — {min(exposes, n)} TRÉSORERIES MINIMALES LES PLUS BASSES", RED)
+        colonnes = [
+            Colonne('Client', 0, 'left', 85*mm),
+            Colonne('CA annuel HT', 120*mm),
+            Colonne('Résultat annuel', 155*mm),
+            Colonne('Trésorerie min', 190*mm),
+            Colonne('Trésorerie fin', 222*mm),
+            Colonne('1er découvert', 248*mm),
+            Colonne('Point mort', cw - 2*mm),
+        ]
+        tableau = Tableau(colonnes, cw, **STYLE_TABLEAU)
+        for k, client in enumerate(sorted(cons['par_client'], key=lambda cl: cl['tresorerie_min'])[:exposes]):
+            premier, pm = client['premier_mois_negatif'], client['point_mort']
+            tableau.ligne(
+                [client['nom'], fmt_full(client['ca_annuel']), fmt_full(client['resultat_annuel']),
+                 fmt_full(client['tresorerie_min']), fmt_full(client['tresorerie_fin']),
+                 MOIS[premier - 1] if premier else '—', MOIS[pm - 1] if pm else 'Non atteint'],
+                [TEXT_LIGHT, TEXT_WHITE, GREEN if client['resultat_annuel'] >= 0 else RED,
+                 GREEN if client['tresorerie_min'] >= 0 else RED, GREEN if client['tresorerie_fin'] >= 0 else RED,
+                 AMBER, PURPLE],
+                fond=ROW_ALT if k % 2 == 0 else None,
+            )
+        page.tableau(tableau, ml)
+
+    # ── MENTION ──
+    y = page.reserver(10*mm) - 4*mm
+    c.setFillColor(TEXT_GRAY)
+    c.setFont('Helvetica', 5.5)
+    c.drawString(ml + 3*mm, y, "Consolidation des prévisionnels fournis par les clients, à titre indicatif.")
+    c.drawString(ml + 3*mm, y - 4*mm, f"Généré par TalosPrimes SaaS — {nom_portefeuille} — Exercice {annee}")
+
+    c.save()
+    chemin_json = chemin_sidecar(output_path, sidecar)
+    if chemin_json:
+        ecrire_json(chemin_json, donnees_portefeuille(cons, nom_portefeuille, annee))
+    return output_path
+
+
+if __name__ == '__main__':
+    import io
+    import random
+    import sys
+    import time
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = random.Random(0)
+    plans = []
+    for k in range(n):
+        depart, croissance = rng.uniform(2000, 20000), rng.uniform(-0.02, 0.08)
+        plans.append({
+            'nom': f'Client {k:04d}',
+            'sources_ca': {'Ventes': [round(depart * (1 + croissance) ** i) for i in range(12)]},
+            'charges': {
+                'Loyer': ('fixe', [round(depart * rng.uniform(0.1, 0.3))] * 12),
+                'Achats': ('variable', [round(depart * rng.uniform(0.2, 0.5) * (1 + croissance) ** i)
+                                        for i in range(12)]),
+                'Salaires': ('personnel', [round(depart * rng.uniform(0.3, 0.7))] * 12),
+            },
+            'investissements': [('Équipement', round(rng.uniform(0, 40000)), 5)],
+            'financements': [('Apport', 'apport', round(rng.uniform(0, 20000)), 0, 0),
+                             ('Prêt', 'emprunt', round(rng.uniform(0, 50000)), 4.5, 60)],
+        })
+
+    debut = time.perf_counter()
+    cons = consolider(plans)
+    t_calcul = time.perf_counter() - debut
+    debut = time.perf_counter()
+    generate_portefeuille(io.BytesIO(), plans, sidecar=False)
+    t_total = time.perf_counter() - debut
+    print(f"OK: {n} prévisionnels consolidés en {t_calcul * 1000:.0f} ms, rapport PDF en {t_total * 1000:.0f} ms "
+          f"— {cons['clients_decouvert']} clients à découvert, point mort médian {cons['point_mort_median']}")
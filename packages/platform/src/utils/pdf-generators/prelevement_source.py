@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+============================================================
+PRÉLÈVEMENT À LA SOURCE (PAS) — TalosPrimes
+Taux personnalisés DGFiP + grilles de taux neutre 2025
+============================================================
+
+Le PAS s'applique au net imposable du mois :
+- avec le taux personnalisé transmis par la DGFiP (retour CRM de la DSN)
+  quand il est connu, y compris 0 % ;
+- sinon avec le taux neutre de la grille mensuelle de la zone
+  (métropole, Guadeloupe/Martinique/Réunion, Guyane/Mayotte).
+
+Chaque grille est rangée en deux tableaux triés : les seuils (borne
+basse de chaque tranche, en € de base mensuelle) et les taux. Le taux
+neutre d'une base est TAUX[bisect_right(SEUILS, base)] : une recherche
+dichotomique sur 20 valeurs, sans boucle sur les tranches.
+"""
+
+from bisect import bisect_right
+
+# Grilles mensuelles 2025 : (seuils, taux en %), len(taux) == len(seuils) + 1
+GRILLES = {
+    'metropole': (
+        (1620, 1683, 1791, 1911, 2042, 2151, 2294, 2714, 3107, 3539,
+         3983, 4648, 5574, 6974, 8711, 12091, 16376, 25706, 55062),
+        (0, 0.5, 1.3, 2.1, 2.9, 3.5, 4.1, 5.3, 7.5, 9.9,
+         11.9, 13.8, 15.8, 17.9, 20, 24, 28, 33, 38, 43),
+    ),
+    'antilles_reunion': (
+        (1917, 2027, 2224, 2476, 2671, 2835, 3024, 3385, 3759, 4187,
+         4642, 5225, 6342, 7982, 10146, 13565, 18260, 28399, 59520),
+        (0, 0.5, 1.3, 2.1, 2.9, 3.5, 4.1, 5.3, 7.5, 9.9,
+         11.9, 13.8, 15.8, 17.9, 20, 24, 28, 33, 38, 43),
+    ),
+    'guyane_mayotte': (
+        (2100, 2318, 2536, 2803, 3024, 3284, 3532, 3892, 4382, 4872,
+         5432, 6118, 7296, 9082, 11444, 15208, 20387, 31568, 65164),
+        (0, 0.5, 1.3, 2.1, 2.9, 3.5, 4.1, 5.3, 7.5, 9.9,
+         11.9, 13.8, 15.8, 17.9, 20, 24, 28, 33, 38, 43),
+    ),
+}
+
+ZONES = tuple(GRILLES)
+
+
+def taux_neutre(base, zone='metropole'):
+    """Taux neutre (%) pour une base mensuelle"""
+    seuils, taux = GRILLES[zone]
+    return taux[bisect_right(seuils, base)]
+
+
+def taux_prelevement(base, taux_personnalise=None, zone='metropole'):
+    """Taux applicable (%) : personnalisé s'il est connu, sinon neutre"""
+    if taux_personnalise is not None:
+        return taux_personnalise
+    return taux_neutre(base, zone)
+
+
+def montant_prelevement(base, taux):
+    """Montant retenu, jamais négatif (base imposable négative → 0)"""
+    return round(max(base, 0) * taux / 100, 2)
+
+
+def taux_lot(bases, taux_personnalises=None, zones=None):
+    """Taux applicables pour tout un lot de bulletins.
+
+    bases, taux_personnalises, zones : listes alignées (les deux dernières
+    peuvent être None ; un taux None ou une zone None = valeur par défaut).
+    Les bisections se font grille par grille, sur des tableaux locaux.
+    """
+    n = len(bases)
+    taux_personnalises = taux_personnalises or [None] * n
+    zones = zones or [None] * n
+    grilles = {z: GRILLES[z] for z in set(zones) - {None}}
+    grilles[None] = GRILLES['metropole']
+    resultat = []
+    for base, perso, zone in zip(bases, taux_personnalises, zones):
+        if perso is not None:
+            resultat.append(perso)
+        else:
+            seuils, taux = grilles[zone]
+            resultat.append(taux[bisect_right(seuils, base)])
+    return resultat
+
+
+def appliquer_pas(bulletins, taux_personnalises=None, zones=None):
+    """(Re)calcule le PAS de bulletins déjà calculés par calculer_bulletin().
+
+    Utile quand les taux DGFiP arrivent après le calcul de la paie : les
+    cotisations ne changent pas, seuls le PAS et le net à payer bougent.
+    Modifie les bulletins sur place et les retourne.
+    """
+    taux = taux_lot([b['net_imposable'] for b in bulletins], taux_personnalises, zones)
+    for bulletin, t in zip(bulletins, taux):
+        montant = montant_prelevement(bulletin['net_imposable'], t)
+        bulletin['net_a_payer'] = round(bulletin['net_a_payer'] + bulletin['montant_pas'] - montant, 2)
+        bulletin['taux_pas'] = t
+        bulletin['montant_pas'] = montant
+    return bulletins
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    for zone in ZONES:
+        print(f"— {zone}: " + ', '.join(f"{b} € → {taux_neutre(b, zone)} %" for b in (1500, 2500, 4000, 9000, 60000)))
+
+    rng = random.Random(0)
+    bases = [rng.uniform(1200, 20000) for _ in range(200000)]
+    zones = [rng.choice(ZONES) for _ in bases]
+    perso = [None if rng.random() < 0.3 else round(rng.uniform(0, 20), 1) for _ in bases]
+    debut = time.perf_counter()
+    taux = taux_lot(bases, perso, zones)
+    montants = [montant_prelevement(b, t) for b, t in zip(bases, taux)]
+    print(f"OK: {len(bases)} bulletins en {time.perf_counter() - debut:.3f}s (PAS total {sum(montants):,.0f} €)")
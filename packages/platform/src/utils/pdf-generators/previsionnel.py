@@ -8,102 +8,216 @@ Business Plan complet sur 12 mois
 
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.units import mm
-from reportlab.lib.colors import HexColor
-from reportlab.pdfgen import canvas
+from collections import namedtuple
+from itertools import accumulate
 import os
 
-# ============================================================
-# COULEURS
-# ============================================================
-DARK_BG = HexColor('#1a1a2e')
-ACCENT = HexColor('#e67e22')
-ACCENT_LIGHT = HexColor('#f39c12')
-HEADER_BG = HexColor('#16213e')
-ROW_ALT = HexColor('#1a1a3e')
-TEXT_WHITE = HexColor('#ffffff')
-TEXT_GRAY = HexColor('#94a3b8')
-TEXT_LIGHT = HexColor('#cbd5e1')
-GREEN = HexColor('#22c55e')
-GREEN_DARK = HexColor('#166534')
-RED = HexColor('#ef4444')
-RED_DARK = HexColor('#7f1d1d')
-BLUE = HexColor('#3b82f6')
-PURPLE = HexColor('#a855f7')
-AMBER = HexColor('#f59e0b')
+from charte import (
+    ACCENT, ACCENT_LIGHT, AMBER, BLUE, DARK_BG, GREEN, GREEN_DARK, HEADER_BG, PURPLE, RED, RED_DARK,
+    ROW_ALT, STYLE_TABLEAU_SOMBRE, SURFACE, TEXT_GRAY, TEXT_LIGHT, TEXT_WHITE,
+    bandeau, cadre, entete_section, fmt, fmt_full, fond_page, tuiles,
+)
+from donnees_json import chemin_sidecar, document, ecrire_json
+from graphiques import barres_empilees, courbes
+from mise_en_page import Colonne, Tableau, Paginateur, ajuster
+from pdf_reproductible import empreinte_entrees, nouveau_canvas
 
 MOIS = ['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Jun', 'Jul', 'Aoû', 'Sep', 'Oct', 'Nov', 'Déc']
 
 
-def fmt(val):
-    """Format nombre en K€ ou €"""
-    if abs(val) >= 1000:
-        return f"{val/1000:,.1f}K€".replace(',', ' ').replace('.', ',')
-    return f"{val:,.0f}€".replace(',', ' ')
-
-
-def fmt_full(val):
-    return f"{val:,.0f} €".replace(',', ' ')
-
-
-def draw_section_header(c, x, y, w, title, color=ACCENT):
-    c.setFillColor(HEADER_BG)
-    c.roundRect(x, y - 7*mm, w, 7*mm, 3, fill=1, stroke=0)
-    c.setFillColor(color)
-    c.setFont('Helvetica-Bold', 9)
-    c.drawString(x + 4*mm, y - 5.5*mm, title)
-    return y - 8*mm
-
-
-def draw_table_header(c, x, y, col_positions, headers, w):
-    c.setFillColor(HexColor('#1e293b'))
-    c.rect(x, y - 5*mm, w, 5*mm, fill=1, stroke=0)
-    c.setFillColor(ACCENT_LIGHT)
-    c.setFont('Helvetica-Bold', 5.5)
-    for i, (pos, header) in enumerate(zip(col_positions, headers)):
-        if i == 0:
-            c.drawString(x + pos + 2*mm, y - 4*mm, header)
-        else:
-            c.drawRightString(x + pos, y - 4*mm, header)
-    return y - 6*mm
-
-
-def draw_data_row(c, x, y, col_positions, values, w, bold=False, colors=None, bg=None):
-    if bg:
-        c.setFillColor(bg)
-        c.rect(x, y - 4.5*mm, w, 4.5*mm, fill=1, stroke=0)
-
-    font = 'Helvetica-Bold' if bold else 'Helvetica'
-    c.setFont(font, 6 if not bold else 6.5)
-
-    for i, (pos, val) in enumerate(zip(col_positions, values)):
-        color = TEXT_LIGHT
-        if colors and i < len(colors) and colors[i]:
-            color = colors[i]
-        elif bold:
-            color = TEXT_WHITE
-        c.setFillColor(color)
-
-        if i == 0:
-            c.drawString(x + pos + 2*mm, y - 3.5*mm, str(val))
-        else:
-            c.drawRightString(x + pos, y - 3.5*mm, str(val))
-    return y - 5*mm
+STYLE_TABLEAU = {
+    **STYLE_TABLEAU_SOMBRE,
+    'taille': 6,
+    'taille_gras': 6.5,
+    'hauteur_entete': 6*mm,
+    'fond_entete': 5*mm,
+    'base_entete': 4*mm,
+    'taille_entete': 5.5,
+    'hauteur_categorie': 4.5*mm,
+    'fond_categorie': 4*mm,
+    'base_categorie': 3*mm,
+    'taille_categorie': 5.5,
+    'retrait': 2*mm,
+    'couleur_gras': TEXT_WHITE,
+}
+
+
+def tableau_mensuel(cw):
+    """Tableau Libellé + 12 mois + Total sur la largeur utile cw"""
+    col_w_label = 55*mm
+    col_w_mois = (cw - col_w_label - 25*mm) / 12
+    colonnes = [Colonne('Poste', 0, 'left', col_w_label - 4*mm)]
+    for i in range(12):
+        colonnes.append(Colonne(MOIS[i], col_w_label + (i + 1) * col_w_mois))
+    colonnes.append(Colonne('Total', cw - 2*mm))
+    return Tableau(colonnes, cw, **STYLE_TABLEAU)
 
 
-def generate_previsionnel(
-    output_path,
-    nom_entreprise='TalosPrimes SaaS',
-    nom_projet='Prévisionnel Financier',
-    annee=2026,
-    # CA par source : {nom: [12 mois]}
-    sources_ca=None,
-    # Charges : {nom: (categorie, [12 mois])}
-    charges=None,
-    # Investissements : [(nom, montant_ht, amort_annees)]
-    investissements=None,
-    # Financements : [(nom, type, montant, taux, duree_mois)]
-    financements=None,
-):
+# ============================================================
+# CONDITIONS DE TVA ET DE PAIEMENT PAR LIGNE
+# ============================================================
+# tva : taux ; regime : 'mensuel' (TVA du mois reversée le mois suivant),
+# 'trimestriel' (TVA du trimestre reversée le mois qui suit sa fin),
+# 'franchise' (hors TVA : rien de collecté ni de déductible) ;
+# delai : délai de paiement en jours (mois de 30 jours)
+Conditions = namedtuple('Conditions', 'tva regime delai')
+CONDITIONS_CA = Conditions(0.20, 'mensuel', 0)
+CONDITIONS_CHARGES = Conditions(0.12, 'mensuel', 0)  # taux moyen : lignes à 20 %, 10 %, 5,5 % et hors TVA
+REGIMES_TVA = ('mensuel', 'trimestriel', 'franchise')
+
+
+def conditions_ligne(conditions, nom, defaut):
+    """Conditions de la ligne nom : conditions[nom] (dict partiel ou
+    Conditions) complété par defaut"""
+    valeur = (conditions or {}).get(nom)
+    if valeur is None:
+        return defaut
+    if isinstance(valeur, Conditions):
+        cond = valeur
+    else:
+        if not valeur.keys() <= set(Conditions._fields):
+            inconnus = sorted(set(valeur) - set(Conditions._fields))
+            raise ValueError(f"Conditions inconnues pour {nom} : {', '.join(inconnus)} "
+                             f"(attendu : {', '.join(Conditions._fields)})")
+        cond = Conditions(valeur.get('tva', defaut.tva), valeur.get('regime', defaut.regime),
+                          valeur.get('delai', defaut.delai))
+    if cond.regime not in REGIMES_TVA:
+        raise ValueError(f"Régime de TVA inconnu pour {nom} : {cond.regime} (attendu : {', '.join(REGIMES_TVA)})")
+    if not isinstance(cond.delai, int) or isinstance(cond.delai, bool) or cond.delai < 0:
+        raise ValueError(f"Délai de paiement invalide pour {nom} : {cond.delai!r} (nombre entier de jours, 0 ou plus)")
+    return cond
+
+
+def verifier_lignes(conditions, noms):
+    """ValueError si conditions vise une ligne absente du plan : une faute
+    de frappe ramènerait sinon la ligne aux conditions par défaut"""
+    inconnues = sorted(set(conditions or {}) - set(noms))
+    if inconnues:
+        raise ValueError(f"Conditions pour des lignes absentes du plan : {', '.join(inconnues)}")
+
+
+def regrouper(lignes, conditions):
+    """{nom: [12 mois]} -> {Conditions: [12 mois]}, une somme par jeu de conditions"""
+    groupes = {}
+    for nom, vals in lignes.items():
+        cond = conditions[nom]
+        somme = groupes.get(cond)
+        groupes[cond] = list(vals) if somme is None else [a + b for a, b in zip(somme, vals)]
+    return groupes
+
+
+def retarder(valeurs, jours):
+    """Valeurs mensuelles décalées d'un délai de paiement (à 45 jours :
+    moitié à M+1, moitié à M+2). Ce qui tombe après décembre sort de
+    l'exercice."""
+    if not jours:
+        return valeurs
+    mois, reste = divmod(jours, 30)
+    if mois >= 12:
+        return [0] * 12
+    decale = [0] * mois + list(valeurs[:12 - mois])
+    if not reste:
+        return decale
+    part = reste / 30
+    return [a * (1 - part) + b * part for a, b in zip(decale, [0] + decale[:11])]
+
+
+def reversements_tva(nette, regime):
+    """TVA reversée chaque mois (arrondie) à partir de la TVA nette née
+    chaque mois ; celle de décembre (ou du 4e trimestre) part sur
+    l'exercice suivant"""
+    if regime == 'mensuel':
+        return [0] + [round(v) for v in nette[:11]]
+    if regime == 'trimestriel':
+        reverse = [0] * 12
+        for debut in (0, 3, 6):
+            reverse[debut + 3] = round(sum(nette[debut:debut + 3]))
+        return reverse
+    return [0] * 12
+
+
+def amortissement_mensuel(investissements):
+    """Dotation mensuelle (non arrondie) : linéaire sur la durée en années"""
+    mensuel = 0
+    for _nom, montant, duree in investissements:
+        mensuel += montant / (duree * 12)
+    return mensuel
+
+
+def remboursement_mensuel(financements):
+    """Échéance mensuelle (non arrondie) des emprunts : capital + intérêts"""
+    mensuel = 0
+    for _nom, typ, montant, taux, duree in financements:
+        if typ == 'emprunt' and duree > 0:
+            mensuel += montant / duree + (montant * taux / 100) / 12
+    return mensuel
+
+
+def _sommer(tableaux):
+    total = None
+    for valeurs in tableaux:
+        total = list(valeurs) if total is None else [a + b for a, b in zip(total, valeurs)]
+    return [0] * 12 if total is None else total
+
+
+def _ttc(cond, vals):
+    """Flux TTC d'un groupe, aux dates de paiement"""
+    taux = 0 if cond.regime == 'franchise' else cond.tva
+    return retarder([v * (1 + taux) for v in vals], cond.delai)
+
+
+def projeter_lot(ca, charges, amort, rembours, solde_initial):
+    """Résultat, TVA, trésorerie et point mort de plusieurs plans à la fois.
+
+    ca, charges : par plan, lignes regroupées par conditions
+    ({Conditions: [12 mois HT]}, voir regrouper()) ; amort : 12 mois par
+    plan ; rembours, solde_initial (financements - investissements TTC) :
+    une valeur par plan.
+
+    Chaque flux est un tableau de 12 mois : encaissements et décaissements
+    TTC décalés du délai de paiement de leur groupe, TVA nette reversée
+    selon son régime ; la trésorerie est la somme cumulée des flux. Le
+    coût dépend du nombre de groupes de conditions, pas du nombre de
+    lignes. Retourne un dict de listes alignées sur les plans :
+    resultat_mensuel, resultat_annuel, tva_mensuelle (TVA nette née dans
+    le mois), tva_payee, encaissements, decaissements, tresorerie,
+    point_mort.
+    """
+    sortie = {cle: [] for cle in ('resultat_mensuel', 'resultat_annuel', 'tva_mensuelle', 'tva_payee',
+                                  'encaissements', 'decaissements', 'tresorerie', 'point_mort')}
+    for ca_k, ch_k, amort_k, rembours_k, solde_k in zip(ca, charges, amort, rembours, solde_initial):
+        resultat = [c - h - a for c, h, a in zip(_sommer(ca_k.values()), _sommer(ch_k.values()), amort_k)]
+
+        # TVA nette née chaque mois, par régime
+        nette = {}
+        for groupes, signe in ((ca_k, 1), (ch_k, -1)):
+            for cond, vals in groupes.items():
+                if cond.regime != 'franchise':
+                    n = nette.get(cond.regime, [0] * 12)
+                    nette[cond.regime] = [a + signe * v * cond.tva for a, v in zip(n, vals)]
+        tva = [round(v) for v in _sommer(nette.values())]
+        tva_payee = _sommer(reversements_tva(n, regime) for regime, n in nette.items())
+
+        encaissements = _sommer(_ttc(cond, vals) for cond, vals in ca_k.items())
+        decaissements = _sommer(_ttc(cond, vals) for cond, vals in ch_k.items())
+        flux = [e - d - t - rembours_k for e, d, t in zip(encaissements, decaissements, tva_payee)]
+        tresorerie = [round(v) for v in accumulate(flux, initial=solde_k)][1:]
+        point_mort = next((i + 1 for i, cumul in enumerate(accumulate(resultat)) if cumul > 0), None)
+
+        for cle, valeur in (('resultat_mensuel', resultat), ('resultat_annuel', sum(resultat)),
+                            ('tva_mensuelle', tva), ('tva_payee', tva_payee),
+                            ('encaissements', encaissements), ('decaissements', decaissements),
+                            ('tresorerie', tresorerie), ('point_mort', point_mort)):
+            sortie[cle].append(valeur)
+    return sortie
+
+
+def agreger_previsionnel(sources_ca=None, charges=None, investissements=None, financements=None,
+                         conditions=None):
+    """Entrées du plan (données d'exemple si None) et leurs agrégats :
+    CA et charges par mois et par groupe de conditions, dotations,
+    échéances, totaux. C'est tout ce dont projeter_lot() a besoin.
+    """
     # Données par défaut
     if sources_ca is None:
         sources_ca = {
@@ -136,15 +250,20 @@ def generate_previsionnel(
     # ============================================================
     # CALCULS
     # ============================================================
+    # Conditions de TVA et de paiement, résolues ligne par ligne ; les
+    # lignes sont sommées par groupe de conditions
+    verifier_lignes(conditions, [*sources_ca, *charges])
+    conditions_lignes = {nom: conditions_ligne(conditions, nom, CONDITIONS_CA) for nom in sources_ca}
+    conditions_lignes.update({nom: conditions_ligne(conditions, nom, CONDITIONS_CHARGES) for nom in charges})
+    groupes_ca = regrouper(sources_ca, conditions_lignes)
+    groupes_charges = regrouper({nom: vals for nom, (_cat, vals) in charges.items()}, conditions_lignes)
+
     # CA
-    ca_mensuel = [0]*12
-    for vals in sources_ca.values():
-        for i in range(12):
-            ca_mensuel[i] += vals[i]
+    ca_mensuel = _sommer(groupes_ca.values())
     ca_annuel = sum(ca_mensuel)
 
     # Charges par catégorie
-    charges_mensuelles = [0]*12
+    charges_mensuelles = _sommer(groupes_charges.values())
     charges_fixes_annuel = 0
     charges_variables_annuel = 0
     charges_personnel_annuel = 0
@@ -153,71 +272,288 @@ def generate_previsionnel(
         if cat == 'fixe': charges_fixes_annuel += total
         elif cat == 'variable': charges_variables_annuel += total
         elif cat == 'personnel': charges_personnel_annuel += total
-        for i in range(12):
-            charges_mensuelles[i] += vals[i]
     charges_annuelles = sum(charges_mensuelles)
 
     # Amortissements
-    amort_mensuel = [0]*12
-    total_invest = 0
-    for nom, montant, duree in investissements:
-        total_invest += montant
-        mensuel = montant / (duree * 12)
-        for i in range(12):
-            amort_mensuel[i] += mensuel
-    amort_mensuel = [round(v) for v in amort_mensuel]
+    total_invest = sum(montant for _nom, montant, _duree in investissements)
+    amort_mensuel = [round(amortissement_mensuel(investissements))] * 12
 
     # Remboursements emprunts
-    rembours_mensuel = 0
-    total_financement = 0
-    for nom, typ, montant, taux, duree in financements:
-        total_financement += montant
-        if typ == 'emprunt' and duree > 0:
-            rembours_mensuel += montant / duree + (montant * taux / 100) / 12
-    rembours_mensuel = round(rembours_mensuel)
-
-    # Résultat d'exploitation
-    resultat_mensuel = [ca_mensuel[i] - charges_mensuelles[i] - amort_mensuel[i] for i in range(12)]
-    resultat_annuel = sum(resultat_mensuel)
-
-    # TVA
-    tva_mensuelle = [round(ca_mensuel[i] * 0.20 - charges_mensuelles[i] * 0.12) for i in range(12)]
-
-    # Trésorerie
-    tresorerie = []
-    solde = total_financement - total_invest * 1.20
-    for i in range(12):
-        enc = ca_mensuel[i] * 1.20
-        dec = charges_mensuelles[i] * 1.12
-        tva = tva_mensuelle[i - 1] if i > 0 else 0
-        solde += enc - dec - tva - rembours_mensuel
-        tresorerie.append(round(solde))
+    total_financement = sum(montant for _nom, _typ, montant, _taux, _duree in financements)
+    rembours_mensuel = round(remboursement_mensuel(financements))
+
+    return {
+        'sources_ca': sources_ca,
+        'charges': charges,
+        'investissements': investissements,
+        'financements': financements,
+        'conditions': conditions_lignes,
+        'groupes_ca': groupes_ca,
+        'groupes_charges': groupes_charges,
+        'ca_mensuel': ca_mensuel,
+        'ca_annuel': ca_annuel,
+        'charges_mensuelles': charges_mensuelles,
+        'charges_annuelles': charges_annuelles,
+        'charges_fixes_annuel': charges_fixes_annuel,
+        'charges_variables_annuel': charges_variables_annuel,
+        'charges_personnel_annuel': charges_personnel_annuel,
+        'amort_mensuel': amort_mensuel,
+        'total_invest': total_invest,
+        'rembours_mensuel': rembours_mensuel,
+        'total_financement': total_financement,
+        'solde_initial': total_financement - total_invest * 1.20,
+    }
+
+
+def calculer_previsionnel(sources_ca=None, charges=None, investissements=None, financements=None,
+                          conditions=None):
+    """Tous les chiffres du prévisionnel (sans rendu PDF).
+
+    Mêmes entrées que generate_previsionnel ; None = données d'exemple.
+    """
+    p = agreger_previsionnel(sources_ca, charges, investissements, financements, conditions)
+    ca_annuel = p['ca_annuel']
+
+    # Résultat, TVA, trésorerie, point mort
+    projection = projeter_lot([p['groupes_ca']], [p['groupes_charges']], [p['amort_mensuel']],
+                              [p['rembours_mensuel']], [p['solde_initial']])
+    resultat_mensuel, = projection['resultat_mensuel']
+    resultat_annuel, = projection['resultat_annuel']
+    tva_mensuelle, = projection['tva_mensuelle']
+    tva_payee, = projection['tva_payee']
+    tresorerie, = projection['tresorerie']
+    point_mort, = projection['point_mort']
 
     # Seuil de rentabilité
-    charges_fixes_total = charges_fixes_annuel + charges_personnel_annuel
-    taux_marge = (ca_annuel - charges_variables_annuel) / ca_annuel if ca_annuel > 0 else 0
+    charges_fixes_total = p['charges_fixes_annuel'] + p['charges_personnel_annuel']
+    taux_marge = (ca_annuel - p['charges_variables_annuel']) / ca_annuel if ca_annuel > 0 else 0
     seuil_rentabilite = round(charges_fixes_total / taux_marge) if taux_marge > 0 else 0
 
-    # Point mort
-    point_mort = None
-    cumul = 0
-    for i in range(12):
-        cumul += resultat_mensuel[i]
-        if cumul > 0:
-            point_mort = i + 1
-            break
+    # Flux TTC du plan de trésorerie, aux dates de paiement
+    encaissements = [round(v) for v in projection['encaissements'][0]]
+    decaissements = [round(v) for v in projection['decaissements'][0]]
+
+    return {
+        **p,
+        'resultat_mensuel': resultat_mensuel,
+        'resultat_annuel': resultat_annuel,
+        'tva_mensuelle': tva_mensuelle,
+        'tva_payee': tva_payee,
+        'encaissements': encaissements,
+        'decaissements': decaissements,
+        'tresorerie': tresorerie,
+        'seuil_rentabilite': seuil_rentabilite,
+        'point_mort': point_mort,
+    }
+
+
+def dessiner_tornade(page, x, largeur, analyse):
+    """Diagramme tornade de analyse_sensibilite(), à partir de page.y.
+
+    Une ligne par poste, du plus influent au moins influent : barres du
+    résultat annuel autour de la valeur de base (bleu : poste à -x %,
+    orange : +x %), puis trésorerie minimale et point mort des deux
+    scénarios.
+    """
+    c, lot = page.c, page.lot
+    base = analyse['base']
+    pct = f"{analyse['variation'] * 100:g} %"
+    postes = analyse['postes']
+    h_ligne = 6.5*mm
+    x_graphe = x + 62*mm
+    l_graphe = largeur - 62*mm - 80*mm
+    centre = x_graphe + l_graphe / 2
+    x_tres_bas = x + largeur - 52*mm
+    x_tres_haut = x + largeur - 26*mm
+    x_pm = x + largeur - 2*mm
+    ecart_max = max([abs(poste[cote]['resultat_annuel'] - base['resultat_annuel'])
+                     for poste in postes for cote in ('bas', 'haut')] + [1])
+    echelle = (l_graphe / 2 - 14*mm) / ecart_max
+
+    def point_mort(valeur):
+        return MOIS[valeur - 1] if valeur else '—'
+
+    def entete():
+        y = page.y
+        lot.rect(x, y - 5*mm, largeur, 5*mm, SURFACE)
+        for texte, tx, align in (('Poste', x + 2*mm, 'left'),
+                                 (f'Résultat annuel  (−{pct} / +{pct})', centre + 25*mm, 'right'),
+                                 (f'Tréso min −{pct}', x_tres_bas, 'right'),
+                                 (f'Tréso min +{pct}', x_tres_haut, 'right'),
+                                 ('Point mort − / +', x_pm, 'right')):
+            lot.texte(tx, y - 3.5*mm, texte, 'Helvetica-Bold', 5.5, ACCENT_LIGHT, align)
+        page.descendre(6*mm)
+
+    page.y = entete_section(c, x, page.y, largeur, f"ANALYSE DE SENSIBILITÉ — CHAQUE POSTE À ±{pct}", ACCENT)
+    c.setFillColor(TEXT_GRAY)
+    c.setFont('Helvetica', 7)
+    c.drawString(x + 4*mm, page.y - 4*mm,
+                 f"Plan de base : résultat annuel {fmt_full(base['resultat_annuel'])} — trésorerie minimale "
+                 f"{fmt_full(base['tresorerie_min'])} — point mort : "
+                 f"{point_mort(base['point_mort']) if base['point_mort'] else 'non atteint'}")
+    page.descendre(8*mm)
+    entete()
+
+    for i, poste in enumerate(postes):
+        if page.y - h_ligne < page.bas:
+            page.nouvelle_page()
+            entete()
+        y = page.y
+        if i % 2 == 0:
+            lot.rect(x, y - h_ligne + 1*mm, largeur, h_ligne - 1*mm, ROW_ALT)
+        lot.texte(x + 2*mm, y - 4*mm, ajuster(poste['libelle'], 58*mm, 'Helvetica', 6.5),
+                  'Helvetica', 6.5, TEXT_LIGHT)
+        # Barres : la plus longue d'abord, pour que la plus courte reste visible
+        barres = sorted(((poste[cote]['resultat_annuel'] - base['resultat_annuel'], couleur)
+                         for cote, couleur in (('bas', BLUE), ('haut', ACCENT))),
+                        key=lambda b: -abs(b[0]))
+        for ecart, couleur in barres:
+            if ecart:
+                bx = centre + min(ecart, 0) * echelle
+                lot.rect(bx, y - 5*mm, abs(ecart) * echelle, 3.5*mm, couleur)
+        valeurs = [poste[cote]['resultat_annuel'] for cote in ('bas', 'haut')]
+        if min(valeurs) < base['resultat_annuel']:
+            gauche = centre + (min(valeurs) - base['resultat_annuel']) * echelle
+            lot.texte(gauche - 1*mm, y - 4*mm, fmt(min(valeurs)), 'Helvetica', 5.5, TEXT_GRAY, 'right')
+        if max(valeurs) > base['resultat_annuel']:
+            droite = centre + (max(valeurs) - base['resultat_annuel']) * echelle
+            lot.texte(droite + 1*mm, y - 4*mm, fmt(max(valeurs)), 'Helvetica', 5.5, TEXT_GRAY)
+        for cote, tx in (('bas', x_tres_bas), ('haut', x_tres_haut)):
+            valeur = poste[cote]['tresorerie_min']
+            lot.texte(tx, y - 4*mm, fmt(valeur), 'Helvetica-Bold', 6.5, GREEN if valeur >= 0 else RED, 'right')
+        lot.texte(x_pm, y - 4*mm, f"{point_mort(poste['bas']['point_mort'])} / {point_mort(poste['haut']['point_mort'])}",
+                  'Helvetica', 6.5, PURPLE, 'right')
+        # Axe du plan de base
+        lot.rect(centre - 0.2*mm, y - h_ligne, 0.4*mm, h_ligne, TEXT_GRAY)
+        page.descendre(h_ligne)
+
+    # Légende
+    page.reserver(6*mm)
+    y = page.y - 4*mm
+    for k, (couleur, texte) in enumerate(((BLUE, f'Poste à −{pct}'), (ACCENT, f'Poste à +{pct}'))):
+        lx = x_graphe + k * 30*mm
+        lot.rect(lx, y, 3*mm, 2.5*mm, couleur)
+        lot.texte(lx + 4.5*mm, y + 0.3*mm, texte, 'Helvetica', 6, TEXT_GRAY)
+    page.descendre(6*mm)
+    page.vider()
+
+
+def dessiner_ecarts(page, x, largeur, ecarts):
+    """Page prévu / réalisé de ecarts_previsionnel() (realise.py), à partir de page.y.
+
+    Écarts par poste sur les mois clos, puis trésorerie prévue contre
+    trésorerie réelle (mois clos) et révisée (mois restants).
+    """
+    c = page.c
+    m = ecarts['mois_clos']
+    periode = f"{MOIS[0]} → {MOIS[m - 1]}" if m else 'aucun mois clos'
+    page.y = entete_section(c, x, page.y, largeur, f"PRÉVU / RÉALISÉ — {periode.upper()}", PURPLE)
+    c.setFillColor(TEXT_GRAY)
+    c.setFont('Helvetica', 7)
+    c.drawString(x + 4*mm, page.y - 4*mm,
+                 f"{ecarts['operations']} opérations bancaires — hors postes du plan : {fmt_full(ecarts['non_affecte'])} — "
+                 f"résultat annuel révisé {fmt_full(ecarts['resultat_annuel_revise'])} — trésorerie minimale révisée "
+                 f"{fmt_full(ecarts['tresorerie_min_revisee'])}")
+    page.descendre(8*mm)
+
+    colonnes = [Colonne('Poste (HT)', 0, 'left', 76*mm), Colonne('Prévu', largeur - 122*mm),
+                Colonne('Réalisé', largeur - 82*mm), Colonne('Écart', largeur - 42*mm),
+                Colonne('Écart %', largeur - 2*mm)]
+    tableau = Tableau(colonnes, largeur, **STYLE_TABLEAU)
+
+    def ligne(libelle, e, sens, fond=None, gras=False):
+        # sens : +1 si un réalisé supérieur au prévu est favorable (CA), -1 sinon
+        couleur = TEXT_LIGHT if not e['ecart'] else (GREEN if e['ecart'] * sens > 0 else RED)
+        pct = f"{e['ecart_pct']:+.1f} %" if e['ecart_pct'] is not None else '—'
+        tableau.ligne([libelle, fmt_full(e['prevu']), fmt_full(e['realise']), fmt_full(e['ecart']), pct],
+                      [None, TEXT_GRAY, None, couleur, couleur], fond=fond, gras=gras)
+
+    for famille, titre, total, libelle_total, sens in (('ca', "Chiffre d'affaires", 'ca', 'TOTAL CA HT', 1),
+                                                      ('charge', 'Charges', 'charges', 'TOTAL CHARGES', -1)):
+        tableau.categorie(titre)
+        for k, poste in enumerate(p for p in ecarts['postes'] if p['famille'] == famille):
+            ligne(poste['libelle'], poste, sens, fond=ROW_ALT if k % 2 == 0 else None)
+        ligne(libelle_total, ecarts[total], sens, fond=HEADER_BG, gras=True)
+        tableau.espace(2*mm)
+    ligne("RÉSULTAT D'EXPLOITATION", ecarts['resultat'], 1, fond=HEADER_BG, gras=True)
+    page.tableau(tableau, x)
+    page.descendre(6*mm)
+
+    # Trésorerie : réel sur les mois clos, révisé ensuite
+    prevue, revisee = ecarts['tresorerie_prevue'], ecarts['tresorerie_revisee']
+    tableau = tableau_mensuel(largeur)
+    tableau.ligne(['Trésorerie prévue'] + [fmt(v) for v in prevue] + [''],
+                  [TEXT_LIGHT] + [TEXT_GRAY] * 12, fond=ROW_ALT)
+    tableau.ligne(['Trésorerie réelle puis révisée'] + [fmt(v) for v in revisee] + [''],
+                  [TEXT_WHITE] + [(GREEN if v >= 0 else RED) if i < m else BLUE for i, v in enumerate(revisee)],
+                  gras=True)
+    ecart = [r - v for r, v in zip(revisee, prevue)]
+    tableau.ligne(['Écart'] + [fmt(v) for v in ecart] + [''],
+                  [TEXT_LIGHT] + [GREEN if v >= 0 else RED for v in ecart], fond=ROW_ALT)
+    page.y = entete_section(c, x, page.reserver(8*mm + tableau.hauteur()), largeur,
+                                 "TRÉSORERIE — RÉEL (MOIS CLOS) PUIS RÉVISÉE À PARTIR DU SOLDE BANCAIRE", BLUE)
+    page.tableau(tableau, x)
+    page.descendre(4*mm)
+    page.vider()
+
+
+def generate_previsionnel(
+    output_path,
+    nom_entreprise='TalosPrimes SaaS',
+    nom_projet='Prévisionnel Financier',
+    annee=2026,
+    # CA par source : {nom: [12 mois]}
+    sources_ca=None,
+    # Charges : {nom: (categorie, [12 mois])}
+    charges=None,
+    # Investissements : [(nom, montant_ht, amort_annees)]
+    investissements=None,
+    # Financements : [(nom, type, montant, taux, duree_mois)]
+    financements=None,
+    # TVA et paiement par ligne de CA ou de charges :
+    # {nom: {'tva': 0.055, 'regime': 'trimestriel', 'delai': 60}} ; par défaut
+    # CONDITIONS_CA / CONDITIONS_CHARGES (TVA mensuelle, paiement comptant)
+    conditions=None,
+    # Mêmes entrées → PDF identique à l'octet près (pdf_reproductible.py)
+    reproductible=False,
+    # Chiffres calculés en JSON à côté du PDF (True), à un chemin donné, ou non
+    sidecar=False,
+    # Page HTML/SVG de prévisualisation au lieu du PDF (apercu_html.py)
+    apercu=False,
+    # Résultat de analyse_sensibilite() (sensibilite.py) : page « tornade »
+    sensibilite=None,
+    # Page de graphiques vectoriels (graphiques.py), sur demande : sans elle
+    # le document est celui d'avant l'ajout de la page
+    graphiques=False,
+    # Résultat de ecarts_previsionnel() (realise.py) : page prévu / réalisé
+    realise=None,
+    # PDF compact pour la conservation (archive_pdf.py)
+    archive=False,
+):
+    empreinte = empreinte_entrees('generate_previsionnel', locals()) if reproductible else None
+
+    p = calculer_previsionnel(sources_ca, charges, investissements, financements, conditions)
+    sources_ca, charges = p['sources_ca'], p['charges']
+    investissements, financements = p['investissements'], p['financements']
+    ca_mensuel, ca_annuel = p['ca_mensuel'], p['ca_annuel']
+    charges_mensuelles, charges_annuelles = p['charges_mensuelles'], p['charges_annuelles']
+    charges_variables_annuel = p['charges_variables_annuel']
+    charges_personnel_annuel = p['charges_personnel_annuel']
+    amort_mensuel, total_invest = p['amort_mensuel'], p['total_invest']
+    rembours_mensuel, total_financement = p['rembours_mensuel'], p['total_financement']
+    resultat_mensuel, resultat_annuel = p['resultat_mensuel'], p['resultat_annuel']
+    tva_payee, tresorerie = p['tva_payee'], p['tresorerie']
+    seuil_rentabilite, point_mort = p['seuil_rentabilite'], p['point_mort']
 
     # ============================================================
     # PDF — PAYSAGE A4
     # ============================================================
     w, h = landscape(A4)
-    c = canvas.Canvas(output_path, pagesize=landscape(A4))
+    c = nouveau_canvas(output_path, landscape(A4), empreinte, apercu, archive=archive)
     c.setTitle(f"Prévisionnel Financier {annee} - {nom_entreprise}")
     c.setAuthor(nom_entreprise)
 
-    # Fond
-    c.setFillColor(DARK_BG)
-    c.rect(0, 0, w, h, fill=1, stroke=0)
+    fond_page(c, landscape(A4))
 
     ml = 12*mm
     mr = w - 12*mm
@@ -225,23 +561,9 @@ def generate_previsionnel(
     y = h - 15*mm
 
     # ── EN-TÊTE ──
-    c.setFillColor(HEADER_BG)
-    c.roundRect(ml, y - 22*mm, cw, 22*mm, 5, fill=1, stroke=0)
-
-    c.setFillColor(ACCENT)
-    c.setFont('Helvetica-Bold', 16)
-    c.drawString(ml + 8*mm, y - 9*mm, nom_entreprise)
-    c.setFillColor(TEXT_GRAY)
-    c.setFont('Helvetica', 8)
-    c.drawString(ml + 8*mm, y - 15*mm, f'{nom_projet} — Exercice {annee}')
-    c.drawString(ml + 8*mm, y - 20*mm, f'Document généré automatiquement par TalosPrimes SaaS')
-
-    c.setFillColor(ACCENT_LIGHT)
-    c.setFont('Helvetica-Bold', 14)
-    c.drawRightString(mr - 8*mm, y - 9*mm, 'PRÉVISIONNEL FINANCIER')
-    c.setFillColor(TEXT_WHITE)
-    c.setFont('Helvetica-Bold', 11)
-    c.drawRightString(mr - 8*mm, y - 17*mm, str(annee))
+    bandeau(c, ml, y, cw, 22*mm, nom_entreprise,
+            [f'{nom_projet} — Exercice {annee}', 'Document généré automatiquement par TalosPrimes SaaS'],
+            'PRÉVISIONNEL FINANCIER', str(annee))
 
     y -= 26*mm
 
@@ -254,136 +576,112 @@ def generate_previsionnel(
         ('Point Mort', f'Mois {point_mort}' if point_mort else 'Non atteint', PURPLE),
         ('Trésorerie Fin', fmt_full(tresorerie[-1]), GREEN if tresorerie[-1] >= 0 else RED),
     ]
-
-    kpi_w = (cw - 5*5*mm) / 6
-    for i, (label, value, color) in enumerate(kpis):
-        kx = ml + i * (kpi_w + 5*mm)
-        c.setFillColor(HEADER_BG)
-        c.roundRect(kx, y - 16*mm, kpi_w, 16*mm, 4, fill=1, stroke=0)
-        c.setFillColor(TEXT_GRAY)
-        c.setFont('Helvetica', 5.5)
-        c.drawString(kx + 3*mm, y - 5*mm, label)
-        c.setFillColor(color)
-        c.setFont('Helvetica-Bold', 10)
-        c.drawString(kx + 3*mm, y - 13*mm, value)
+    tuiles(c, ml, y, cw, kpis)
 
     y -= 20*mm
 
-    # ── COLONNES : Libellé + 12 mois + Total ──
-    col_w_label = 55*mm
-    col_w_mois = (cw - col_w_label - 25*mm) / 12
-    col_positions = [0]  # Label
-    for i in range(12):
-        col_positions.append(col_w_label + (i + 1) * col_w_mois)
-    col_positions.append(cw - 2*mm)  # Total
-
-    headers = ['Poste'] + MOIS + ['Total']
+    page = Paginateur(c, landscape(A4), haut=h - 15*mm, bas=10*mm, fond=DARK_BG, y=y)
 
     # ============================================================
     # PAGE 1 : COMPTE DE RÉSULTAT
     # ============================================================
-    y = draw_section_header(c, ml, y, cw, "COMPTE DE RÉSULTAT PRÉVISIONNEL", GREEN)
-    y = draw_table_header(c, ml, y, col_positions, headers, cw)
+    page.reserver(8*mm + 6*mm + 5*mm)
+    page.y = entete_section(c, ml, page.y, cw, "COMPTE DE RÉSULTAT PRÉVISIONNEL", GREEN)
+    tableau = tableau_mensuel(cw)
 
     # CA par source
     for nom, vals in sources_ca.items():
         values = [nom] + [fmt(v) for v in vals] + [fmt(sum(vals))]
         colors = [TEXT_LIGHT] + [GREEN]*12 + [GREEN]
-        y = draw_data_row(c, ml, y, col_positions, values, cw, colors=colors, bg=ROW_ALT)
+        tableau.ligne(values, colors, fond=ROW_ALT)
 
     # Total CA
     values = ['TOTAL CA HT'] + [fmt(v) for v in ca_mensuel] + [fmt(ca_annuel)]
     colors = [GREEN] + [GREEN]*12 + [GREEN]
-    y = draw_data_row(c, ml, y, col_positions, values, cw, bold=True, colors=colors, bg=GREEN_DARK)
-    y -= 2*mm
+    tableau.ligne(values, colors, fond=GREEN_DARK, gras=True)
+    tableau.espace(2*mm)
 
     # Charges par catégorie
     categories = {'fixe': 'Charges fixes', 'variable': 'Charges variables', 'personnel': 'Personnel'}
     for cat_key, cat_label in categories.items():
-        # Sous-header catégorie
-        c.setFillColor(HexColor('#1e293b'))
-        c.rect(ml, y - 4*mm, cw, 4*mm, fill=1, stroke=0)
-        c.setFillColor(BLUE)
-        c.setFont('Helvetica-Bold', 5.5)
-        c.drawString(ml + 3*mm, y - 3*mm, cat_label.upper())
-        y -= 4.5*mm
-
+        tableau.categorie(cat_label)
         for nom, (cat, vals) in charges.items():
             if cat != cat_key:
                 continue
             values = [nom] + [fmt(v) for v in vals] + [fmt(sum(vals))]
             colors = [TEXT_LIGHT] + [RED]*12 + [RED]
-            y = draw_data_row(c, ml, y, col_positions, values, cw, colors=colors)
+            tableau.ligne(values, colors)
 
     # Total Charges
     values = ['TOTAL CHARGES'] + [fmt(v) for v in charges_mensuelles] + [fmt(charges_annuelles)]
     colors = [RED] + [RED]*12 + [RED]
-    y = draw_data_row(c, ml, y, col_positions, values, cw, bold=True, colors=colors, bg=RED_DARK)
-    y -= 1*mm
+    tableau.ligne(values, colors, fond=RED_DARK, gras=True)
+    tableau.espace(1*mm)
 
     # Amortissements
     values = ['Amortissements'] + [fmt(v) for v in amort_mensuel] + [fmt(sum(amort_mensuel))]
     colors = [TEXT_GRAY] + [TEXT_GRAY]*12 + [TEXT_GRAY]
-    y = draw_data_row(c, ml, y, col_positions, values, cw, colors=colors, bg=ROW_ALT)
-    y -= 2*mm
+    tableau.ligne(values, colors, fond=ROW_ALT)
+    tableau.espace(2*mm)
 
     # RÉSULTAT
     res_color = GREEN if resultat_annuel >= 0 else RED
     values = ["RÉSULTAT D'EXPLOITATION"] + [fmt(v) for v in resultat_mensuel] + [fmt(resultat_annuel)]
     res_colors = [res_color] + [GREEN if v >= 0 else RED for v in resultat_mensuel] + [res_color]
-    y = draw_data_row(c, ml, y, col_positions, values, cw, bold=True, colors=res_colors, bg=HEADER_BG)
+    tableau.ligne(values, res_colors, fond=HEADER_BG, gras=True)
+    page.tableau(tableau, ml)
 
     # ============================================================
     # PAGE 2 : TRÉSORERIE + INVESTISSEMENTS
     # ============================================================
-    c.showPage()
-    c.setFillColor(DARK_BG)
-    c.rect(0, 0, w, h, fill=1, stroke=0)
-    y = h - 15*mm
+    page.nouvelle_page()
 
     # ── PLAN DE TRÉSORERIE ──
-    y = draw_section_header(c, ml, y, cw, "PLAN DE TRÉSORERIE", BLUE)
-    y = draw_table_header(c, ml, y, col_positions, headers, cw)
+    page.y = entete_section(c, ml, page.y, cw, "PLAN DE TRÉSORERIE", BLUE)
+    tableau = tableau_mensuel(cw)
 
     # Encaissements TTC
-    enc = [round(ca_mensuel[i] * 1.20) for i in range(12)]
+    enc = p['encaissements']
     values = ['Encaissements TTC'] + [fmt(v) for v in enc] + [fmt(sum(enc))]
     colors = [TEXT_LIGHT] + [GREEN]*12 + [GREEN]
-    y = draw_data_row(c, ml, y, col_positions, values, cw, colors=colors, bg=ROW_ALT)
+    tableau.ligne(values, colors, fond=ROW_ALT)
 
     # Décaissements
-    dec = [round(charges_mensuelles[i] * 1.12) for i in range(12)]
+    dec = p['decaissements']
     values = ['Décaissements'] + [fmt(v) for v in dec] + [fmt(sum(dec))]
     colors = [TEXT_LIGHT] + [RED]*12 + [RED]
-    y = draw_data_row(c, ml, y, col_positions, values, cw, colors=colors)
+    tableau.ligne(values, colors)
 
-    # TVA
-    values = ['TVA à payer'] + [fmt(v) for v in tva_mensuelle] + [fmt(sum(tva_mensuelle))]
+    # TVA reversée dans le mois
+    values = ['TVA payée'] + [fmt(v) for v in tva_payee] + [fmt(sum(tva_payee))]
     colors = [TEXT_LIGHT] + [AMBER]*12 + [AMBER]
-    y = draw_data_row(c, ml, y, col_positions, values, cw, colors=colors, bg=ROW_ALT)
+    tableau.ligne(values, colors, fond=ROW_ALT)
 
     # Remboursements
     values = ['Remboursement emprunts'] + [fmt(rembours_mensuel)]*12 + [fmt(rembours_mensuel * 12)]
     colors = [TEXT_LIGHT] + [TEXT_GRAY]*12 + [TEXT_GRAY]
-    y = draw_data_row(c, ml, y, col_positions, values, cw, colors=colors)
-    y -= 2*mm
+    tableau.ligne(values, colors)
+    tableau.espace(2*mm)
 
     # Solde trésorerie
     values = ['SOLDE DE TRÉSORERIE'] + [fmt(v) for v in tresorerie] + ['']
     tres_colors = [BLUE] + [GREEN if v >= 0 else RED for v in tresorerie] + [BLUE]
-    y = draw_data_row(c, ml, y, col_positions, values, cw, bold=True, colors=tres_colors, bg=HEADER_BG)
+    tableau.ligne(values, tres_colors, fond=HEADER_BG, gras=True)
+    page.tableau(tableau, ml)
 
-    y -= 8*mm
+    page.descendre(8*mm)
 
     # ── INVESTISSEMENTS & FINANCEMENTS ──
-    y = draw_section_header(c, ml, y, cw, "INVESTISSEMENTS & FINANCEMENTS", PURPLE)
+    # Les cadres s'allongent avec le nombre de lignes (5 mm chacune)
+    box_h = max(50*mm, (22 + 5 * max(len(investissements), len(financements))) * mm)
+    y = page.reserver(10*mm + box_h)
+    y = entete_section(c, ml, y, cw, "INVESTISSEMENTS & FINANCEMENTS", PURPLE)
     y -= 2*mm
 
     half = cw / 2 - 4*mm
 
     # Investissements (gauche)
-    c.setFillColor(HEADER_BG)
-    c.roundRect(ml, y - 50*mm, half, 50*mm, 4, fill=1, stroke=0)
+    cadre(c, ml, y, half, box_h)
 
     iy = y - 5*mm
     c.setFillColor(PURPLE)
@@ -415,8 +713,7 @@ def generate_previsionnel(
 
     # Financements (droite)
     fx = ml + half + 8*mm
-    c.setFillColor(HEADER_BG)
-    c.roundRect(fx, y - 50*mm, half, 50*mm, 4, fill=1, stroke=0)
+    cadre(c, fx, y, half, box_h)
 
     fy = y - 5*mm
     c.setFillColor(BLUE)
@@ -451,10 +748,11 @@ def generate_previsionnel(
     c.setFont('Helvetica-Bold', 8)
     c.drawString(fx + 5*mm, fy, f'Total : {fmt_full(total_financement)}')
 
-    y -= 55*mm
+    page.y = y - box_h - 5*mm
 
     # ── RATIOS & INDICATEURS ──
-    y = draw_section_header(c, ml, y, cw, "INDICATEURS CLÉS", AMBER)
+    y = page.reserver(10*mm + 35*mm)
+    y = entete_section(c, ml, y, cw, "INDICATEURS CLÉS", AMBER)
     y -= 2*mm
 
     ratios = [
@@ -468,8 +766,7 @@ def generate_previsionnel(
         ('CA mensuel moyen', fmt_full(round(ca_annuel / 12))),
     ]
 
-    c.setFillColor(HEADER_BG)
-    c.roundRect(ml, y - 35*mm, cw, 35*mm, 4, fill=1, stroke=0)
+    cadre(c, ml, y, cw, 35*mm)
 
     ry = y - 5*mm
     col1_end = ml + cw / 2
@@ -485,18 +782,132 @@ def generate_previsionnel(
         c.drawString(rx + 55*mm, ry, value)
         ry -= 7*mm
 
-    y -= 40*mm
+    page.y = y - 40*mm
+
+    # ============================================================
+    # PAGE 3 : GRAPHIQUES
+    # ============================================================
+    if graphiques:
+        page.nouvelle_page()
+        page.y = entete_section(c, ml, page.y, cw, "ÉVOLUTION MENSUELLE", BLUE)
+        couleurs = [ACCENT, BLUE, PURPLE, GREEN, AMBER]
+        haut_barres = 85*mm
+        y_barres = page.reserver(haut_barres) - haut_barres
+        barres_empilees(
+            c, ml, y_barres, cw, haut_barres, "CHIFFRE D'AFFAIRES PAR SOURCE ET CHARGES", MOIS,
+            [(nom, couleurs[i % len(couleurs)], vals) for i, (nom, vals) in enumerate(sources_ca.items())],
+            ligne=('Charges totales', RED, charges_mensuelles),
+        )
+        page.descendre(haut_barres + 4*mm)
+        haut_courbes = 75*mm
+        y_courbes = page.reserver(haut_courbes) - haut_courbes
+        demi = (cw - 4*mm) / 2
+        cumul, resultat_cumule = 0, []
+        for r in resultat_mensuel:
+            cumul += r
+            resultat_cumule.append(cumul)
+        courbes(c, ml, y_courbes, demi, haut_courbes, "TRÉSORERIE FIN DE MOIS", MOIS,
+                [('Trésorerie', GREEN, tresorerie)])
+        courbes(c, ml + demi + 4*mm, y_courbes, demi, haut_courbes, "RÉSULTAT CUMULÉ", MOIS,
+                [('Résultat cumulé', ACCENT_LIGHT, resultat_cumule)])
+        page.descendre(haut_courbes + 4*mm)
+
+    # ============================================================
+    # PAGE 4 : PRÉVU / RÉALISÉ
+    # ============================================================
+    if realise is not None:
+        page.nouvelle_page()
+        dessiner_ecarts(page, ml, cw, realise)
+
+    # ============================================================
+    # PAGE 5 : ANALYSE DE SENSIBILITÉ
+    # ============================================================
+    if sensibilite is not None:
+        page.nouvelle_page()
+        dessiner_tornade(page, ml, cw, sensibilite)
+        page.descendre(4*mm)
 
     # ── MENTION ──
+    y = page.reserver(6*mm)
     c.setFillColor(TEXT_GRAY)
     c.setFont('Helvetica', 5.5)
     c.drawString(ml + 3*mm, y, f"Ce prévisionnel est fourni à titre indicatif. Les données peuvent varier en fonction de l'activité réelle.")
     c.drawString(ml + 3*mm, y - 4*mm, f"Généré par TalosPrimes SaaS — {nom_projet} — Exercice {annee}")
 
     c.save()
+    chemin_json = chemin_sidecar(output_path, sidecar)
+    if chemin_json:
+        ecrire_json(chemin_json, donnees_previsionnel(p, nom_entreprise, nom_projet, annee, sensibilite,
+                                                          realise))
     return output_path
 
 
+def donnees_previsionnel(p, nom_entreprise='TalosPrimes SaaS', nom_projet='Prévisionnel Financier', annee=2026,
+                         sensibilite=None, realise=None):
+    """Document JSON d'un prévisionnel (voir donnees_json.py).
+
+    p : résultat de calculer_previsionnel, sans rendu PDF.
+    sensibilite : résultat de analyse_sensibilite(), realise : résultat
+    de ecarts_previsionnel() ; ajoutés tels quels.
+    """
+    ca_annuel = p['ca_annuel']
+    supplements = {} if sensibilite is None else {'sensibilite': sensibilite}
+    if realise is not None:
+        supplements['realise'] = realise
+    return document(
+        'previsionnel',
+        entreprise=nom_entreprise,
+        projet=nom_projet,
+        annee=annee,
+        mois=MOIS,
+        entrees={
+            'sources_ca': p['sources_ca'],
+            'charges': {nom: {'categorie': cat, 'mensuel': vals} for nom, (cat, vals) in p['charges'].items()},
+            'investissements': [
+                {'nom': nom, 'montant_ht': montant, 'amort_annees': duree}
+                for nom, montant, duree in p['investissements']
+            ],
+            'financements': [
+                {'nom': nom, 'type': typ, 'montant': montant, 'taux': taux, 'duree_mois': duree}
+                for nom, typ, montant, taux, duree in p['financements']
+            ],
+            'conditions': {nom: cond._asdict() for nom, cond in p['conditions'].items()},
+        },
+        compte_resultat={
+            'ca_mensuel': p['ca_mensuel'],
+            'ca_annuel': ca_annuel,
+            'charges_mensuelles': p['charges_mensuelles'],
+            'charges_annuelles': p['charges_annuelles'],
+            'charges_fixes_annuel': p['charges_fixes_annuel'],
+            'charges_variables_annuel': p['charges_variables_annuel'],
+            'charges_personnel_annuel': p['charges_personnel_annuel'],
+            'amort_mensuel': p['amort_mensuel'],
+            'resultat_mensuel': p['resultat_mensuel'],
+            'resultat_annuel': p['resultat_annuel'],
+        },
+        tresorerie={
+            'encaissements_ttc': p['encaissements'],
+            'decaissements_ttc': p['decaissements'],
+            'tva_mensuelle': p['tva_mensuelle'],
+            'tva_payee': p['tva_payee'],
+            'rembours_mensuel': p['rembours_mensuel'],
+            'solde_mensuel': p['tresorerie'],
+            'solde_min': min(p['tresorerie']),
+            'solde_fin': p['tresorerie'][-1],
+        },
+        indicateurs={
+            'total_invest': p['total_invest'],
+            'total_financement': p['total_financement'],
+            'seuil_rentabilite': p['seuil_rentabilite'],
+            'point_mort': p['point_mort'],
+            'marge_brute_pct': (ca_annuel - p['charges_variables_annuel']) / ca_annuel * 100 if ca_annuel > 0 else None,
+            'taux_charges_personnel_pct': p['charges_personnel_annuel'] / ca_annuel * 100 if ca_annuel > 0 else None,
+            'ca_mensuel_moyen': round(ca_annuel / 12),
+        },
+        **supplements,
+    )
+
+
 if __name__ == '__main__':
     output = '/sessions/relaxed-optimistic-ride/mnt/talosprimes/exemple_previsionnel.pdf'
     generate_previsionnel(output_path=output)
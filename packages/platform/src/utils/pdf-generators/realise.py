@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+============================================================
+PRÉVU / RÉALISÉ — TalosPrimes
+Écarts au prévisionnel à partir des opérations bancaires
+============================================================
+
+Les opérations bancaires catégorisées (exportées après le
+rapprochement, rapprochement.service.ts) sont lues en flux, ligne à
+ligne, et cumulées par mois dans les postes du plan : sources de CA et
+lignes de charges. Seuls ces cumuls (postes × 12 mois) restent en
+mémoire, quel que soit le nombre d'opérations ; on peut ajouter les
+exports au fil des mois sur le même Realise.
+
+Formats acceptés :
+- CSV (séparateur ; ou ,) avec en-tête : date, montant, categorie
+  (et libellé, ignoré). Dates JJ/MM/AAAA ou AAAA-MM-JJ ; montants au
+  format français (1 234,56) ou anglais (1234.56) ;
+- JSONL : une opération par ligne, {"date", "montant", "categorie"}.
+
+Montant positif = crédit, négatif = débit, TTC. categorie est le nom
+d'une source de CA ou d'une ligne de charges du plan ; les autres
+opérations (TVA, échéances d'emprunt, virements internes...) comptent
+dans le solde bancaire mais dans aucun poste.
+
+ecarts_previsionnel() compare les mois clos au plan, poste par poste
+(en HT, avec le taux de TVA de chaque ligne), puis recalcule la
+trésorerie des mois restants à partir du solde bancaire réel, via
+projeter_lot() (previsionnel.py). Les montants encaissés ou payés d'un
+mois clos y servent d'estimation de sa facturation (délais de paiement
+des conditions de chaque ligne).
+
+    realise = Realise(2026, p['sources_ca'], p['charges'], p['conditions'])
+    realise.ajouter(lire_operations('operations-2026.csv'))
+    ecarts = ecarts_previsionnel(realise, p)
+    generate_previsionnel(..., realise=ecarts)   # page prévu / réalisé
+"""
+
+import csv
+import json
+
+from previsionnel import (
+    CONDITIONS_CA, CONDITIONS_CHARGES, calculer_previsionnel, conditions_ligne, projeter_lot, regrouper,
+    verifier_lignes,
+)
+
+COLONNES = {
+    'date': ('date', 'date opération', 'date operation', 'date valeur', 'date comptable', 'settled_at'),
+    'montant': ('montant', 'amount', 'somme', 'valeur'),
+    'categorie': ('catégorie', 'categorie', 'category', 'poste'),
+}
+
+
+def _normaliser(texte):
+    return texte.strip().strip('"').lower()
+
+
+def _colonne(entetes, candidats):
+    entetes = [_normaliser(e) for e in entetes]
+    for candidat in candidats:
+        if candidat in entetes:
+            return entetes.index(candidat)
+    return -1
+
+
+def lire_date(texte):
+    """JJ/MM/AAAA ou AAAA-MM-JJ -> 'AAAA-MM-JJ'"""
+    texte = texte.strip().strip('"')
+    if len(texte) >= 10 and texte[4] == '-':
+        return texte[:10]
+    for sep in '/.-':
+        parties = texte.split(sep)
+        if len(parties) == 3 and len(parties[2][:4]) == 4:
+            return f"{parties[2][:4]}-{parties[1].zfill(2)}-{parties[0].zfill(2)}"
+    raise ValueError(f"Date non reconnue : {texte}")
+
+
+def lire_montant(texte):
+    """Montant français (1 234,56) ou anglais (1,234.56)"""
+    if not isinstance(texte, str):
+        return float(texte)
+    texte = texte.replace('"', '').replace('€', '').replace(' ', '').replace(' ', '').strip()
+    if not texte or texte == '-':
+        return 0.0
+    if ',' in texte and '.' in texte:
+        if texte.rfind(',') > texte.rfind('.'):
+            texte = texte.replace('.', '').replace(',', '.')
+        else:
+            texte = texte.replace(',', '')
+    return float(texte.replace(',', '.'))
+
+
+def _lire_csv(f):
+    entete = f.readline()
+    separateur = ';' if entete.count(';') >= entete.count(',') else ','
+    entetes = next(csv.reader([entete], delimiter=separateur))
+    index = {cle: _colonne(entetes, candidats) for cle, candidats in COLONNES.items()}
+    manquantes = [cle for cle, i in index.items() if i < 0]
+    if manquantes:
+        raise ValueError(f"Colonnes introuvables : {', '.join(manquantes)}. "
+                         f"Colonnes détectées : {', '.join(entetes)}")
+    i_date, i_montant, i_categorie = index['date'], index['montant'], index['categorie']
+    for cols in csv.reader(f, delimiter=separateur):
+        if not cols:
+            continue
+        yield lire_date(cols[i_date]), cols[i_categorie].strip(), lire_montant(cols[i_montant])
+
+
+def _lire_jsonl(f):
+    for ligne in f:
+        if ligne.strip():
+            op = json.loads(ligne)
+            yield (lire_date(op['date']), (op.get('categorie') or op.get('category') or '').strip(),
+                   lire_montant(op.get('montant', op.get('amount', 0))))
+
+
+def lire_operations(chemin):
+    """Opérations d'un export, une à une : (date ISO, catégorie, montant TTC)"""
+    with open(chemin, encoding='utf-8-sig', newline='') as f:
+        yield from (_lire_jsonl(f) if chemin.endswith(('.jsonl', '.ndjson')) else _lire_csv(f))
+
+
+class Realise:
+    """Cumuls mensuels des opérations de l'exercice, par poste du plan"""
+
+    def __init__(self, annee, sources_ca, charges, conditions=None):
+        self.annee = str(annee)
+        self.ca = {nom: [0.0] * 12 for nom in sources_ca}
+        self.charges = {nom: [0.0] * 12 for nom in charges}
+        # catégorie -> (cumuls HT, diviseur TTC -> HT ; négatif pour les charges)
+        self._postes = {}
+        verifier_lignes(conditions, [*sources_ca, *charges])
+        for cumuls, defaut, signe in ((self.ca, CONDITIONS_CA, 1), (self.charges, CONDITIONS_CHARGES, -1)):
+            for nom, vals in cumuls.items():
+                cond = conditions_ligne(conditions, nom, defaut)
+                taux = 0 if cond.regime == 'franchise' else cond.tva
+                self._postes[nom] = (vals, signe * (1 + taux))
+        self.flux = [0.0] * 12          # flux bancaire net TTC, toutes opérations
+        self.non_affecte = [0.0] * 12   # flux hors postes du plan
+        self.operations = 0
+        self.hors_exercice = 0
+        self.dernier_mois = 0
+
+    def ajouter(self, operations):
+        """Cumule un flux d'opérations (date ISO, catégorie, montant TTC)"""
+        postes, flux, non_affecte = self._postes, self.flux, self.non_affecte
+        for date, categorie, montant in operations:
+            if date[:4] != self.annee:
+                self.hors_exercice += 1
+                continue
+            i = int(date[5:7]) - 1
+            self.operations += 1
+            flux[i] += montant
+            poste = postes.get(categorie)
+            if poste is not None:
+                poste[0][i] += montant / poste[1]
+            else:
+                non_affecte[i] += montant
+            if i >= self.dernier_mois:
+                self.dernier_mois = i + 1
+        return self
+
+
+def _ecart(prevu, realise):
+    return {
+        'prevu': prevu,
+        'realise': realise,
+        'ecart': realise - prevu,
+        'ecart_pct': (realise - prevu) / abs(prevu) * 100 if prevu else None,
+    }
+
+
+def ecarts_previsionnel(realise, p, solde_ouverture=None, mois_clos=None):
+    """Écarts des mois clos et trésorerie révisée.
+
+    p : résultat de calculer_previsionnel(). solde_ouverture : solde
+    bancaire au 1er janvier (par défaut celui du plan : financements
+    reçus, investissements payés). mois_clos : nombre de mois réalisés
+    (par défaut, jusqu'au mois de la dernière opération).
+
+    Retourne {mois_clos, operations, hors_exercice, non_affecte, postes,
+    ca, charges, resultat, tresorerie_prevue, tresorerie_revisee,
+    resultat_annuel_revise, tresorerie_min_revisee} ; postes :
+    [{libelle, famille, prevu, realise, ecart, ecart_pct}] sur les mois
+    clos, en HT.
+    """
+    m = realise.dernier_mois if mois_clos is None else mois_clos
+    if solde_ouverture is None:
+        solde_ouverture = p['solde_initial']
+
+    postes = []
+    for nom, vals in p['sources_ca'].items():
+        postes.append({'libelle': nom, 'famille': 'ca', **_ecart(sum(vals[:m]), sum(realise.ca[nom][:m]))})
+    for nom, (_cat, vals) in p['charges'].items():
+        postes.append({'libelle': nom, 'famille': 'charge',
+                       **_ecart(sum(vals[:m]), sum(realise.charges[nom][:m]))})
+
+    # Plan révisé : réalisé sur les mois clos, prévu ensuite, ligne par ligne
+    ca_reel = [sum(vals[i] for vals in realise.ca.values()) for i in range(12)]
+    charges_reelles = [sum(vals[i] for vals in realise.charges.values()) for i in range(12)]
+    cond = p['conditions']
+    ca_revise = regrouper({nom: realise.ca[nom][:m] + list(vals[m:])
+                           for nom, vals in p['sources_ca'].items()}, cond)
+    charges_revisees = regrouper({nom: realise.charges[nom][:m] + list(vals[m:])
+                                  for nom, (_cat, vals) in p['charges'].items()}, cond)
+    projection = projeter_lot([ca_revise], [charges_revisees], [p['amort_mensuel']],
+                              [p['rembours_mensuel']], [p['solde_initial']])
+    projetee, = projection['tresorerie']
+
+    # Mois clos : solde bancaire réel ; mois restants : flux du plan à
+    # partir de ce solde (la TVA due au mois m+1 est celle du réalisé)
+    solde, tresorerie_revisee = solde_ouverture, []
+    for i in range(m):
+        solde += realise.flux[i]
+        tresorerie_revisee.append(round(solde))
+    if m:
+        decalage = tresorerie_revisee[-1] - projetee[m - 1]
+        tresorerie_revisee += [t + decalage for t in projetee[m:]]
+    else:
+        tresorerie_revisee = list(p['tresorerie'])
+
+    resultat_prevu = sum(p['resultat_mensuel'][:m])
+    resultat_reel = sum(ca_reel[:m]) - sum(charges_reelles[:m]) - sum(p['amort_mensuel'][:m])
+    return {
+        'mois_clos': m,
+        'operations': realise.operations,
+        'hors_exercice': realise.hors_exercice,
+        'non_affecte': sum(realise.non_affecte[:m]),
+        'postes': postes,
+        'ca': _ecart(sum(p['ca_mensuel'][:m]), sum(ca_reel[:m])),
+        'charges': _ecart(sum(p['charges_mensuelles'][:m]), sum(charges_reelles[:m])),
+        'resultat': _ecart(resultat_prevu, resultat_reel),
+        'tresorerie_prevue': p['tresorerie'],
+        'tresorerie_revisee': tresorerie_revisee,
+        'resultat_annuel_revise': projection['resultat_annuel'][0],
+        'tresorerie_min_revisee': min(tresorerie_revisee),
+    }
+
+
+def analyser_realise(exports, annee=2026, solde_ouverture=None, mois_clos=None,
+                     sources_ca=None, charges=None, investissements=None, financements=None, conditions=None):
+    """Lit les exports (chemins, dans l'ordre) et retourne ecarts_previsionnel()"""
+    p = calculer_previsionnel(sources_ca, charges, investissements, financements, conditions)
+    realise = Realise(annee, p['sources_ca'], p['charges'], p['conditions'])
+    for chemin in exports:
+        realise.ajouter(lire_operations(chemin))
+    return ecarts_previsionnel(realise, p, solde_ouverture, mois_clos)
+
+
+if __name__ == '__main__':
+    import os
+    import random
+    import sys
+    import tempfile
+    import time
+    import tracemalloc
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    p = calculer_previsionnel()
+    rng = random.Random(0)
+    mois_clos = 5
+
+    # Export synthétique : le plan des 5 premiers mois, ±15 %, éclaté en n opérations
+    postes = [(nom, vals, 1 + p['conditions'][nom].tva) for nom, vals in p['sources_ca'].items()]
+    postes += [(nom, vals, -1 - p['conditions'][nom].tva) for nom, (_cat, vals) in p['charges'].items()]
+    par_mois = n // mois_clos
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'operations.csv')
+        with open(chemin, 'w', encoding='utf-8') as f:
+            f.write('Date;Libellé;Montant;Catégorie\n')
+            for i in range(mois_clos):
+                for k in range(par_mois):
+                    nom, vals, tva = postes[k % len(postes)]
+                    montant = vals[i] * tva * rng.uniform(0.85, 1.15) * len(postes) / par_mois
+                    f.write(f"{rng.randint(1, 28):02d}/{i + 1:02d}/2026;Opération {k};"
+                            f"{montant:.2f}".replace('.', ',') + f";{nom}\n")
+                # Hors postes : échéance d'emprunt, TVA du mois précédent
+                f.write(f"15/{i + 1:02d}/2026;Échéance prêt;{-p['rembours_mensuel']};\n")
+                if p['tva_payee'][i]:
+                    f.write(f"20/{i + 1:02d}/2026;TVA;{-p['tva_payee'][i]};\n")
+        taille = os.path.getsize(chemin)
+
+        debut = time.perf_counter()
+        ecarts = analyser_realise([chemin])
+        duree = time.perf_counter() - debut
+        # Mémoire mesurée à part : tracemalloc ralentit fortement la lecture
+        tracemalloc.start()
+        analyser_realise([chemin])
+        _, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(f"{ecarts['operations']} opérations ({taille / 1e6:.1f} Mo) en {duree:.2f} s, "
+          f"pic mémoire {pic / 1024:.0f} Ko")
+    for cle in ('ca', 'charges', 'resultat'):
+        e = ecarts[cle]
+        print(f"  {cle:<9} prévu {e['prevu']:>10,.0f}  réalisé {e['realise']:>10,.0f}  écart {e['ecart']:>+9,.0f}")
+    print(f"  Trésorerie fin d'année : prévue {ecarts['tresorerie_prevue'][-1]:,.0f}, "
+          f"révisée {ecarts['tresorerie_revisee'][-1]:,.0f} ; minimum révisé {ecarts['tresorerie_min_revisee']:,.0f}")
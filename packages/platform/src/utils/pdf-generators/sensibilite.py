@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+============================================================
+ANALYSE DE SENSIBILITÉ DU PRÉVISIONNEL — TalosPrimes
+Quel poste du plan pèse le plus ? (diagramme « tornade »)
+============================================================
+
+Chaque entrée du plan — source de CA, ligne de charges, investissement,
+financement — est décalée de -x % puis de +x %, toutes choses égales par
+ailleurs, et l'on mesure l'effet sur le résultat annuel, la trésorerie
+minimale et le point mort.
+
+Les 2 × N scénarios ne repassent pas par calculer_previsionnel() : on
+part des agrégats du plan de base (CA et charges par mois et par groupe
+de conditions de TVA et de paiement, dotation et échéance mensuelles non
+arrondies), on n'ajoute l'écart du poste décalé qu'à son groupe, et tous les scénarios sont projetés en une seule passe par
+projeter_lot() (previsionnel.py), le même noyau que le plan de base.
+
+Usage :
+    analyse = analyse_sensibilite(sources_ca, charges, investissements, financements)
+    generate_previsionnel(..., sensibilite=analyse)   # page tornade
+"""
+
+from previsionnel import amortissement_mensuel, calculer_previsionnel, projeter_lot, remboursement_mensuel
+
+INDICATEURS = ('resultat_annuel', 'tresorerie_min', 'point_mort')
+
+
+def _decaler(valeurs, ecarts, signe):
+    return [v + signe * e for v, e in zip(valeurs, ecarts)]
+
+
+def analyse_sensibilite(sources_ca=None, charges=None, investissements=None, financements=None,
+                        variation=0.10, conditions=None):
+    """Effet d'un décalage de ±variation de chaque entrée du plan.
+
+    Retourne {variation, base, postes} ; base et chaque scénario sont des
+    dicts {resultat_annuel, tresorerie_min, point_mort}. postes est trié
+    par amplitude décroissante de l'effet sur le résultat annuel (ordre du
+    diagramme tornade) : [{libelle, famille, bas, haut, amplitude}].
+    """
+    p = calculer_previsionnel(sources_ca, charges, investissements, financements, conditions)
+    ca, ch, cond = p['groupes_ca'], p['groupes_charges'], p['conditions']
+    amort = amortissement_mensuel(p['investissements'])
+    rembours = remboursement_mensuel(p['financements'])
+    financement, invest = p['total_financement'], p['total_invest']
+
+    # Scénario 0 = plan de base, puis (-x %, +x %) pour chaque poste
+    postes = []
+    lot_ca, lot_ch, lot_amort, lot_rembours, lot_solde = [], [], [], [], []
+
+    def scenario(ca_s=ca, ch_s=ch, amort_s=amort, rembours_s=rembours, financement_s=financement,
+                 invest_s=invest):
+        lot_ca.append(ca_s)
+        lot_ch.append(ch_s)
+        lot_amort.append([round(amort_s)] * 12)
+        lot_rembours.append(round(rembours_s))
+        lot_solde.append(financement_s - invest_s * 1.20)
+
+    scenario()
+    for nom, vals in p['sources_ca'].items():
+        postes.append((nom, 'ca'))
+        ecarts = [v * variation for v in vals]
+        for signe in (-1, 1):
+            scenario(ca_s={**ca, cond[nom]: _decaler(ca[cond[nom]], ecarts, signe)})
+    for nom, (_cat, vals) in p['charges'].items():
+        postes.append((nom, 'charge'))
+        ecarts = [v * variation for v in vals]
+        for signe in (-1, 1):
+            scenario(ch_s={**ch, cond[nom]: _decaler(ch[cond[nom]], ecarts, signe)})
+    for investissement in p['investissements']:
+        nom, montant, _duree = investissement
+        postes.append((nom, 'investissement'))
+        ecart_amort = amortissement_mensuel([investissement]) * variation
+        for signe in (-1, 1):
+            scenario(amort_s=amort + signe * ecart_amort, invest_s=invest + signe * montant * variation)
+    for financement_ligne in p['financements']:
+        nom, _typ, montant, _taux, _duree = financement_ligne
+        postes.append((nom, 'financement'))
+        ecart_rembours = remboursement_mensuel([financement_ligne]) * variation
+        for signe in (-1, 1):
+            scenario(rembours_s=rembours + signe * ecart_rembours,
+                     financement_s=financement + signe * montant * variation)
+
+    projection = projeter_lot(lot_ca, lot_ch, lot_amort, lot_rembours, lot_solde)
+    indicateurs = [
+        {'resultat_annuel': res, 'tresorerie_min': min(tres), 'point_mort': pm}
+        for res, tres, pm in zip(projection['resultat_annuel'], projection['tresorerie'], projection['point_mort'])
+    ]
+
+    resultats = []
+    for k, (libelle, famille) in enumerate(postes):
+        bas, haut = indicateurs[1 + 2 * k], indicateurs[2 + 2 * k]
+        resultats.append({
+            'libelle': libelle,
+            'famille': famille,
+            'bas': bas,
+            'haut': haut,
+            'amplitude': abs(haut['resultat_annuel'] - bas['resultat_annuel']),
+        })
+    resultats.sort(key=lambda r: (-r['amplitude'],
+                                  -abs(r['haut']['tresorerie_min'] - r['bas']['tresorerie_min'])))
+    return {'variation': variation, 'base': indicateurs[0], 'postes': resultats}
+
+
+if __name__ == '__main__':
+    import time
+
+    debut = time.perf_counter()
+    analyse = analyse_sensibilite(variation=0.10)
+    duree = time.perf_counter() - debut
+    base = analyse['base']
+    print(f"Base : résultat {base['resultat_annuel']:,.0f} €, trésorerie min {base['tresorerie_min']:,.0f} €, "
+          f"point mort {base['point_mort']}")
+    for poste in analyse['postes']:
+        bas, haut = poste['bas'], poste['haut']
+        print(f"  {poste['libelle']:<26} {bas['resultat_annuel']:>10,.0f} → {haut['resultat_annuel']:>10,.0f}"
+              f"  tréso min {bas['tresorerie_min']:>9,.0f} → {haut['tresorerie_min']:>9,.0f}"
+              f"  point mort {bas['point_mort']} → {haut['point_mort']}")
+
+    # Contrôle : chaque scénario recalculé entièrement par calculer_previsionnel
+    p = calculer_previsionnel()
+    ecart_max = 0
+    for poste in analyse['postes']:
+        for signe, cote in ((-1, 'bas'), (1, 'haut')):
+            f = 1 + signe * analyse['variation']
+            entrees = {
+                'sources_ca': {n: [v * f for v in vals] if n == poste['libelle'] else vals
+                               for n, vals in p['sources_ca'].items()},
+                'charges': {n: (cat, [v * f for v in vals] if n == poste['libelle'] else vals)
+                            for n, (cat, vals) in p['charges'].items()},
+                'investissements': [(n, m * f if n == poste['libelle'] else m, d)
+                                    for n, m, d in p['investissements']],
+                'financements': [(n, t, m * f if n == poste['libelle'] else m, tx, d)
+                                 for n, t, m, tx, d in p['financements']],
+                'conditions': p['conditions'],
+            }
+            q = calculer_previsionnel(**entrees)
+            attendu = {'resultat_annuel': q['resultat_annuel'], 'tresorerie_min': min(q['tresorerie']),
+                       'point_mort': q['point_mort']}
+            obtenu = poste[cote]
+            assert attendu['point_mort'] == obtenu['point_mort'], (poste['libelle'], cote)
+            ecart_max = max(ecart_max, abs(attendu['resultat_annuel'] - obtenu['resultat_annuel']),
+                            abs(attendu['tresorerie_min'] - obtenu['tresorerie_min']))
+    print(f"OK: {len(analyse['postes'])} postes × 2 scénarios en {duree * 1000:.2f} ms "
+          f"(écart max avec le recalcul complet : {ecart_max:.2f} €)")
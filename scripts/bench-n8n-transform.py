@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Benchmark + golden-output check for transform-n8n-workflow.py.
+
+Runs transform_workflow() over the whole n8n_workflows/ tree and reports:
+- throughput (files/s) over several passes
+- cumulative time and hit count per regex rule of fix_code_node /
+  fix_postgres_node (a "hit" is a call that changed or matched the text),
+  plus the time spent in each stage (fixes, graph indexing, validation)
+- peak memory of one pass (tracemalloc)
+- the same figures for synthetic workflows of thousands of nodes, built by
+  stitching corpus workflows together
+
+and compares every payload with a golden file of SHA-256 digests, so that
+performance work cannot silently change what gets uploaded to n8n.
+
+Usage:
+  python3 bench-n8n-transform.py [options] [root]
+
+  root:               workflow tree (default: n8n_workflows)
+  --repeat N:         timed passes over the corpus (default 3)
+  --scale NODES:      size of the synthetic workflow, 0 to skip (default 5000)
+  --golden FILE:      golden digests (default: scripts/n8n-transform-golden.json)
+  --update-golden:    rewrite the golden file from the current output
+
+Exits with status 1 if a payload differs from the golden file.
+"""
+
+import sys
+import os
+import io
+import re
+import json
+import time
+import hashlib
+import tempfile
+import tracemalloc
+import contextlib
+
+from n8n_transformer import transformer, transform_workflow, WorkflowValidationError
+from n8n_workflow_graph import NODE_REF_RE, iter_workflow_files
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+DEFAULT_GOLDEN = os.path.join(SCRIPTS_DIR, 'n8n-transform-golden.json')
+
+
+class RuleStats:
+    """Cumulative time / calls / hits keyed by call site."""
+
+    def __init__(self):
+        self.rules = {}
+        self.stages = {}
+
+    def record(self, key, elapsed, hit):
+        entry = self.rules.setdefault(key, [0.0, 0, 0])
+        entry[0] += elapsed
+        entry[1] += 1
+        entry[2] += int(hit)
+
+    def record_stage(self, name, elapsed):
+        entry = self.stages.setdefault(name, [0.0, 0])
+        entry[0] += elapsed
+        entry[1] += 1
+
+
+class TimedRe:
+    """Drop-in for the `re` module inside the transformer, timing each call.
+
+    Rules are identified by their call site (function + line), so new
+    rules show up in the report without touching this file.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __getattr__(self, name):
+        return getattr(re, name)
+
+    def _key(self, kind, pattern, depth=2):
+        frame = sys._getframe(depth)
+        return (frame.f_code.co_name, frame.f_lineno, kind, pattern)
+
+    def sub(self, pattern, repl, string, count=0, flags=0):
+        key = self._key('sub', pattern)
+        start = time.perf_counter()
+        result, n = re.subn(pattern, repl, string, count=count, flags=flags)
+        self.stats.record(key, time.perf_counter() - start, n > 0)
+        return result
+
+    def _lookup(self, kind, pattern, string, flags):
+        key = self._key(kind, pattern, depth=3)
+        start = time.perf_counter()
+        result = getattr(re, kind)(pattern, string, flags)
+        self.stats.record(key, time.perf_counter() - start, result is not None)
+        return result
+
+    def match(self, pattern, string, flags=0):
+        return self._lookup('match', pattern, string, flags)
+
+    def search(self, pattern, string, flags=0):
+        return self._lookup('search', pattern, string, flags)
+
+
+def timed_stage(stats, name, func):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.record_stage(name, time.perf_counter() - start)
+    return wrapper
+
+
+@contextlib.contextmanager
+def profiling(stats):
+    """Instrument the transformer module for the duration of the block."""
+    patched = {
+        're': TimedRe(stats),
+        'fix_code_node': timed_stage(stats, 'fix_code_node', transformer.fix_code_node),
+        'fix_postgres_node': timed_stage(stats, 'fix_postgres_node', transformer.fix_postgres_node),
+        'WorkflowGraph': timed_stage(stats, 'WorkflowGraph (indexation)', transformer.WorkflowGraph),
+        'validate_workflow': timed_stage(stats, 'validate_workflow', transformer.validate_workflow),
+    }
+    saved = {name: getattr(transformer, name) for name in patched}
+    for name, value in patched.items():
+        setattr(transformer, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(transformer, name, value)
+
+
+def run_one(path):
+    """Transform one file; return the golden digest of the outcome."""
+    try:
+        payload = transform_workflow(path)
+    except WorkflowValidationError as e:
+        return 'rejected: ' + '; '.join(e.errors)
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+def run_pass(paths):
+    outcomes = {}
+    start = time.perf_counter()
+    for path in paths:
+        outcomes[path] = run_one(path)
+    return time.perf_counter() - start, outcomes
+
+
+def build_synthetic(paths, target_nodes):
+    """Stitch corpus workflows into one workflow of ~target_nodes nodes.
+
+    Each copy gets a name prefix; connections and $('...') references are
+    renamed accordingly so the regex rules see realistic text.
+    """
+    nodes, connections = [], {}
+    copy = 0
+    while len(nodes) < target_nodes:
+        for path in paths:
+            with open(path) as f:
+                wf = json.load(f)
+            prefix = f"s{copy:04d} "
+            copy += 1
+
+            def rename(match, prefix=prefix):
+                name = next(g for g in match.groups() if g is not None)
+                return match.group(0).replace(name, prefix + name, 1)
+
+            text = NODE_REF_RE.sub(rename, json.dumps(wf.get('nodes', [])))
+            for node in json.loads(text):
+                node['name'] = prefix + node.get('name', '')
+                nodes.append(node)
+            for src, outputs in (wf.get('connections') or {}).items():
+                for branches in outputs.values():
+                    for branch in branches or []:
+                        for target in branch or []:
+                            target['node'] = prefix + target.get('node', '')
+                connections[prefix + src] = outputs
+            if len(nodes) >= target_nodes:
+                break
+    return {'name': f'synthetic-{len(nodes)}', 'nodes': nodes, 'connections': connections, 'settings': {}}
+
+
+def print_rule_report(stats, wall):
+    print("  Etapes (temps cumule / appels):")
+    for name, (elapsed, calls) in sorted(stats.stages.items(), key=lambda kv: -kv[1][0]):
+        print(f"    {name:<32} {elapsed * 1000:9.1f} ms  {calls:7d}  ({elapsed / wall * 100:4.1f}%)")
+    print("  Regles regex (temps cumule / appels / hits):")
+    ranked = sorted(stats.rules.items(), key=lambda kv: -kv[1][0])
+    for (func, line, kind, pattern), (elapsed, calls, hits) in ranked:
+        label = f"{func}:{line} {kind} {pattern[:38]}"
+        print(f"    {label:<64} {elapsed * 1000:8.2f} ms  {calls:7d}  {hits:6d}")
+
+
+def main(args):
+    options = {'--repeat': '3', '--scale': '5000', '--golden': DEFAULT_GOLDEN}
+    update_golden = False
+    roots = []
+    i = 0
+    usage = (f"Usage: {sys.argv[0]} [--repeat N] [--scale NODES] [--golden FILE] "
+             f"[--update-golden] [root]")
+    while i < len(args):
+        if args[i] in ('-h', '--help'):
+            print(usage)
+            return 0
+        if args[i] in options and i + 1 < len(args):
+            options[args[i]] = args[i + 1]
+            i += 2
+            continue
+        if args[i] == '--update-golden':
+            update_golden = True
+        elif args[i].startswith('-') or roots:
+            print(f"argument invalide: {args[i]}\n{usage}", file=sys.stderr)
+            return 1
+        else:
+            roots.append(args[i])
+        i += 1
+
+    root = roots[0] if roots else os.path.join(REPO_ROOT, 'n8n_workflows')
+    if not os.path.exists(root):
+        print(f"introuvable: {root}\n{usage}", file=sys.stderr)
+        return 1
+    paths = list(iter_workflow_files([root]))
+    repeat = max(1, int(options['--repeat']))
+
+    # Golden digests must not depend on the caller's environment
+    os.environ['CREDENTIAL_MAP'] = '{}'
+    os.environ.pop('N8N_SKIP_VALIDATION', None)
+
+    # The transformer is chatty on stderr: keep the report readable
+    with contextlib.redirect_stderr(io.StringIO()):
+        run_pass(paths)  # warm-up (imports, regex cache)
+        timings = []
+        outcomes = {}
+        for _ in range(repeat):
+            elapsed, outcomes = run_pass(paths)
+            timings.append(elapsed)
+
+        stats = RuleStats()
+        with profiling(stats):
+            profiled_wall, _ = run_pass(paths)
+
+        tracemalloc.start()
+        run_pass(paths)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    best = min(timings)
+    print(f"Corpus: {len(paths)} fichiers ({root}), {repeat} passes")
+    print(f"  meilleure passe {best:.3f}s — {len(paths) / best:.0f} fichiers/s — "
+          f"{best / len(paths) * 1000:.2f} ms/fichier — pic memoire {peak / 1e6:.1f} Mo")
+    print_rule_report(stats, profiled_wall)
+
+    scale = int(options['--scale'])
+    if scale > 0:
+        synthetic = build_synthetic([p for p in paths if not outcomes[p].startswith('rejected')], scale)
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(synthetic, f)
+            synthetic_path = f.name
+        os.environ['N8N_SKIP_VALIDATION'] = '1'
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                stats = RuleStats()
+                with profiling(stats):
+                    elapsed, _ = run_pass([synthetic_path])
+                tracemalloc.start()
+                run_pass([synthetic_path])
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+        finally:
+            os.environ.pop('N8N_SKIP_VALIDATION', None)
+            os.unlink(synthetic_path)
+        n = len(synthetic['nodes'])
+        print(f"Synthetique: {n} nodes en {elapsed:.3f}s — {n / elapsed:.0f} nodes/s — pic memoire {peak / 1e6:.1f} Mo")
+        print_rule_report(stats, elapsed)
+
+    golden_path = options['--golden']
+    current = {os.path.relpath(p, REPO_ROOT): d for p, d in outcomes.items()}
+    if update_golden:
+        with open(golden_path, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write('\n')
+        print(f"Golden: {len(current)} sorties ecrites dans {golden_path}")
+        return 0
+
+    if not os.path.exists(golden_path):
+        print(f"Golden: {golden_path} absent (--update-golden pour le creer)")
+        return 0
+    with open(golden_path) as f:
+        golden = json.load(f)
+    diffs = sorted(p for p in current if p in golden and golden[p] != current[p])
+    missing = sorted(p for p in current if p not in golden)
+    for p in diffs:
+        print(f"  [DIFF] {p}")
+    print(f"Golden: {len(current) - len(diffs) - len(missing)} identiques, "
+          f"{len(diffs)} differents, {len(missing)} sans reference")
+    return 1 if diffs else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
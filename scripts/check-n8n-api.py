@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Check of n8n_api.py and the watch-mode pusher against a fake n8n server.
+
+Starts an in-memory stand-in for the n8n public API (http.server on
+127.0.0.1, random port) that enforces what the real one enforces on
+/api/v1/workflows: API key header, no additional properties in the body,
+and optionally a rejected versionId (older n8n versions). Then pushes a
+corpus workflow with WorkflowPusher (watch-n8n-workflows.py) and checks:
+- create: POST /workflows with a filtered body, then /activate
+- update: PUT /workflows/<id> with the live versionId
+- update on an n8n that rejects versionId: retried without it
+
+Usage:
+  python3 check-n8n-api.py [workflow.json]
+
+  workflow.json:  workflow to push (default factures/invoice-convert-to-avoir.json)
+
+Exits with status 1 if a check fails.
+"""
+
+import sys
+import os
+import io
+import json
+import shutil
+import tempfile
+import threading
+import contextlib
+import importlib.util
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from n8n_api import N8nClient
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WORKFLOW = os.path.join(os.path.dirname(SCRIPTS_DIR), 'n8n_workflows', 'talosprimes',
+                                'factures', 'invoice-convert-to-avoir.json')
+API_KEY = 'check-key'
+
+_spec = importlib.util.spec_from_file_location(
+    'watch_n8n_workflows', os.path.join(SCRIPTS_DIR, 'watch-n8n-workflows.py'))
+watcher = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(watcher)
+
+
+class FakeN8nHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, as N8nClient expects
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method):
+        server = self.server
+        path = self.path.split('?')[0]
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        server.calls.append((method, path, body))
+
+        if self.headers.get('X-N8N-API-KEY') != API_KEY:
+            return self._reply(401, {'message': 'unauthorized'})
+        parts = path.split('/')[3:]  # /api/v1/workflows/<id>/activate
+        if not parts or parts[0] != 'workflows':
+            return self._reply(404, {'message': 'not found'})
+
+        if len(parts) == 1:
+            if method == 'GET':
+                return self._reply(200, {'data': [{'id': i, 'name': w['name']} for i, w in server.workflows.items()],
+                                         'nextCursor': None})
+            if method == 'POST':
+                error = server.check_body(body, allow_version=False)
+                if error:
+                    return self._reply(400, {'message': error})
+                return self._reply(200, server.store(str(len(server.workflows) + 1), body))
+
+        workflow = server.workflows.get(parts[1])
+        if workflow is None:
+            return self._reply(404, {'message': 'workflow not found'})
+        if len(parts) == 2 and method == 'GET':
+            return self._reply(200, workflow)
+        if len(parts) == 2 and method == 'PUT':
+            error = server.check_body(body, allow_version=not server.reject_version_id)
+            if error:
+                return self._reply(400, {'message': error})
+            if body.get('versionId') not in (None, workflow['versionId']):
+                return self._reply(400, {'message': 'versionId obsolete'})
+            return self._reply(200, server.store(parts[1], body, active=workflow['active']))
+        if parts[2:] == ['activate'] and method == 'POST':
+            workflow['active'] = True
+            return self._reply(200, workflow)
+        return self._reply(405, {'message': 'method not allowed'})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+
+class FakeN8n(ThreadingHTTPServer):
+    """In-memory n8n public API: workflows by id, log of the calls."""
+
+    KEYS = {'name', 'nodes', 'connections', 'settings', 'staticData'}
+
+    def __init__(self, reject_version_id=False):
+        super().__init__(('127.0.0.1', 0), FakeN8nHandler)
+        self.reject_version_id = reject_version_id
+        self.workflows = {}
+        self.calls = []
+        self._versions = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def check_body(self, body, allow_version):
+        allowed = self.KEYS | ({'versionId'} if allow_version else set())
+        extra = sorted(set(body or {}) - allowed)
+        if extra:
+            return f"request/body must NOT have additional properties ({', '.join(extra)})"
+        missing = [k for k in ('name', 'nodes', 'connections', 'settings') if k not in body]
+        if missing:
+            return f"request/body must have required property '{missing[0]}'"
+        return None
+
+    def store(self, workflow_id, body, active=False):
+        self._versions += 1
+        workflow = {**body, 'id': workflow_id, 'versionId': f'v{self._versions}', 'active': active}
+        self.workflows[workflow_id] = workflow
+        return workflow
+
+    def methods(self):
+        return [(method, path) for method, path, _ in self.calls if method != 'GET']
+
+
+def push(server, wf_path):
+    pusher = watcher.WorkflowPusher(N8nClient(server.url, API_KEY))
+    del server.calls[:]
+    with contextlib.redirect_stderr(io.StringIO()):
+        return pusher.safe_push(wf_path)
+
+
+def run_checks(wf_path):
+    results = []
+
+    def check(label, ok):
+        results.append(ok)
+        print(f"  [{'OK' if ok else 'ECHEC'}] {label}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, os.path.basename(wf_path))
+        shutil.copy(wf_path, path)
+        with open(path) as f:
+            name = json.load(f)['name']
+
+        server = FakeN8n()
+        try:
+            ok = push(server, path)
+            check("creation: POST /workflows puis /activate",
+                  ok and server.methods() == [('POST', '/api/v1/workflows'), ('POST', '/api/v1/workflows/1/activate')])
+            workflow = server.workflows.get('1', {})
+            check("creation: workflow actif, corps filtre", workflow.get('name') == name and workflow.get('active'))
+
+            with open(path) as f:
+                wf = json.load(f)
+            wf['nodes'][0]['position'] = [0, 0]
+            with open(path, 'w') as f:
+                json.dump(wf, f)
+            ok = push(server, path)
+            put = [body for method, _, body in server.calls if method == 'PUT']
+            check("mise a jour: PUT /workflows/1 avec le versionId actuel",
+                  ok and len(put) == 1 and put[0].get('versionId') == 'v1')
+            check("mise a jour: contenu remplace, workflow toujours actif",
+                  server.workflows['1']['nodes'][0]['position'] == [0, 0] and server.workflows['1']['active'])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        server = FakeN8n(reject_version_id=True)
+        try:
+            push(server, path)
+            ok = push(server, path)
+            put = [body for method, _, body in server.calls if method == 'PUT']
+            check("n8n refusant versionId: PUT rejoue sans versionId",
+                  ok and len(put) == 2 and 'versionId' in put[0] and 'versionId' not in put[1])
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    return all(results)
+
+
+if __name__ == '__main__':
+    wf_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_WORKFLOW
+    os.environ['CREDENTIAL_MAP'] = '{}'
+    sys.exit(0 if run_checks(wf_path) else 1)
@@ -0,0 +1,122 @@
+"""
+Minimal client for the n8n public REST API (/api/v1), stdlib only.
+
+Keeps one persistent HTTP connection per thread instead of opening a new
+socket (or spawning curl) for every call.
+
+Environment variables (same as update-vps.sh / backup-n8n.sh):
+  N8N_API_URL:  base URL (default http://localhost:5678)
+  N8N_API_KEY:  value of the X-N8N-API-KEY header
+"""
+
+import json
+import os
+import threading
+import http.client
+from urllib.parse import urlsplit, urlencode
+
+
+class N8nApiError(Exception):
+    def __init__(self, method, path, status, body=''):
+        self.status = status
+        self.body = body
+        super().__init__(f"{method} {path} -> HTTP {status}: {body[:200]}")
+
+
+class N8nClient:
+    """Thin wrapper around the endpoints used by the deploy scripts."""
+
+    # Keys accepted by PUT/POST /workflows (additionalProperties: false)
+    UPDATE_KEYS = {'name', 'nodes', 'connections', 'settings', 'staticData'}
+
+    def __init__(self, api_url=None, api_key=None, timeout=15):
+        self.api_url = (api_url or os.environ.get('N8N_API_URL') or 'http://localhost:5678').rstrip('/')
+        self.api_key = api_key if api_key is not None else os.environ.get('N8N_API_KEY', '')
+        self.timeout = timeout
+        parts = urlsplit(self.api_url)
+        self._scheme = parts.scheme
+        self._netloc = parts.netloc
+        self._prefix = parts.path.rstrip('/')
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+            conn = cls(self._netloc, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def request(self, method, path, body=None, params=None):
+        url = f"{self._prefix}/api/v1{path}"
+        if params:
+            url += '?' + urlencode(params)
+        headers = {'X-N8N-API-KEY': self.api_key, 'Accept': 'application/json'}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        # One retry: the server may have closed an idle keep-alive socket
+        for attempt in (0, 1):
+            conn = self._connection()
+            try:
+                conn.request(method, url, body=data, headers=headers)
+                resp = conn.getresponse()
+                raw = resp.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+
+        text = raw.decode('utf-8', errors='replace')
+        if resp.status >= 400:
+            raise N8nApiError(method, path, resp.status, text)
+        return json.loads(text) if text else {}
+
+    def list_workflows(self):
+        """All workflows (summary objects), following pagination."""
+        workflows = []
+        cursor = ''
+        for _ in range(50):
+            params = {'limit': 250}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.request('GET', '/workflows', params=params)
+            page = data.get('data', [])
+            workflows.extend(page)
+            cursor = data.get('nextCursor') or ''
+            if not cursor or not page:
+                break
+        return workflows
+
+    def get_workflow(self, workflow_id):
+        return self.request('GET', f'/workflows/{workflow_id}')
+
+    def update_workflow(self, workflow_id, payload):
+        """PUT with the live versionId; like update-vps.sh, retried without
+        versionId/staticData when the n8n version rejects them (HTTP 400)."""
+        body = {k: v for k, v in payload.items() if k in self.UPDATE_KEYS or k == 'versionId'}
+        try:
+            return self.request('PUT', f'/workflows/{workflow_id}', body=body)
+        except N8nApiError as e:
+            if e.status != 400 or not body.keys() & {'versionId', 'staticData'}:
+                raise
+        body.pop('versionId', None)
+        body.pop('staticData', None)
+        return self.request('PUT', f'/workflows/{workflow_id}', body=body)
+
+    def create_workflow(self, payload):
+        body = {k: v for k, v in payload.items() if k in self.UPDATE_KEYS}
+        body.setdefault('settings', {})
+        return self.request('POST', '/workflows', body=body)
+
+    def activate_workflow(self, workflow_id):
+        return self.request('POST', f'/workflows/{workflow_id}/activate')
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Concurrent snapshot of the live n8n workflows into a content-addressed store.
+
+Replaces the one-curl-per-workflow pattern (and the /tmp/n8n_current_*.json
+files) of the deploy scripts:
+- workflows are downloaded in parallel over keep-alive connections
+  (N8nClient keeps one per worker thread)
+- a workflow whose versionId/updatedAt did not change since the previous
+  snapshot is not downloaded again
+- every JSON document is stored once, gzip-compressed, under the SHA-256 of
+  its canonical form: identical workflows across runs share one object
+
+Store layout:
+  objects/ab/abcdef....json.gz   workflow / credentials documents
+  snapshots/<timestamp>.json     manifest: id -> name, versionId, object
+  LATEST                         name of the most recent manifest
+
+transform-n8n-workflow.py accepts the store directory in place of the
+current_n8n.json file and looks the workflow up by name in LATEST.
+
+Usage:
+  python3 n8n_snapshot.py take [store] [--workers N]
+  python3 n8n_snapshot.py show [store]
+  python3 n8n_snapshot.py get <store> <workflow name|id>
+
+Environment variables:
+  N8N_SNAPSHOT_DIR:  default store (default /home/root/n8n-agent/backups/snapshots)
+  N8N_API_URL, N8N_API_KEY:  see n8n_api.py
+"""
+
+import sys
+import os
+import json
+import gzip
+import time
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from n8n_api import N8nClient, N8nApiError
+
+DEFAULT_STORE = os.environ.get('N8N_SNAPSHOT_DIR', '/home/root/n8n-agent/backups/snapshots')
+
+
+def canonical_bytes(obj):
+    return json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+class SnapshotStore:
+    """Content-addressed, gzip-compressed JSON store with snapshot manifests."""
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.snapshots_dir = os.path.join(root, 'snapshots')
+        self._manifest = None
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + '.json.gz')
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def put(self, obj):
+        """Store a JSON document, return its digest. No-op if already stored."""
+        data = canonical_bytes(obj)
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            # mtime=0: the same document always compresses to the same bytes
+            self._write_atomic(path, gzip.compress(data, compresslevel=6, mtime=0))
+        return digest
+
+    def has(self, digest):
+        return os.path.exists(self._object_path(digest))
+
+    def get(self, digest):
+        with gzip.open(self._object_path(digest), 'rb') as f:
+            return json.loads(f.read())
+
+    def write_manifest(self, manifest):
+        taken_at = manifest['taken_at']
+        name = time.strftime('%Y%m%d-%H%M%S', time.gmtime(taken_at)) + f"-{int(taken_at * 1000) % 1000:03d}.json"
+        self._write_atomic(os.path.join(self.snapshots_dir, name),
+                           json.dumps(manifest, indent=2, ensure_ascii=False).encode())
+        self._write_atomic(os.path.join(self.root, 'LATEST'), name.encode())
+        self._manifest = manifest
+        return name
+
+    def latest_manifest(self):
+        if self._manifest is None:
+            try:
+                with open(os.path.join(self.root, 'LATEST')) as f:
+                    name = f.read().strip()
+                with open(os.path.join(self.snapshots_dir, name)) as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                return None
+        return self._manifest
+
+    def find_workflow(self, name=None, workflow_id=None):
+        """Full workflow from the latest snapshot, by id or exact name."""
+        manifest = self.latest_manifest()
+        if not manifest:
+            return None
+        workflows = manifest.get('workflows', {})
+        entry = workflows.get(str(workflow_id)) if workflow_id is not None else None
+        if entry is None and name:
+            entry = next((e for e in workflows.values() if e.get('name') == name), None)
+        return self.get(entry['object']) if entry else None
+
+
+def list_credentials(client, workflows):
+    """Credential metadata (id, name, type) — never the secrets.
+
+    Older n8n versions have no GET /credentials in the public API; the
+    references found in the workflows are always merged in.
+    """
+    creds = {}
+    try:
+        cursor = ''
+        for _ in range(20):
+            params = {'limit': 250}
+            if cursor:
+                params['cursor'] = cursor
+            data = client.request('GET', '/credentials', params=params)
+            for cred in data.get('data', []):
+                creds[str(cred.get('id'))] = {'id': str(cred.get('id')), 'name': cred.get('name'), 'type': cred.get('type')}
+            cursor = data.get('nextCursor') or ''
+            if not cursor:
+                break
+    except N8nApiError:
+        pass
+
+    for wf in workflows:
+        for node in wf.get('nodes', []):
+            for cred_type, info in (node.get('credentials') or {}).items():
+                if isinstance(info, dict) and info.get('id'):
+                    creds.setdefault(str(info['id']), {'id': str(info['id']), 'name': info.get('name'), 'type': cred_type})
+    return sorted(creds.values(), key=lambda c: c['id'])
+
+
+def take_snapshot(client, store, workers=8):
+    """Download all workflows concurrently into `store`; return the manifest."""
+    previous = (store.latest_manifest() or {}).get('workflows', {})
+    summaries = client.list_workflows()
+
+    def unchanged(summary):
+        prev = previous.get(str(summary.get('id')))
+        return (prev is not None and store.has(prev['object'])
+                and prev.get('versionId') == summary.get('versionId')
+                and prev.get('updatedAt') == summary.get('updatedAt'))
+
+    def fetch(summary):
+        if unchanged(summary):
+            return summary, None
+        # Recent n8n versions already return full workflows in the listing
+        if 'nodes' in summary and 'connections' in summary:
+            return summary, summary
+        return summary, client.get_workflow(summary['id'])
+
+    entries = {}
+    full_workflows = []
+    downloaded = reused = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for summary, full in pool.map(fetch, summaries):
+            wf_id = str(summary.get('id'))
+            if full is None:
+                entries[wf_id] = previous[wf_id]
+                full_workflows.append(store.get(previous[wf_id]['object']))
+                reused += 1
+                continue
+            entries[wf_id] = {
+                'name': full.get('name'),
+                'active': full.get('active'),
+                'versionId': full.get('versionId'),
+                'updatedAt': full.get('updatedAt'),
+                'object': store.put(full),
+            }
+            full_workflows.append(full)
+            downloaded += 1
+
+    manifest = {
+        'taken_at': time.time(),
+        'api_url': client.api_url,
+        'workflows': entries,
+        'credentials': store.put(list_credentials(client, full_workflows)),
+        'stats': {'downloaded': downloaded, 'reused': reused},
+    }
+    store.write_manifest(manifest)
+    return manifest
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    workers = 8
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+
+    if not args or args[0] not in ('take', 'show', 'get'):
+        print(f"Usage: {sys.argv[0]} take|show [store] | get <store> <name|id>", file=sys.stderr)
+        sys.exit(1)
+
+    command = args[0]
+    store = SnapshotStore(args[1] if len(args) > 1 else DEFAULT_STORE)
+
+    if command == 'take':
+        start = time.monotonic()
+        try:
+            manifest = take_snapshot(N8nClient(), store, workers=workers)
+        except (N8nApiError, OSError) as e:
+            print(f"  [ERREUR] snapshot impossible: {e}", file=sys.stderr)
+            sys.exit(1)
+        stats = manifest['stats']
+        print(f"  -> {len(manifest['workflows'])} workflows ({stats['downloaded']} telecharges, "
+              f"{stats['reused']} inchanges) en {time.monotonic() - start:.2f}s", file=sys.stderr)
+    elif command == 'show':
+        manifest = store.latest_manifest()
+        if not manifest:
+            print("  Aucun snapshot", file=sys.stderr)
+            sys.exit(1)
+        taken = time.strftime('%d/%m/%Y %H:%M:%S', time.localtime(manifest['taken_at']))
+        print(f"Snapshot du {taken} ({manifest['api_url']}) — {len(manifest['workflows'])} workflows")
+        for wf_id, entry in sorted(manifest['workflows'].items(), key=lambda kv: kv[1].get('name') or ''):
+            print(f"  {wf_id:<18} {'actif' if entry.get('active') else '     '}  {entry.get('name')}")
+    else:
+        if len(args) < 3:
+            print(f"Usage: {sys.argv[0]} get <store> <name|id>", file=sys.stderr)
+            sys.exit(1)
+        wf = store.find_workflow(name=args[2], workflow_id=args[2])
+        if wf is None:
+            print(f"  Workflow introuvable: {args[2]}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(wf))
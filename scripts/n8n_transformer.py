@@ -0,0 +1,21 @@
+"""
+Importable alias of transform-n8n-workflow.py.
+
+The script's file name contains dashes, so Python tools living next to it
+(watch mode, benchmarks, ...) load it through this module:
+
+  from n8n_transformer import transform_workflow
+"""
+
+import importlib.util
+import os
+
+_spec = importlib.util.spec_from_file_location(
+    'transform_n8n_workflow',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'transform-n8n-workflow.py'),
+)
+transformer = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(transformer)
+
+transform_workflow = transformer.transform_workflow
+WorkflowValidationError = transformer.WorkflowValidationError
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Indexed model of an n8n workflow + pre-deploy validator.
+
+Builds, in a single pass over the workflow JSON:
+- a name -> node map (O(1) lookups instead of linear scans)
+- the directed graph described by `connections`
+- the multiset of node names referenced from expressions
+  ($('Name'), $("Name"), $node["Name"], $items("Name"))
+
+and reports the problems that otherwise only show up at runtime inside n8n:
+- dangling references (expression or connection pointing to an unknown node)
+- ambiguous Parser node (several candidates at the same depth)
+- nodes unreachable from any trigger (warning; error when a reachable
+  node reads their output through $('...'))
+
+Usage:
+  python3 n8n_workflow_graph.py [--strict] <workflow.json|directory> [...]
+
+  --strict: warnings (dead branches) also count as errors
+
+Exits with status 1 if at least one workflow has errors.
+"""
+
+import sys
+import json
+import os
+import re
+from collections import Counter, deque
+
+
+# All the ways an n8n expression can point at another node by name
+NODE_REF_RE = re.compile(
+    r"""\$\(\s*'([^']+)'\s*\)"""
+    r"""|\$\(\s*"([^"]+)"\s*\)"""
+    r"""|\$node\[\s*'([^']+)'\s*\]"""
+    r"""|\$node\[\s*"([^"]+)"\s*\]"""
+    r"""|\$items\(\s*'([^']+)'"""
+    r"""|\$items\(\s*"([^"]+)\""""
+)
+
+# Node types that never take part in the execution graph
+IGNORED_TYPES = {'n8n-nodes-base.stickyNote'}
+
+# Node types that start an execution without an incoming connection
+TRIGGER_TYPES = {
+    'n8n-nodes-base.webhook',
+    'n8n-nodes-base.start',
+    'n8n-nodes-base.cron',
+    'n8n-nodes-base.interval',
+    'n8n-nodes-base.formTrigger',
+    'n8n-nodes-base.emailReadImap',
+}
+
+
+class WorkflowValidationError(Exception):
+    """Raised when a workflow must not be uploaded to n8n."""
+
+    def __init__(self, workflow_name, errors):
+        self.workflow_name = workflow_name
+        self.errors = list(errors)
+        super().__init__(f"{workflow_name}: " + '; '.join(self.errors))
+
+
+def iter_strings(value):
+    """Yield every string nested in a JSON value."""
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+
+
+def extract_references(value):
+    """Count the node names referenced from expressions inside `value`."""
+    refs = Counter()
+    for s in iter_strings(value):
+        # Cheap pre-filter: most parameters contain no expression at all
+        if '$' not in s:
+            continue
+        for match in NODE_REF_RE.finditer(s):
+            refs[next(g for g in match.groups() if g is not None)] += 1
+    return refs
+
+
+def is_trigger(node):
+    node_type = node.get('type', '')
+    return node_type in TRIGGER_TYPES or node_type.lower().endswith('trigger')
+
+
+class WorkflowGraph:
+    """Index of one workflow: nodes by name, edges, references."""
+
+    def __init__(self, wf):
+        self.name = wf.get('name', '?')
+        self.nodes = wf.get('nodes', []) or []
+        self.by_name = {}
+        self.duplicates = []
+        for node in self.nodes:
+            node_name = node.get('name', '')
+            if node_name in self.by_name:
+                self.duplicates.append(node_name)
+            self.by_name[node_name] = node
+
+        # successors[src] -> [(dst, connection_type)]
+        self.successors = {}
+        self.predecessors = {}
+        self.unknown_connections = []
+        for src, outputs in (wf.get('connections') or {}).items():
+            if src not in self.by_name:
+                self.unknown_connections.append(src)
+            for conn_type, branches in (outputs or {}).items():
+                for branch in branches or []:
+                    for target in branch or []:
+                        dst = target.get('node', '')
+                        if dst not in self.by_name:
+                            self.unknown_connections.append(dst)
+                        self.successors.setdefault(src, []).append((dst, conn_type))
+                        self.predecessors.setdefault(dst, []).append((src, conn_type))
+
+        self.references = Counter()
+        self.references_by_node = {}
+        for node in self.nodes:
+            refs = extract_references(node.get('parameters', {}))
+            if refs:
+                self.references_by_node[node.get('name', '')] = refs
+                self.references.update(refs)
+
+    def get(self, node_name):
+        return self.by_name.get(node_name)
+
+    def triggers(self):
+        return [n['name'] for n in self.nodes
+                if is_trigger(n) and n.get('type') not in IGNORED_TYPES]
+
+    def depths(self):
+        """BFS distance of each node from the nearest trigger."""
+        dist = {}
+        queue = deque()
+        for name in self.triggers():
+            dist[name] = 0
+            queue.append(name)
+        while queue:
+            current = queue.popleft()
+            for dst, conn_type in self.successors.get(current, []):
+                if dst not in dist:
+                    dist[dst] = dist[current] + 1
+                    queue.append(dst)
+            # AI sub-nodes (model, memory, tools) point *to* their parent
+            # with a non-"main" connection: they run whenever the parent runs
+            for src, conn_type in self.predecessors.get(current, []):
+                if conn_type != 'main' and src not in dist:
+                    dist[src] = dist[current]
+                    queue.append(src)
+        return dist
+
+    def parser_candidates(self):
+        return [n['name'] for n in self.nodes if 'parser' in n.get('name', '').lower()]
+
+    def parser_node(self):
+        """Return (parser_name, ambiguous).
+
+        With several candidates, the one closest to a trigger wins. If that
+        does not single one out, the first in node order is returned and
+        `ambiguous` tells the caller that using it would be a guess.
+        """
+        candidates = self.parser_candidates()
+        if not candidates:
+            return None, False
+        if len(candidates) == 1:
+            return candidates[0], False
+        dist = self.depths()
+        best = min(dist.get(c, float('inf')) for c in candidates)
+        nearest = [c for c in candidates if dist.get(c, float('inf')) == best]
+        if len(nearest) == 1 and best != float('inf'):
+            return nearest[0], False
+        return candidates[0], True
+
+    def unreachable(self):
+        dist = self.depths()
+        return [n['name'] for n in self.nodes
+                if n.get('type') not in IGNORED_TYPES and n['name'] not in dist]
+
+    def dangling_references(self):
+        return sorted(name for name in self.references if name not in self.by_name)
+
+    def errors(self):
+        """List every problem that would break the workflow inside n8n."""
+        errors = []
+        for name in sorted(set(self.duplicates)):
+            errors.append(f"nom de node duplique: '{name}'")
+        for name in sorted(set(self.unknown_connections)):
+            errors.append(f"connexion vers un node inexistant: '{name}'")
+        for name in self.dangling_references():
+            users = sorted(n for n, refs in self.references_by_node.items() if name in refs)
+            errors.append(f"reference $('{name}') inexistante (dans {', '.join(users)})")
+        if self.nodes and not self.triggers():
+            errors.append("aucun trigger")
+            return errors
+        # A dead branch is harmless until live code reads its output
+        dead = set(self.unreachable())
+        for user, refs in sorted(self.references_by_node.items()):
+            if user in dead:
+                continue
+            for name in sorted(set(refs) & dead):
+                errors.append(f"'{user}' lit $('{name}') qui n'est jamais execute")
+        return errors
+
+    def warnings(self):
+        if not self.triggers():
+            return []
+        return [f"node inatteignable depuis un trigger: '{name}'" for name in self.unreachable()]
+
+    def validate(self):
+        errors = self.errors()
+        if errors:
+            raise WorkflowValidationError(self.name, errors)
+
+
+def iter_workflow_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for fname in sorted(files):
+                    if fname.endswith('.json'):
+                        yield os.path.join(root, fname)
+        else:
+            yield path
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    strict = '--strict' in args
+    paths = [a for a in args if a != '--strict']
+    if not paths:
+        print(f"Usage: {sys.argv[0]} [--strict] <workflow.json|directory> [...]", file=sys.stderr)
+        sys.exit(1)
+
+    checked = 0
+    failed = 0
+    for wf_path in iter_workflow_files(paths):
+        checked += 1
+        warnings = []
+        try:
+            with open(wf_path) as f:
+                graph = WorkflowGraph(json.load(f))
+            errors = graph.errors()
+            warnings = graph.warnings()
+        except (OSError, ValueError) as e:
+            errors = [f"JSON illisible: {e}"]
+        if strict:
+            errors, warnings = errors + warnings, []
+        if errors:
+            failed += 1
+            print(f"[ERREUR] {wf_path}", file=sys.stderr)
+        elif warnings:
+            print(f"[WARN] {wf_path}", file=sys.stderr)
+        for msg in errors + warnings:
+            print(f"      {msg}", file=sys.stderr)
+
+    print(f"{checked} workflows verifies, {failed} en erreur", file=sys.stderr)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Batch provisioning of the n8n workflows of client tenants.
+
+Replaces copying workflow JSONs from n8n_workflows/talosprimes into
+n8n_workflows/clients, hand-editing them and running
+transform-n8n-workflow.py once per file: for each tenant, the workflows of
+its plan are instantiated from the templates and transformed with
+transform_workflow() in the same process, and the API payloads are written
+to n8n_workflows/clients/<code>/ (same layout as the template tree).
+
+Workflow set of a tenant:
+- the base workflows (SOCLE) plus the templates of each module of its plan
+  (MODULE_TEMPLATES); modules are the `categorie` of the
+  catalogue_automatisations of data/tarifs-talosprimes.json
+- the plan (formules_abonnement) caps the number of modules; an unlimited
+  plan gets every module by default and may add template patterns of its
+  own ("extras")
+
+Templates:
+- parameterised templates (automations/templates/email-read.json, ...)
+  carry {{ CLIENT_CODE }}, {{ CLIENT_NAME }}, {{ TENANT_ID }} placeholders,
+  or any key of the tenant's "parametres"; they are substituted as is
+- the shared (multi-tenant) templates get the tenant's copy convention:
+  name "[<code>] ...", webhook path "client/<code>/<path>"; the code is
+  unique (one per tenant of the batch) where display names may collide
+- calls to the webhook of another workflow of the set
+  (https://n8n.talosprimes.com/webhook/<path>, localhost:5678, ...) are
+  redirected to the tenant's copy; calls to workflows outside the set keep
+  pointing at the shared TalosPrimes ones
+
+Each template is read once for the whole batch: a tenant only costs one
+json.loads, the rewrites and transform_workflow() per workflow.
+
+Usage:
+  python3 provision-n8n-tenants.py [options] <tenants.json>
+
+  tenants.json:       list of tenants (or a single one), e.g.
+                        {"code": "acme", "nom": "ACME SARL",
+                         "tenant_id": "0b6f...", "formule": "Business",
+                         "modules": ["crm", "comptabilite", "email"],
+                         "parametres": {"SENDER_EMAIL": "contact@acme.fr"}}
+  --templates DIR:    template tree (default n8n_workflows/talosprimes)
+  --catalog FILE:     pricing catalog (default data/tarifs-talosprimes.json)
+  --out DIR:          output tree (default n8n_workflows/clients)
+  --snapshot STORE:   snapshot store of the live workflows (n8n_snapshot.py):
+                      tenants already provisioned keep their versionId and
+                      credentials; a live workflow is matched by name and,
+                      when the workflow uses the tenant's webhooks
+                      (client/<code>/...), must use them too: names taken
+                      from CLIENT_NAME may be shared by several tenants
+  --verbose:          keep the transformer's diagnostics on stderr
+
+Environment variables:
+  CREDENTIAL_MAP, N8N_SKIP_VALIDATION:  see transform-n8n-workflow.py
+
+Exits with status 1 if a tenant is invalid or a workflow fails validation
+(the payloads of the other workflows are still written).
+"""
+
+import sys
+import os
+import re
+import glob
+import json
+import time
+import contextlib
+
+from n8n_snapshot import SnapshotStore
+from n8n_transformer import transform_workflow, WorkflowValidationError
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+DEFAULT_TEMPLATES = os.path.join(REPO_ROOT, 'n8n_workflows', 'talosprimes')
+DEFAULT_CATALOG = os.path.join(REPO_ROOT, 'data', 'tarifs-talosprimes.json')
+DEFAULT_OUT = os.path.join(REPO_ROOT, 'n8n_workflows', 'clients')
+
+# Workflows of every tenant, whatever its plan (patterns relative to the template tree)
+SOCLE = ('config/*.json', 'notifications/*.json', 'logs/*.json')
+
+# Catalog module (catalogue_automatisations[].categorie) -> template patterns
+MODULE_TEMPLATES = {
+    'email': (
+        'newsletter/*.json',
+        'automations/templates/email-read.json',
+        'automations/templates/email-send.json',
+        'automations/templates/email-watch.json',
+    ),
+    'telephone': ('agent-telephonique/*.json',),
+    'crm': (
+        'clients-workflows/client-create.json',
+        'clients-workflows/client-create-from-lead.json',
+        'clients-workflows/client-delete.json',
+        'clients-workflows/client-deleted-cleanup-lead.json',
+        'clients-workflows/client-get.json',
+        'clients-workflows/client-update.json',
+        'clients-workflows/clients-list.json',
+        'client-spaces/*.json',
+        'devis/*.json',
+        'factures/*.json',
+        'bons-commande/*.json',
+        'avoir/*.json',
+        'proforma/*.json',
+        'article-codes/*.json',
+    ),
+    'comptabilite': ('comptabilite/*.json',),
+    'marketing': ('marketing/*.json', 'leads/*.json'),
+}
+
+# Same syntax as the placeholders of automations/templates/*.json
+PLACEHOLDER_RE = re.compile(r'\{\{\s*([A-Z][A-Z0-9_]*)\s*\}\}')
+WEBHOOK_CALL_RE = re.compile(r'(/webhook(?:-test)?/)([\w\-]+(?:/[\w\-]+)*)')
+NAME_TAG_RE = re.compile(r'^\[[^\]]*\]\s*')
+CODE_RE = re.compile(r'^[a-z0-9][a-z0-9-]*$')
+WEBHOOK_TYPE = 'n8n-nodes-base.webhook'
+
+
+class Catalog:
+    """Modules and plans of the pricing catalog."""
+
+    def __init__(self, path):
+        with open(path) as f:
+            data = json.load(f)
+        self.modules = [m['categorie'] for m in data.get('catalogue_automatisations', [])]
+        self.formules = {f['nom']: f for f in data.get('formules_abonnement', [])}
+
+    def patterns(self, tenant):
+        """Template patterns of a tenant; ValueError if its plan does not allow them."""
+        code = tenant.get('code') or ''
+        if not CODE_RE.match(code):
+            raise ValueError(f"code client invalide: {code!r} (minuscules, chiffres et tirets)")
+        for key in ('nom', 'tenant_id'):
+            if not tenant.get(key):
+                raise ValueError(f"{code}: champ '{key}' manquant")
+
+        formule = self.formules.get(tenant.get('formule'))
+        if formule is None:
+            raise ValueError(f"{code}: formule inconnue {tenant.get('formule')!r} "
+                             f"(attendu : {', '.join(self.formules)})")
+        limit = formule.get('modules_inclus')
+        unlimited = not isinstance(limit, int)
+
+        modules = tenant.get('modules')
+        if modules is None:
+            if not unlimited:
+                raise ValueError(f"{code}: modules a preciser (formule {formule['nom']}, {limit} au choix)")
+            modules = self.modules
+        unknown = [m for m in modules if m not in self.modules]
+        if unknown:
+            raise ValueError(f"{code}: module(s) hors catalogue: {', '.join(unknown)} "
+                             f"(attendu : {', '.join(self.modules)})")
+        if not unlimited and len(set(modules)) > limit:
+            raise ValueError(f"{code}: la formule {formule['nom']} inclut {limit} module(s), "
+                             f"{len(set(modules))} demandes")
+        extras = tenant.get('extras') or []
+        if extras and not unlimited:
+            raise ValueError(f"{code}: templates supplementaires non inclus dans la formule {formule['nom']}")
+
+        patterns = list(SOCLE)
+        for module in modules:
+            if module not in MODULE_TEMPLATES:
+                raise ValueError(f"module {module} sans templates (MODULE_TEMPLATES)")
+            patterns.extend(MODULE_TEMPLATES[module])
+        return patterns + list(extras)
+
+
+class Template:
+    """One template file, read and indexed once for the whole batch."""
+
+    def __init__(self, root, rel):
+        self.rel = rel
+        with open(os.path.join(root, rel)) as f:
+            self.text = f.read()
+        self.placeholders = set(PLACEHOLDER_RE.findall(self.text))
+        wf = json.loads(self.text)
+        # Webhook paths that the tenant's copy moves under client/<code>/
+        self.paths = set() if self.placeholders else {
+            node['parameters']['path'] for node in wf.get('nodes', [])
+            if node.get('type') == WEBHOOK_TYPE and node.get('parameters', {}).get('path')
+        }
+
+    def instantiate(self, tenant, values, redirects):
+        """Fresh workflow dict for one tenant.
+
+        values: placeholder -> JSON-escaped text; redirects: webhook path
+        of the set -> path of the tenant's copy.
+        """
+        text = self.text
+        if self.placeholders:
+            missing = self.placeholders - values.keys()
+            if missing:
+                raise ValueError(f"{tenant['code']}: {self.rel}: parametre(s) "
+                                 f"{', '.join(sorted(missing))} non fourni(s)")
+            text = PLACEHOLDER_RE.sub(lambda m: values[m.group(1)], text)
+        text = WEBHOOK_CALL_RE.sub(lambda m: m.group(1) + redirects.get(m.group(2), m.group(2)), text)
+        wf = json.loads(text)
+
+        if not self.placeholders:
+            wf['name'] = f"[{tenant['code']}] " + NAME_TAG_RE.sub('', wf.get('name', ''))
+            for node in wf.get('nodes', []):
+                params = node.get('parameters', {})
+                if node.get('type') == WEBHOOK_TYPE and params.get('path') in redirects:
+                    params['path'] = redirects[params['path']]
+        return wf
+
+
+class Provisioner:
+    """Instantiates and transforms the workflow sets of tenants, sharing templates."""
+
+    def __init__(self, catalog, templates_root=DEFAULT_TEMPLATES, out_root=DEFAULT_OUT,
+                 snapshot=None, verbose=False):
+        self.catalog = catalog
+        self.templates_root = templates_root
+        self.out_root = out_root
+        self.templates = {}  # relative path -> Template
+        self.rejected = {}   # relative path -> (errors, [tenant codes])
+        self.codes = set()   # tenants provisioned so far
+        self.store = SnapshotStore(snapshot) if snapshot else None
+        self.live = {}       # workflow name -> [snapshot object digests]
+        if self.store:
+            manifest = self.store.latest_manifest() or {}
+            for entry in manifest.get('workflows', {}).values():
+                self.live.setdefault(entry.get('name'), []).append(entry['object'])
+        self.quiet = None if verbose else open(os.devnull, 'w')
+
+    def resolve(self, patterns):
+        """Templates matching the patterns, in tree order, each read once."""
+        selected = []
+        for pattern in patterns:
+            paths = sorted(glob.glob(os.path.join(self.templates_root, pattern)))
+            if not paths:
+                raise ValueError(f"aucun template pour {pattern}")
+            for path in paths:
+                rel = os.path.relpath(path, self.templates_root)
+                if rel not in self.templates:
+                    self.templates[rel] = Template(self.templates_root, rel)
+                if self.templates[rel] not in selected:
+                    selected.append(self.templates[rel])
+        return selected
+
+    def _current(self, wf, code):
+        """Live copy of the tenant's wf in the snapshot, or None (new or ambiguous)."""
+        candidates = [self.store.get(digest) for digest in self.live.get(wf.get('name'), ())]
+        # A name taken from CLIENT_NAME may be another tenant's: keep the
+        # copies that use this tenant's webhooks, as wf does
+        marker = f"client/{code}/"
+        if candidates and marker in json.dumps(wf, ensure_ascii=False):
+            candidates = [c for c in candidates if marker in json.dumps(c, ensure_ascii=False)]
+        return candidates[0] if len(candidates) == 1 else None
+
+    def _transform(self, template, wf, code):
+        current = self._current(wf, code)
+        if self.quiet is None:
+            return transform_workflow(template.rel, current_wf=current, workflow=wf)
+        with contextlib.redirect_stderr(self.quiet):
+            return transform_workflow(template.rel, current_wf=current, workflow=wf)
+
+    def provision(self, tenant):
+        """Write the payloads of one tenant; returns (written, total)."""
+        templates = self.resolve(self.catalog.patterns(tenant))
+        code = tenant['code']
+        if code in self.codes:
+            raise ValueError(f"{code}: code client en double dans le lot")
+        self.codes.add(code)
+        values = {k: json.dumps(str(v))[1:-1] for k, v in {
+            **(tenant.get('parametres') or {}),
+            'CLIENT_CODE': code,
+            'CLIENT_NAME': tenant['nom'],
+            'TENANT_ID': tenant['tenant_id'],
+        }.items()}
+        redirects = {path: f"client/{code}/{path}" for t in templates for path in t.paths}
+
+        workflows = [(t, t.instantiate(tenant, values, redirects)) for t in templates]
+        written = 0
+        for template, wf in workflows:
+            try:
+                payload = self._transform(template, wf, code)
+            except WorkflowValidationError as e:
+                self.rejected.setdefault(template.rel, (e.errors, []))[1].append(code)
+                continue
+            path = os.path.join(self.out_root, code, template.rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(json.dumps(payload))
+            written += 1
+        return written, len(templates)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    options = {'--templates': DEFAULT_TEMPLATES, '--catalog': DEFAULT_CATALOG,
+               '--out': DEFAULT_OUT, '--snapshot': None}
+    verbose = False
+    inputs = []
+    i = 0
+    while i < len(args):
+        if args[i] in options:
+            options[args[i]] = args[i + 1]
+            i += 2
+            continue
+        if args[i] == '--verbose':
+            verbose = True
+        else:
+            inputs.append(args[i])
+        i += 1
+
+    if len(inputs) != 1:
+        print(f"Usage: {sys.argv[0]} [--templates DIR] [--catalog FILE] [--out DIR] "
+              f"[--snapshot STORE] [--verbose] <tenants.json>", file=sys.stderr)
+        sys.exit(1)
+
+    with open(inputs[0]) as f:
+        tenants = json.load(f)
+    if isinstance(tenants, dict):
+        tenants = [tenants]
+
+    provisioner = Provisioner(Catalog(options['--catalog']), options['--templates'], options['--out'],
+                              options['--snapshot'], verbose)
+    start = time.monotonic()
+    failed = 0
+    total = 0
+    for tenant in tenants:
+        try:
+            written, count = provisioner.provision(tenant)
+        except (ValueError, OSError) as e:
+            failed += 1
+            print(f"  [ERREUR] {e}", file=sys.stderr)
+            continue
+        total += written
+        print(f"  [OK] {tenant['code']}: {written}/{count} workflows ({tenant['formule']})", file=sys.stderr)
+
+    for rel, (errors, codes) in sorted(provisioner.rejected.items()):
+        print(f"  [REJET] {rel} ({len(codes)} clients): {'; '.join(errors)}", file=sys.stderr)
+
+    elapsed = time.monotonic() - start
+    print(f"{len(tenants) - failed} clients, {total} workflows ecrits dans {options['--out']} "
+          f"en {elapsed:.2f}s ({len(provisioner.templates)} templates lus)", file=sys.stderr)
+    sys.exit(1 if failed or provisioner.rejected else 0)
@@ -7,18 +7,24 @@ Applies all fixes from reimport-n8n-workflows.sh:
 - Postgres nodes: Jinja syntax, each(item), $json -> explicit Parser refs, schema fixes
 - Credential ID replacement
 - Cleanup read-only fields
+- Pre-deploy validation (dangling $('...') refs, ambiguous Parser, dead branches)
 
 Usage:
   python3 transform-n8n-workflow.py <workflow.json> [current_n8n.json]
 
   - workflow.json:     the backup JSON to transform
   - current_n8n.json:  (optional) the current workflow from n8n API, used to extract real credential IDs
+                       — or a snapshot store directory (n8n_snapshot.py): the
+                       workflow is then looked up in its latest snapshot, by
+                       id with "<store>#<id>", else by name
 
 Environment variables:
-  CREDENTIAL_MAP:  JSON string mapping credential names to IDs (fallback)
+  CREDENTIAL_MAP:        JSON string mapping credential names to IDs (fallback)
+  N8N_SKIP_VALIDATION:   set to 1 to upload even if validation fails
 
 Outputs transformed JSON to stdout.
 Diagnostic messages go to stderr.
+Exits with status 1 (nothing on stdout) if the workflow fails validation.
 """
 
 import sys
@@ -27,13 +33,14 @@ import os
 import re
 import traceback
 
+from n8n_workflow_graph import WorkflowGraph, WorkflowValidationError
+from n8n_snapshot import SnapshotStore
+
 
 def find_parser_node(nodes):
     """Find the Parser node name dynamically."""
-    for node in nodes:
-        if 'parser' in node.get('name', '').lower():
-            return node['name']
-    return None
+    parser_node_name, _ = WorkflowGraph({'nodes': nodes}).parser_node()
+    return parser_node_name
 
 
 def fix_code_node(node, parser_node_name):
@@ -211,17 +218,48 @@ def fix_postgres_node(node, parser_node_name):
     params['query'] = query
 
 
-def transform_workflow(wf_path, current_n8n_path=None):
-    """Main transformation pipeline.
+def validate_workflow(graph_before, graph_after, parser_node_name, parser_ambiguous):
+    """Raise WorkflowValidationError if the transformed workflow is broken."""
+    errors = graph_after.errors()
+
+    # An ambiguous Parser only matters if the fixes actually wrote refs to it
+    if parser_ambiguous and graph_after.references[parser_node_name] > graph_before.references[parser_node_name]:
+        candidates = ', '.join(graph_after.parser_candidates())
+        errors.append(f"node Parser ambigu ({candidates}) — '{parser_node_name}' choisi au hasard")
+
+    for warning in graph_after.warnings():
+        print(f"      ATTENTION: {warning}", file=sys.stderr)
+
+    if not errors:
+        return
+    for err in errors:
+        print(f"      ERREUR validation: {err}", file=sys.stderr)
+    if os.environ.get('N8N_SKIP_VALIDATION') == '1':
+        print("      N8N_SKIP_VALIDATION=1 — upload quand meme", file=sys.stderr)
+        return
+    raise WorkflowValidationError(graph_after.name, errors)
+
+
+def transform_workflow(wf_path, current_n8n_path=None, current_wf=None, workflow=None):
+    """Main transformation pipeline. Returns the payload for the n8n API.
 
     CREDENTIAL STRATEGY: Never replace credentials from the backup JSON.
     Instead, copy credentials directly from the current n8n workflow (node by node).
     This ensures credentials are never lost or corrupted during deployment.
+
+    The current workflow comes either from a file (current_n8n_path) or,
+    for long-running callers that already fetched it, as a dict (current_wf).
+
+    Callers that build the workflow in memory (provision-n8n-tenants.py)
+    pass it as `workflow` instead of wf_path; the dict is modified in place.
     """
 
     # Load the workflow backup
-    with open(wf_path) as f:
-        wf = json.load(f)
+    if workflow is not None:
+        wf = workflow
+    else:
+        with open(wf_path) as f:
+            wf = json.load(f)
 
     wf.setdefault('settings', {})
 
@@ -240,19 +278,31 @@ def transform_workflow(wf_path, current_n8n_path=None):
     # ==================================================================
     current_node_creds = {}  # node_name -> credentials dict
     current_cred_by_name = {}  # cred_name -> {id, name}
-    if current_n8n_path and os.path.exists(current_n8n_path):
+    # "<store>#<id>": snapshot store + id of the live workflow (by name without id)
+    store_dir, _, current_id = (current_n8n_path or '').partition('#')
+    if current_wf is None and current_n8n_path and (os.path.isdir(store_dir) or os.path.exists(current_n8n_path)):
+        try:
+            if os.path.isdir(store_dir):
+                store = SnapshotStore(store_dir)
+                if current_id:
+                    current_wf = store.find_workflow(workflow_id=current_id)
+                else:
+                    current_wf = store.find_workflow(name=wf.get('name'))
+                print(f"      Workflow actuel lu depuis le snapshot: {'trouve' if current_wf else 'absent'}", file=sys.stderr)
+            else:
+                with open(current_n8n_path) as f:
+                    current_wf = json.load(f)
+        except Exception as e:
+            print(f"      ERREUR lecture workflow n8n actuel: {e}", file=sys.stderr)
+    if current_wf:
         try:
-            with open(current_n8n_path) as f:
-                current_wf = json.load(f)
-
             # Inject versionId from current n8n workflow (required for PUT API)
             current_version_id = current_wf.get('versionId')
             if current_version_id:
                 wf['versionId'] = current_version_id
                 print(f"      versionId injecte: {current_version_id}", file=sys.stderr)
 
-            for node in current_wf.get('nodes', []):
-                node_name = node.get('name', '')
+            for node_name, node in WorkflowGraph(current_wf).by_name.items():
                 creds = node.get('credentials', {})
                 if creds and node_name:
                     current_node_creds[node_name] = creds
@@ -270,7 +320,8 @@ def transform_workflow(wf_path, current_n8n_path=None):
     # TRANSFORMATIONS (code fixes, query fixes)
     # ==================================================================
     nodes = wf.get('nodes', [])
-    parser_node_name = find_parser_node(nodes)
+    graph = WorkflowGraph(wf)
+    parser_node_name, parser_ambiguous = graph.parser_node()
 
     transform_count = 0
     for node in nodes:
@@ -335,6 +386,12 @@ def transform_workflow(wf_path, current_n8n_path=None):
     wf.setdefault('connections', {})
     wf.setdefault('settings', {})
 
+    # ==================================================================
+    # VALIDATION (fail fast instead of breaking at runtime inside n8n)
+    # Re-index after the fixes: they inject refs like $('08. Prepare Lines')
+    # ==================================================================
+    validate_workflow(graph, WorkflowGraph(wf), parser_node_name, parser_ambiguous)
+
     # STRICT WHITELIST: only output properties accepted by n8n v1 PUT API
     # This prevents "request/body must NOT have additional properties" errors
     # when the n8n API has additionalProperties: false in its schema
@@ -344,8 +401,7 @@ def transform_workflow(wf_path, current_n8n_path=None):
         wf.pop(k, None)
         print(f"      Removed extra top-level key: {k}", file=sys.stderr)
 
-    # Output transformed JSON
-    print(json.dumps(wf))
+    return wf
 
 
 if __name__ == '__main__':
@@ -357,7 +413,13 @@ if __name__ == '__main__':
     current_path = sys.argv[2] if len(sys.argv) > 2 else None
 
     try:
-        transform_workflow(wf_path, current_path)
+        payload = transform_workflow(wf_path, current_path)
+    except WorkflowValidationError as e:
+        print(f"      Workflow rejete avant upload: {e.workflow_name}", file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         traceback.print_exc(file=sys.stderr)
         sys.exit(1)
+
+    # Output transformed JSON
+    print(json.dumps(payload))
@@ -1027,6 +1027,17 @@ print(json.dumps({'data': all_workflows}))
         WF_COUNT=$(echo "$EXISTING_WORKFLOWS" | python3 -c "import sys,json; print(len(json.load(sys.stdin).get('data',[])))" 2>/dev/null || echo "?")
         log_info "$WF_COUNT workflows existants dans n8n"
 
+        # Snapshot concurrent des workflows live (remplace un curl par workflow
+        # + /tmp/n8n_current_*.json). En cas d'echec, on garde l'ancien chemin.
+        N8N_SNAPSHOT_DIR="${N8N_SNAPSHOT_DIR:-/home/root/n8n-agent/backups/snapshots}"
+        N8N_SNAPSHOT_OK=false
+        if [ -f "$PROJECT_DIR/scripts/n8n_snapshot.py" ] && \
+           python3 "$PROJECT_DIR/scripts/n8n_snapshot.py" take "$N8N_SNAPSHOT_DIR"; then
+          N8N_SNAPSHOT_OK=true
+        else
+          log_warn "Snapshot n8n indisponible — recuperation workflow par workflow"
+        fi
+
         N8N_TOTAL=0
         N8N_SUCCESS=0
         N8N_ERRORS=0
@@ -1072,16 +1083,22 @@ for w in data.get('data', []):
 
           if [ -n "$existing_id" ]; then
             # --- UPDATE: recuperer le workflow actuel (credentials + versionId) ---
+            transform_script="$PROJECT_DIR/scripts/transform-n8n-workflow.py"
             tmp_current="/tmp/n8n_current_$existing_id.json"
-            curl -s -H "X-N8N-API-KEY: $N8N_API_KEY" \
-              "$N8N_API_URL/api/v1/workflows/$existing_id" > "$tmp_current" 2>/dev/null || echo "{}" > "$tmp_current"
+            if [ "$N8N_SNAPSHOT_OK" = true ] && [ -f "$transform_script" ]; then
+              # Le script de transformation lit directement le snapshot (par id)
+              current_src="$N8N_SNAPSHOT_DIR#$existing_id"
+            else
+              curl -s -H "X-N8N-API-KEY: $N8N_API_KEY" \
+                "$N8N_API_URL/api/v1/workflows/$existing_id" > "$tmp_current" 2>/dev/null || echo "{}" > "$tmp_current"
+              current_src="$tmp_current"
+            fi
 
             # Transformer: merger credentials du workflow actuel dans le nouveau
-            transform_script="$PROJECT_DIR/scripts/transform-n8n-workflow.py"
             tmp_pyerr="/tmp/n8n_pyerr_$existing_id.txt"
 
             if [ -f "$transform_script" ]; then
-              payload=$(python3 "$transform_script" "$file" "$tmp_current" 2>"$tmp_pyerr")
+              payload=$(python3 "$transform_script" "$file" "$current_src" 2>"$tmp_pyerr")
             else
               # Fallback: transformation minimale (credentials seulement)
               payload=$(python3 -c "
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Watch mode: push edited n8n workflow JSONs to n8n as soon as they are saved.
+
+Instead of rerunning the full update-vps.sh sync after every edit, this
+long-running process polls the workflow tree, waits until a touched file
+is stable (debounce), runs transform_workflow() on that file only and
+PUTs the result to the n8n API (POST if the workflow does not exist yet).
+
+Usage:
+  python3 watch-n8n-workflows.py [options] [path ...]
+
+  path:             files or directories to watch
+                    (default: n8n_workflows/talosprimes)
+  --interval SEC:   polling period (default 0.25)
+  --debounce SEC:   quiet time before pushing a changed file (default 0.3)
+  --no-activate:    do not call /activate after the push
+  --once:           push the given files immediately and exit
+
+Environment variables:
+  N8N_API_URL:     n8n endpoint (default http://localhost:5678) — point it
+                   at a local fake server to test without a real n8n
+  N8N_API_KEY:     API key
+  CREDENTIAL_MAP:  see transform-n8n-workflow.py
+"""
+
+import sys
+import os
+import json
+import time
+
+from n8n_api import N8nClient, N8nApiError
+from n8n_transformer import transform_workflow, WorkflowValidationError
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROOT = os.path.join(os.path.dirname(SCRIPTS_DIR), 'n8n_workflows', 'talosprimes')
+
+
+def scan(paths):
+    """Map each watched .json file to its (mtime_ns, size)."""
+    state = {}
+    stack = list(paths)
+    while stack:
+        path = stack.pop()
+        try:
+            if os.path.isdir(path):
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.endswith('.json'):
+                            st = entry.stat()
+                            state[entry.path] = (st.st_mtime_ns, st.st_size)
+            elif path.endswith('.json'):
+                st = os.stat(path)
+                state[path] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            # Editors often delete + rename on save
+            continue
+    return state
+
+
+class WorkflowPusher:
+    """Transforms one file and pushes it, caching name -> id lookups."""
+
+    def __init__(self, client, activate=True):
+        self.client = client
+        self.activate = activate
+        self.ids = None
+
+    def _workflow_id(self, name):
+        if self.ids is None or name not in self.ids:
+            self.ids = {w.get('name'): w.get('id') for w in self.client.list_workflows()}
+        return self.ids.get(name)
+
+    def push(self, wf_path):
+        start = time.monotonic()
+        with open(wf_path) as f:
+            name = json.load(f).get('name', '')
+        if not name:
+            print(f"  [SKIP] {wf_path}: pas de champ 'name'", file=sys.stderr)
+            return False
+
+        wf_id = self._workflow_id(name)
+        if wf_id:
+            current = self.client.get_workflow(wf_id)
+            payload = transform_workflow(wf_path, current_wf=current)
+            self.client.update_workflow(wf_id, payload)
+            action = 'UPDATE'
+        else:
+            payload = transform_workflow(wf_path)
+            wf_id = self.client.create_workflow(payload).get('id')
+            self.ids[name] = wf_id
+            action = 'CREATE'
+
+        if self.activate and wf_id:
+            try:
+                self.client.activate_workflow(wf_id)
+            except N8nApiError as e:
+                print(f"  [WARN] activation {name}: {e}", file=sys.stderr)
+
+        print(f"  [{action}] {name} (id={wf_id}) en {time.monotonic() - start:.2f}s", file=sys.stderr)
+        return True
+
+    def safe_push(self, wf_path):
+        try:
+            return self.push(wf_path)
+        except WorkflowValidationError as e:
+            print(f"  [REJET] {os.path.basename(wf_path)}: {e}", file=sys.stderr)
+        except ValueError as e:
+            # Half-written file: the next save will trigger a new push
+            print(f"  [JSON] {os.path.basename(wf_path)} illisible: {e}", file=sys.stderr)
+        except (N8nApiError, OSError) as e:
+            print(f"  [ERREUR] {os.path.basename(wf_path)}: {e}", file=sys.stderr)
+        return False
+
+
+def watch(paths, pusher, interval=0.25, debounce=0.3):
+    known = scan(paths)
+    pending = {}  # path -> monotonic time of the last observed change
+    print(f"Surveillance de {len(known)} workflows (Ctrl+C pour arreter)", file=sys.stderr)
+
+    while True:
+        time.sleep(interval)
+        now = time.monotonic()
+        current = scan(paths)
+        for path, sig in current.items():
+            if known.get(path) != sig:
+                pending[path] = now
+        known = current
+
+        for path, changed_at in list(pending.items()):
+            if path not in known:
+                del pending[path]
+            elif now - changed_at >= debounce:
+                del pending[path]
+                pusher.safe_push(path)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    options = {'--interval': 0.25, '--debounce': 0.3}
+    paths = []
+    activate = True
+    once = False
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in options:
+            options[arg] = float(args[i + 1])
+            i += 2
+            continue
+        if arg == '--no-activate':
+            activate = False
+        elif arg == '--once':
+            once = True
+        else:
+            paths.append(arg)
+        i += 1
+
+    pusher = WorkflowPusher(N8nClient(), activate=activate)
+
+    if once:
+        ok = all([pusher.safe_push(p) for p in sorted(scan(paths))])
+        sys.exit(0 if ok else 1)
+
+    try:
+        watch(paths or [DEFAULT_ROOT], pusher, options['--interval'], options['--debounce'])
+    except KeyboardInterrupt:
+        pass